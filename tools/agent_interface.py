@@ -147,8 +147,8 @@ class AgentMemoryInterface:
         knowledge = {
             'type': 'knowledge',
             'content': content,
-            'tags': tags or [],
-            'created_by': self.agent_id,
+            # In metadata so queries can filter on them (tag:..., created_by:...)
+            'metadata': {'tags': tags or [], 'created_by': self.agent_id},
             'created_at': datetime.utcnow().isoformat()
         }
         
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: write latency while an online backup runs.
+
+A writer thread creates entities back to back and records how long each
+write takes, first with nothing else running and then while backups run
+continuously, copying ``--pages`` pages per step.
+
+Usage:
+    python tools/bench_backup.py [--entities 20000] [--pages 256] [--seconds 5]
+
+Everything runs in a temporary directory; the real database is never touched.
+"""
+
+import argparse
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_backup import DEFAULT_PAGES_PER_STEP, BackupManager
+from sqlite_memory import SQLiteMemory
+
+
+def populate(memory: SQLiteMemory, count: int):
+    """Fill the database with ``count`` entities of about 1 KB each."""
+    with memory.transaction():
+        for i in range(count):
+            memory.create_entity({'type': 'note', 'name': f'note {i}', 'content': 'x' * 1000})
+
+
+def measure_writes(memory: SQLiteMemory, seconds: float):
+    """Write for ``seconds`` and return per-write latencies in milliseconds."""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        memory.create_entity({'type': 'note', 'name': 'bench', 'content': 'y' * 200})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<16} writes={len(latencies):>6}  p50={statistics.median(latencies):6.2f}ms  "
+          f"p99={p99:6.2f}ms  max={latencies[-1]:7.2f}ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=20000)
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES_PER_STEP)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    root = Path(tempfile.mkdtemp(prefix="bench_backup_"))
+    try:
+        memory = SQLiteMemory(str(root / "memory.db"))
+        populate(memory, args.entities)
+        report("no backup", measure_writes(memory, args.seconds))
+
+        manager = BackupManager(memory, str(root / "backups"), keep=1, pages=args.pages)
+        stop = threading.Event()
+        snapshots = []
+
+        def back_up():
+            while not stop.is_set():
+                start = time.perf_counter()
+                manager.snapshot()
+                snapshots.append(time.perf_counter() - start)
+
+        thread = threading.Thread(target=back_up)
+        thread.start()
+        latencies = measure_writes(memory, args.seconds)
+        stop.set()
+        thread.join()
+        report(f"backup ({args.pages}p)", latencies)
+        print(f"snapshots taken: {len(snapshots)}, mean {statistics.mean(snapshots):.2f}s each")
+    finally:
+        shutil.rmtree(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled context validator vs naive jsonschema validation.
+
+Runs N partial context updates (default 100k) through:
+- naive: re-load the schema and run jsonschema.validate on the merged document
+- jsonschema (preloaded): a Draft7Validator built once, merged document per update
+- compiled (full): CompiledValidator.validate on the merged document
+- compiled (partial): CompiledValidator.validate_update on the changed keys only
+
+Usage:
+    python tools/bench_context_validator.py [--updates 100000] [--naive-sample 2000]
+
+The naive path is slow enough that it is timed on a sample and extrapolated.
+jsonschema is optional (requirements-dev.txt); without it only the compiled
+paths are reported.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from context_validator import SCHEMA_PATH, get_validator
+
+try:
+    import jsonschema
+except ImportError:  # optional benchmark dependency
+    jsonschema = None
+
+BASE_CONTEXT = {
+    'designDoc': 'System design v1',
+    'codeSnippet': 'def main(): pass',
+    'reviewStatus': 'pending',
+    'lastUpdatedBy': 'architect',
+    'timestamp': '2026-01-01T12:00:00Z',
+}
+
+
+def make_updates(count: int, seed: int = 42):
+    """Generate realistic one- or two-key context updates."""
+    rng = random.Random(seed)
+    statuses = ['pending', 'approved', 'changes_requested']
+    agents = ['architect', 'coder', 'reviewer', 'devops']
+    updates = []
+    for i in range(count):
+        update = {
+            'lastUpdatedBy': rng.choice(agents),
+            'timestamp': f'2026-01-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z',
+        }
+        if i % 3 == 0:
+            update['reviewStatus'] = rng.choice(statuses)
+        elif i % 3 == 1:
+            update['codeSnippet'] = f'print({i})'
+        updates.append(update)
+    return updates
+
+
+def timed(label: str, func, updates, scale: float = 1.0):
+    start = time.perf_counter()
+    func(updates)
+    elapsed = (time.perf_counter() - start) * scale
+    per_update_us = elapsed / (len(updates) * scale) * 1e6
+    print(f"{label:<28} {elapsed:9.3f}s  {per_update_us:9.2f} us/update")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark context schema validation.")
+    parser.add_argument('--updates', type=int, default=100_000, help='Number of updates (default: 100000)')
+    parser.add_argument('--naive-sample', type=int, default=2000,
+                        help='Updates actually run for the naive path; the rest is extrapolated')
+    args = parser.parse_args()
+
+    updates = make_updates(args.updates)
+    print(f"Validating {len(updates)} updates against {SCHEMA_PATH}\n")
+
+    def run_compiled_full(batch):
+        validator = get_validator()
+        context = dict(BASE_CONTEXT)
+        for update in batch:
+            context.update(update)
+            validator.validate(context)
+
+    def run_compiled_partial(batch):
+        validator = get_validator()
+        for update in batch:
+            validator.validate_update(update)
+
+    results = {}
+    if jsonschema is not None:
+        def run_naive(batch):
+            context = dict(BASE_CONTEXT)
+            for update in batch:
+                with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                    schema = json.load(f)
+                context.update(update)
+                jsonschema.validate(context, schema, format_checker=jsonschema.FormatChecker())
+
+        def run_preloaded(batch):
+            with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+            validator = jsonschema.Draft7Validator(schema, format_checker=jsonschema.FormatChecker())
+            context = dict(BASE_CONTEXT)
+            for update in batch:
+                context.update(update)
+                validator.validate(context)
+
+        sample = updates[:min(args.naive_sample, len(updates))]
+        results['naive'] = timed('jsonschema (naive, est.)', run_naive, sample, len(updates) / len(sample))
+        results['preloaded'] = timed('jsonschema (preloaded)', run_preloaded, updates)
+    else:
+        print("jsonschema not installed; skipping naive baselines (pip install jsonschema)")
+
+    results['full'] = timed('compiled (full document)', run_compiled_full, updates)
+    results['partial'] = timed('compiled (partial update)', run_compiled_partial, updates)
+
+    if 'naive' in results:
+        print(f"\nSpeedup vs naive: full {results['naive'] / results['full']:.0f}x, "
+              f"partial {results['naive'] / results['partial']:.0f}x")
+        print(f"Speedup vs preloaded jsonschema: full {results['preloaded'] / results['full']:.1f}x, "
+              f"partial {results['preloaded'] / results['partial']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark: load test for the memory HTTP API (memory_http.py).
+
+Client threads, each on one keep-alive connection, send a mix of requests
+for ``--seconds`` and the throughput and latency of each kind are printed:
+
+    get        GET /entities/{id}
+    cond       GET /entities/{id} with If-None-Match (answered 304)
+    batch      POST /batch/get with ``--batch`` ids
+    search     GET /search, reading the whole NDJSON stream
+    create     POST /entities
+
+Usage:
+    python tools/bench_http.py --serve                    # own server on a temp database
+    python tools/bench_http.py --url http://127.0.0.1:8765 --mix get,cond --concurrency 32
+
+With ``--serve`` the server runs in a subprocess on a temporary database
+seeded with ``--entities`` entities; otherwise the target's existing
+entities are used and ``create`` writes into it.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+KINDS = ('get', 'cond', 'batch', 'search', 'create')
+
+
+class Client:
+    """One keep-alive connection to the server."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        payload = None if body is None else json.dumps(body).encode('utf-8')
+        headers = dict(headers or {})
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        self.conn.request(method, path, payload, headers)
+        response = self.conn.getresponse()
+        return response.status, response.getheaders(), response.read()
+
+
+def seed(url: str, count: int) -> List[str]:
+    """Create ``count`` entities through the batch endpoint; returns their ids."""
+    client, ids = Client(url), []
+    for start in range(0, count, 1000):
+        entities = [{'type': 'note', 'name': f'note {i}', 'content': f'bench content {i} ' + 'x' * 200}
+                    for i in range(start, min(count, start + 1000))]
+        status, _, body = client.request('POST', '/batch/create', {'entities': entities})
+        assert status == 201, body
+        ids += [entity['id'] for entity in json.loads(body)['entities']]
+    return ids
+
+
+def existing_ids(url: str, count: int) -> List[str]:
+    _, _, body = Client(url).request('GET', f'/entities?limit={count}')
+    return [json.loads(line)['id'] for line in body.splitlines()]
+
+
+def worker(url: str, ids: List[str], kinds: List[str], batch: int, deadline: float,
+           latencies: Dict[str, List[float]], errors: Dict[str, int]):
+    client, etags, rng = Client(url), {}, random.Random()
+    while time.perf_counter() < deadline:
+        kind = rng.choice(kinds)
+        entity_id = rng.choice(ids)
+        start = time.perf_counter()
+        if kind == 'get':
+            status, _, _ = client.request('GET', f'/entities/{entity_id}')
+            ok = status == 200
+        elif kind == 'cond':
+            if entity_id not in etags:
+                _, headers, _ = client.request('GET', f'/entities/{entity_id}')
+                etags[entity_id] = dict(headers).get('etag', '')
+                start = time.perf_counter()
+            status, _, _ = client.request('GET', f'/entities/{entity_id}',
+                                          headers={'If-None-Match': etags[entity_id]})
+            ok = status == 304
+        elif kind == 'batch':
+            status, _, _ = client.request('POST', '/batch/get', {'ids': rng.sample(ids, min(batch, len(ids)))})
+            ok = status == 200
+        elif kind == 'search':
+            status, _, _ = client.request('GET', f'/search?q=content+{rng.randrange(100)}&limit=50')
+            ok = status == 200
+        else:
+            status, _, _ = client.request('POST', '/entities', {'type': 'note', 'name': 'bench', 'content': 'y'})
+            ok = status == 201
+        elapsed = (time.perf_counter() - start) * 1000
+        latencies[kind].append(elapsed)
+        if not ok:
+            errors[kind] += 1
+
+
+def report(latencies: Dict[str, List[float]], errors: Dict[str, int], seconds: float):
+    total = sum(len(v) for v in latencies.values())
+    print(f"{'kind':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind in KINDS:
+        values = sorted(latencies.get(kind, []))
+        if not values:
+            continue
+        p99 = values[max(0, int(len(values) * 0.99) - 1)]
+        print(f"{kind:<8} {len(values):>9} {len(values) / seconds:>9.0f} "
+              f"{statistics.median(values):>8.2f} {p99:>8.2f} {errors.get(kind, 0):>7}")
+    print(f"{'total':<8} {total:>9} {total / seconds:>9.0f}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--serve', action='store_true', help='Start a server on a temporary database')
+    parser.add_argument('--entities', type=int, default=10000, help='Entities to seed with --serve')
+    parser.add_argument('--pool-size', type=int, default=8, help='Server pool size with --serve')
+    parser.add_argument('--mix', default='get,cond,batch,search', help=f"Comma-separated, from {','.join(KINDS)}")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--batch', type=int, default=50, help='Ids per batch request')
+    args = parser.parse_args()
+    kinds = [kind for kind in args.mix.split(',') if kind]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown request kinds: {', '.join(sorted(unknown))}")
+
+    root = server = None
+    try:
+        if args.serve:
+            root = Path(tempfile.mkdtemp(prefix="bench_http_"))
+            port = free_port()
+            args.url = f'http://127.0.0.1:{port}'
+            server = subprocess.Popen([sys.executable, str(Path(__file__).parent / 'memory_http.py'),
+                                       '--db', str(root / 'memory.db'), '--port', str(port),
+                                       '--pool-size', str(args.pool_size)])
+            for _ in range(100):
+                try:
+                    Client(args.url).request('GET', '/health')
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            ids = seed(args.url, args.entities)
+        else:
+            ids = existing_ids(args.url, args.entities)
+        if not ids:
+            print("No entities to request; use --serve or seed the target first")
+            return 1
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=worker, args=(args.url, ids, kinds, args.batch, deadline,
+                                                         latencies, errors))
+                   for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report(latencies, errors, args.seconds)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if root is not None:
+            shutil.rmtree(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import time of the memory tools, with a budget for CI.
+
+Each module is imported in a fresh interpreter several times; the median
+time of the ``import`` statement (interpreter startup excluded) is compared
+with IMPORT_BUDGET_MS. Most of what remains is the standard library
+(logging, sqlite3, json); the budgets leave room for slow CI machines but
+TestImportBudget also checks that importing opens no database at all.
+
+Usage:
+    python tools/bench_import_time.py              # print the table
+    python tools/bench_import_time.py --check      # exit 1 if a budget is exceeded
+    python tools/bench_import_time.py --repeat 11 unified_memory
+
+TestImportBudget in test_bench_import_time.py runs the check as part of the suite.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable
+
+TOOLS_DIR = Path(__file__).parent
+# Milliseconds; about twice the measured medians
+IMPORT_BUDGET_MS = {
+    'sqlite_memory': 80,
+    'unified_memory': 80,
+    'sync_memory': 120,
+    'check_memory_sync': 120,
+    'memory_cli': 100,
+}
+
+_PROBE = """
+import sys, time
+sys.path[:0] = [{tools!r}, {root!r}]
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def import_time_ms(module: str, repeat: int = 5) -> float:
+    """Median time to import ``module`` in a fresh interpreter, in milliseconds."""
+    probe = _PROBE.format(tools=str(TOOLS_DIR), root=str(TOOLS_DIR.parent), module=module)
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True,
+                                cwd=str(TOOLS_DIR.parent), check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(times)
+
+
+def over_budget(modules: Iterable[str], repeat: int = 5) -> Dict[str, float]:
+    """Return {module: median ms} for every module slower than its budget."""
+    return {module: ms for module in modules
+            if (ms := import_time_ms(module, repeat)) > IMPORT_BUDGET_MS[module]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGET_MS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='Exit 1 if any module is over budget')
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        ms = import_time_ms(module, args.repeat)
+        budget = IMPORT_BUDGET_MS.get(module)
+        verdict = '' if budget is None else ('ok' if ms <= budget else 'OVER BUDGET')
+        failed |= verdict == 'OVER BUDGET'
+        print(f"{module:<20} {ms:7.1f} ms   budget {budget or '-':>4}   {verdict}")
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: calls per second through the stdio MCP memory server (memory_mcp.py).
+
+The server is started as a subprocess on a temporary database seeded with
+``--entities`` entities (and a relation chain between them), and each tool
+is called ``--calls`` times in three ways:
+
+    sequential   send one request, wait for its response, repeat
+    pipelined    keep up to ``--window`` requests in flight
+    batch        send arrays of ``--window`` requests
+
+Usage:
+    python tools/bench_mcp.py [--entities 5000] [--calls 2000] [--window 32] [--workers 4]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+class StdioClient:
+    """JSON-RPC client for a server subprocess; responses are matched by id."""
+
+    def __init__(self, args: List[str]):
+        self.proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._next_id = 0
+        self._responses: Dict[int, Any] = {}
+        self._cond = threading.Condition()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        for line in self.proc.stdout:
+            message = json.loads(line)
+            with self._cond:
+                for response in (message if isinstance(message, list) else [message]):
+                    self._responses[response['id']] = response
+                self._cond.notify_all()
+
+    def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._next_id += 1
+        return {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+
+    def send(self, message: Any):
+        self.proc.stdin.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.proc.stdin.flush()
+
+    def wait(self, ids: List[int]) -> List[Dict[str, Any]]:
+        with self._cond:
+            self._cond.wait_for(lambda: all(i in self._responses for i in ids))
+            return [self._responses.pop(i) for i in ids]
+
+    def call(self, method: str, **params) -> Any:
+        request = self._request(method, params)
+        self.send(request)
+        response = self.wait([request['id']])[0]
+        if 'error' in response:
+            raise RuntimeError(response['error']['message'])
+        return response['result']
+
+    def sequential(self, calls: List[tuple]):
+        for method, params in calls:
+            request = self._request(method, params)
+            self.send(request)
+            self.wait([request['id']])
+
+    def pipelined(self, calls: List[tuple], window: int):
+        in_flight: List[int] = []
+        for method, params in calls:
+            request = self._request(method, params)
+            self.send(request)
+            in_flight.append(request['id'])
+            if len(in_flight) >= window:
+                self.wait(in_flight[:1])
+                in_flight.pop(0)
+        self.wait(in_flight)
+
+    def batched(self, calls: List[tuple], window: int):
+        for start in range(0, len(calls), window):
+            batch = [self._request(method, params) for method, params in calls[start:start + window]]
+            self.send(batch)
+            self.wait([request['id'] for request in batch])
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def workloads(names: List[str], count: int) -> Dict[str, List[tuple]]:
+    rng = random.Random(7)
+    return {
+        'open_nodes': [('open_nodes', {'names': [rng.choice(names)]}) for _ in range(count)],
+        'search_nodes': [('search_nodes', {'query': f'fact {rng.randrange(1000)} '}) for _ in range(count)],
+        'add_observations': [('add_observations', {'observations': [
+            {'entityName': rng.choice(names), 'contents': [f'bench observation {i}']}]}) for i in range(count)],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entities', type=int, default=5000)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--window', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_mcp_"))
+    client = StdioClient([sys.executable, str(Path(__file__).parent / 'memory_mcp.py'),
+                          '--db', str(root / 'memory.db'), '--workers', str(args.workers)])
+    try:
+        names = [f'entity {i}' for i in range(args.entities)]
+        for start in range(0, args.entities, 1000):
+            chunk = names[start:start + 1000]
+            client.call('create_entities', entities=[
+                {'name': name, 'entityType': 'note', 'observations': [f'fact {i} ', f'detail {i}']}
+                for i, name in enumerate(chunk, start)])
+            client.call('create_relations', relations=[
+                {'from': a, 'to': b, 'relationType': 'precedes'} for a, b in zip(chunk, chunk[1:])])
+
+        print(f"{'tool':<18} {'sequential':>12} {'pipelined':>12} {'batch':>12}   calls/s")
+        for tool, calls in workloads(names, args.calls).items():
+            rates = []
+            for mode in ('sequential', 'pipelined', 'batched'):
+                start = time.perf_counter()
+                if mode == 'sequential':
+                    client.sequential(calls)
+                else:
+                    getattr(client, mode)(calls, args.window)
+                rates.append(len(calls) / (time.perf_counter() - start))
+            print(f"{tool:<18} " + ' '.join(f'{rate:>12.0f}' for rate in rates))
+    finally:
+        client.close()
+        shutil.rmtree(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
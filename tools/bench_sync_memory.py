@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory sync on a synthetic memory bank.
+
+Scenarios:
+- noop: a sync where nothing changed (stat fast path, no hashing)
+- full: an initial sync of every file, one file per transaction on a single
+  worker (the old sequential behaviour) vs the parallel batched pipeline
+
+Usage:
+    python tools/bench_sync_memory.py --scenario noop [--files 50000] [--hash sha256]
+    python tools/bench_sync_memory.py --scenario full [--files 10000] [--workers 8]
+
+Everything runs in a temporary directory; the real memory-bank/ and
+database are never touched.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sync_memory import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_HASH_ALGORITHM,
+    DEFAULT_WORKERS,
+    HASH_ALGORITHMS,
+    MemorySynchronizer,
+)
+
+
+def make_memory_bank(root: Path, count: int) -> Path:
+    """Create ``count`` small markdown files spread over 100 directories."""
+    bank = root / "memory-bank"
+    past = time.time() - 3600
+    for i in range(count):
+        directory = bank / f"area{i % 100:03d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"note{i:06d}.md"
+        path.write_text(f"---\ntype: note\n---\n# Note {i}\n\nSynthetic entry {i}.\n")
+        os.utime(path, (past, past))
+    return bank
+
+
+def seed_state(bank: Path, state_file: Path, db_path: str, hash_algorithm: str):
+    """Record every file as synced without writing entities."""
+    sync = MemorySynchronizer(memory_bank_dir=bank, state_file=state_file,
+                              db_path=db_path, hash_algorithm=hash_algorithm)
+    for i, path in enumerate(sync.iter_memory_files()):
+        sync.update_sync_state(path, f"ent_{i}")
+    sync._save_sync_state()
+
+
+def bench_noop(bank: Path, state_file: Path, db_path: str, hash_algorithm: str):
+    start = time.perf_counter()
+    sync = MemorySynchronizer(memory_bank_dir=bank, state_file=state_file,
+                              db_path=db_path, hash_algorithm=hash_algorithm)
+    ok = sync.sync_to_sqlite()
+    elapsed = time.perf_counter() - start
+    print(f"no-op sync: {elapsed:.3f}s ({sync.hashed_count} files hashed, success={ok})")
+
+
+def bench_full(bank: Path, root: Path, hash_algorithm: str, workers: int, batch_size: int):
+    runs = [('sequential (1 worker, 1 file/txn)', 1, 1),
+            (f'pipeline ({workers} workers, {batch_size} files/txn)', workers, batch_size)]
+    for label, run_workers, run_batch in runs:
+        state_file = root / f".sync_state_{run_workers}_{run_batch}.json"
+        db_path = str(root / f"bench_{run_workers}_{run_batch}.db")
+        sync = MemorySynchronizer(memory_bank_dir=bank, state_file=state_file,
+                                  db_path=db_path, hash_algorithm=hash_algorithm)
+        start = time.perf_counter()
+        ok = sync.sync_to_sqlite(workers=run_workers, batch_size=run_batch)
+        elapsed = time.perf_counter() - start
+        files = len(sync.sync_state)
+        print(f"{label:<40} {elapsed:8.2f}s  {files / elapsed:9.0f} files/s  success={ok}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark memory sync.")
+    parser.add_argument('--scenario', choices=['noop', 'full'], default='noop')
+    parser.add_argument('--files', type=int, help='Number of synthetic files (default: 50000 noop, 10000 full)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--hash', dest='hash_algorithm', default=DEFAULT_HASH_ALGORITHM,
+                        choices=sorted(HASH_ALGORITHMS))
+    args = parser.parse_args()
+    if args.files is None:
+        args.files = 50_000 if args.scenario == 'noop' else 10_000
+    # Per-file log lines would dominate the timings
+    logging.disable(logging.INFO)
+
+    root = Path(tempfile.mkdtemp(prefix="bench_sync_"))
+    try:
+        print(f"Creating {args.files} files in {root} ...")
+        bank = make_memory_bank(root, args.files)
+        if args.scenario == 'noop':
+            state_file = root / ".sync_state.json"
+            db_path = str(root / "bench.db")
+            seed_state(bank, state_file, db_path, args.hash_algorithm)
+            bench_noop(bank, state_file, db_path, args.hash_algorithm)
+        else:
+            bench_full(bank, root, args.hash_algorithm, args.workers, args.batch_size)
+    finally:
+        shutil.rmtree(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
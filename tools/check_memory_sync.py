@@ -10,34 +10,60 @@ References:
 - Sync/Protocols: tools/sync_memory.py, docs/memory-protocols.md, rules/session_management.rules.md
 - CI Integration: See stub at end of file
 
-Prerequisite: Run sync_memory.py before using this checker to generate the sync state file.
+Prerequisite: Run sync_memory.py before using this checker to record the sync state
+(stored in the sync_state table of the memory database).
+
+Verification (--verify) also checks the database side: it walks the tree with
+os.scandir on a thread pool and reports
+- missing:  files with no (live) entity in the database
+- stale:    files whose stat no longer matches the one recorded at sync time
+            (with --deep only if re-hashing shows the content really changed)
+- orphaned: sync state rows whose file is gone, and file-based entities no
+            file maps to
+- drifted:  entities whose row no longer matches the hash recorded when the
+            file was synced (changed in the database, not in the file)
+Entries of chunked logs are covered through their file only.
 """
 
 import json
 import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 import sys
 
-# Configure logging
-# Ensure log directory exists
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(str(LOG_DIR / 'memory_sync.log')),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sqlite_memory import SQLiteMemory
+from sync_memory import DEFAULT_WORKERS, ENTITY_HASH_COLUMNS, HASH_ALGORITHMS, entity_digest
+from sync_state import SyncStateStore
 
 # Constants
 MEMORY_BANK_DIR = Path("memory-bank")
+CONFLICT_DIR = MEMORY_BANK_DIR / "_conflicts"
 LOG_DIR = Path("logs")
-SYNC_STATE_FILE = LOG_DIR / ".sync_state.json"
+SYNC_STATE_FILE = LOG_DIR / ".sync_state.json"  # legacy; migrated into the database
+
+# Files per stat task when verifying large directories
+STAT_CHUNK_SIZE = 256
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging():
+    """Log to logs/memory_sync.log and stderr, unless logging is already configured."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(str(LOG_DIR / 'memory_sync.log'), delay=True),
+            logging.StreamHandler()
+        ]
+    )
 
 class MemorySyncChecker:
     """
@@ -45,13 +71,20 @@ class MemorySyncChecker:
     Methods can be used via CLI or imported as a module.
     """
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, memory_bank_dir: Path = None, db_path: str = None,
+                 state_file: Path = None):
         """
         Args:
             verbose (bool): If True, print detailed status to stdout.
+            memory_bank_dir (Path): Memory bank root (default: memory-bank/).
+            db_path (str): Memory database holding the sync state (default: SQLiteMemory's default).
+            state_file (Path): Legacy JSON sync state, migrated into the database
+                (default: logs/.sync_state.json).
         """
         self.verbose = verbose
-        self.sync_state = self._load_sync_state()
+        self.memory_bank_dir = Path(memory_bank_dir) if memory_bank_dir else MEMORY_BANK_DIR
+        self.memory = SQLiteMemory(db_path)
+        self.sync_state = SyncStateStore(self.memory, legacy_file=Path(state_file) if state_file else SYNC_STATE_FILE)
         self.status = {
             'total_files': 0,
             'synced': 0,
@@ -61,38 +94,244 @@ class MemorySyncChecker:
             'details': []
         }
     
-    def _load_sync_state(self) -> Dict:
-        """Load the synchronization state from disk."""
-        if not SYNC_STATE_FILE.exists():
-            logger.warning("No sync state file found. Run sync_memory.py first.")
-            return {}
-            
+    def check_daemon_status(self) -> Optional[int]:
+        """
+        Ask a running sync daemon (sync_memory.py --watch) for status instead of rescanning.
+        Returns an exit code (0=in sync, 1=changes pending), or None if no live daemon answered.
+        """
+        from sync_daemon import STATUS_FILE, read_status
+        daemon = read_status(STATUS_FILE)
+        if daemon is None:
+            logger.info("No live sync daemon found; falling back to a full scan.")
+            return None
+        
+        self.status['daemon'] = daemon
+        self.status['last_sync'] = daemon.get('last_sync_at')
+        if self.verbose:
+            print(json.dumps(self.status, indent=2))
+        else:
+            print(f"Sync daemon (pid {daemon['pid']}, {daemon['watcher']}): "
+                  f"{daemon['pending'] or 0} pending, {daemon['files_synced']} synced in "
+                  f"{daemon['batches']} batches, last lag {daemon['last_lag_seconds']}s.")
+        return 0 if not daemon['pending'] else 1
+    
+    def _iter_files(self, paths: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Optional[os.stat_result]]]:
+        """Yield (path relative to the memory bank, stat or None if missing)."""
+        if paths is not None:
+            conflict_prefix = CONFLICT_DIR.name + os.sep
+            for rel_path in sorted(set(paths)):
+                if not rel_path.endswith('.md') or rel_path.startswith(conflict_prefix):
+                    continue
+                try:
+                    yield rel_path, os.stat(self.memory_bank_dir / rel_path)
+                except FileNotFoundError:
+                    yield rel_path, None
+            return
+        
+        conflict_dir = str(self.memory_bank_dir / CONFLICT_DIR.name)
+        for root, subdirs, files in os.walk(self.memory_bank_dir):
+            if root == conflict_dir:
+                subdirs[:] = []
+                continue
+            for name in files:
+                if name.endswith('.md'):
+                    file_path = os.path.join(root, name)
+                    try:
+                        file_stat = os.stat(file_path)
+                    except FileNotFoundError:  # deleted while scanning
+                        continue
+                    yield os.path.relpath(file_path, self.memory_bank_dir), file_stat
+    
+    @staticmethod
+    def _stat_in_sync(sync_info: Dict[str, Any], file_stat: os.stat_result) -> bool:
+        """Whether a file's stat still matches its sync state entry."""
+        if sync_info['mtime_ns'] is not None:
+            # Exact comparison against the stat recorded at sync time
+            return (sync_info['size'] == file_stat.st_size
+                    and sync_info['mtime_ns'] == file_stat.st_mtime_ns
+                    and sync_info['inode'] == file_stat.st_ino)
+        # Legacy or racily-recorded entry: compare against the sync time (UTC)
+        if not sync_info.get('last_synced'):
+            return False
+        last_synced = datetime.fromisoformat(sync_info['last_synced']).replace(tzinfo=timezone.utc)
+        return file_stat.st_mtime <= last_synced.timestamp()
+    
+    def _list_dir(self, directory: str, prefix: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """One os.scandir pass: (subdirectories, markdown files) as (path, relative path)."""
+        conflict_dir = str(self.memory_bank_dir / CONFLICT_DIR.name)
+        subdirs, files = [], []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != conflict_dir:
+                        subdirs.append((entry.path, prefix + entry.name + os.sep))
+                elif entry.name.endswith('.md') and entry.is_file():
+                    files.append((entry.path, prefix + entry.name))
+        return subdirs, files
+    
+    @staticmethod
+    def _stat_files(files: List[Tuple[str, str]]) -> List[Tuple[str, os.stat_result]]:
+        results = []
+        for path, rel_path in files:
+            try:
+                results.append((rel_path, os.stat(path)))
+            except FileNotFoundError:  # deleted while scanning
+                pass
+        return results
+    
+    def scan_parallel(self, workers: int = DEFAULT_WORKERS) -> Tuple[Dict[str, os.stat_result], int]:
+        """Walk the memory bank, listing directories and stat'ing files on a thread pool.
+        
+        Returns ({relative path: stat}, number of directories that could not be read).
+        """
+        stats: Dict[str, os.stat_result] = {}
+        errors = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = {pool.submit(self._list_dir, str(self.memory_bank_dir), '')}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except OSError as e:
+                        errors += 1
+                        logger.warning(f"Cannot scan directory: {e}")
+                        continue
+                    if isinstance(result, list):  # a stat task
+                        stats.update(result)
+                        continue
+                    subdirs, files = result
+                    pending |= {pool.submit(self._list_dir, *subdir) for subdir in subdirs}
+                    pending |= {pool.submit(self._stat_files, files[i:i + STAT_CHUNK_SIZE])
+                                for i in range(0, len(files), STAT_CHUNK_SIZE)}
+        return stats, errors
+    
+    def _content_changed(self, rel_path: str, sync_info: Dict[str, Any]) -> bool:
+        """Re-hash a file with its recorded algorithm; True if the content differs."""
+        algorithm = sync_info.get('algo') or 'sha256'
+        if algorithm not in HASH_ALGORITHMS:
+            return True
+        hasher = HASH_ALGORITHMS[algorithm]()
         try:
-            with open(SYNC_STATE_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Error loading sync state: {e}")
-            return {}
+            with open(self.memory_bank_dir / rel_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    hasher.update(block)
+        except FileNotFoundError:
+            return True
+        return hasher.hexdigest() != sync_info['hash']
+    
+    def verify(self, deep: bool = False, workers: int = DEFAULT_WORKERS) -> int:
+        """
+        Verify the files against the database (see the module docstring).
+        With ``deep``, files whose stat changed are re-hashed (in parallel) and
+        only reported stale if their content differs; no other file is read.
+        Returns an exit code: 0=consistent, 1=problems found, 2=no sync state.
+        """
+        files, scan_errors = self.scan_parallel(workers)
+        columns = ', '.join(f'e.{column}' for column in ENTITY_HASH_COLUMNS)
+        with self.memory._get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT s.*, e.id AS present, e.deleted_at, {columns}
+                FROM sync_state s LEFT JOIN entities e ON e.id = s.entity_id
+            ''').fetchall()
+            # Entities written by the file sync that no file maps to any more
+            unmapped = conn.execute('''
+                SELECT id, name FROM entities
+                WHERE deleted_at IS NULL
+                  AND CASE WHEN json_valid(metadata)
+                      THEN json_extract(metadata, '$.source') END = 'file_based'
+                  AND id NOT IN (SELECT entity_id FROM sync_state WHERE entity_id IS NOT NULL)
+                  AND id NOT IN (SELECT entity_id FROM sync_chunks WHERE entity_id IS NOT NULL)
+            ''').fetchall()
+        if not rows:
+            logger.error("No sync state available. Please run sync_memory.py first.")
+            return 2
+        
+        state = {row['path']: dict(row) for row in rows}
+        report: Dict[str, List[Dict[str, Any]]] = {'missing': [], 'stale': [], 'orphaned': [], 'drifted': []}
+        changed_stat = []
+        verified = 0
+        for rel_path in sorted(files):
+            row = state.get(rel_path)
+            if row is None or row['present'] is None or row['deleted_at']:
+                reason = 'never synced' if row is None else 'entity not in database'
+                report['missing'].append({'file': rel_path, 'reason': reason})
+                continue
+            if (row['entity_hash'] and row['algo'] in HASH_ALGORITHMS
+                    and entity_digest(row, row['algo']) != row['entity_hash']):
+                report['drifted'].append({'file': rel_path, 'entity_id': row['entity_id']})
+            if self._stat_in_sync(row, files[rel_path]):
+                verified += 1
+            elif deep:
+                changed_stat.append(rel_path)
+            else:
+                report['stale'].append({'file': rel_path, 'last_synced': row['last_synced']})
+        
+        if changed_stat:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                changed = pool.map(lambda path: self._content_changed(path, state[path]), changed_stat)
+                for rel_path, content_changed in zip(changed_stat, changed):
+                    if content_changed:
+                        report['stale'].append({'file': rel_path, 'last_synced': state[rel_path]['last_synced']})
+                    else:
+                        verified += 1  # touched, but identical
+        
+        if scan_errors:
+            # Files in unreadable directories would look deleted
+            logger.warning("Skipping the orphan check: part of the memory bank could not be scanned.")
+        else:
+            report['orphaned'] += [{'file': path, 'entity_id': row['entity_id']}
+                                   for path, row in sorted(state.items()) if path not in files]
+        report['orphaned'] += [{'entity_id': row['id'], 'name': row['name']} for row in unmapped]
+        
+        self.status['total_files'] = len(files)
+        self.status['synced'] = verified
+        self.status['rehashed'] = len(changed_stat)
+        self.status['last_sync'] = max((row['last_synced'] for row in rows if row['last_synced']), default=None)
+        for kind, entries in report.items():
+            self.status[kind] = len(entries)
+            self.status['details'] += [{**entry, 'status': kind} for entry in entries]
+        
+        summary = ', '.join(f"{len(entries)} {kind}" for kind, entries in report.items())
+        logger.info(f"Verified {len(files)} files ({len(changed_stat)} re-hashed): {summary}")
+        if self.verbose:
+            print(json.dumps(self.status, indent=2))
+        else:
+            print(f"Verification: {verified} in sync, {summary}.")
+        if any(report.values()):
+            logger.warning("The memory bank and the database disagree; run sync_memory.py.")
+            return 1
+        logger.info("The memory bank and the database agree.")
+        return 0
     
-    def check_sync_status(self) -> int:
+    def check_sync_status(self, paths: Optional[Iterable[str]] = None) -> int:
         """
         Check synchronization status of all memory files.
+        With ``paths`` (e.g. from git change discovery) only those files are
+        examined and every other synced file is counted as in sync.
         Returns an exit code: 0=all synced, 1=out-of-sync, 2=error/no sync state.
         """
-        if not self.sync_state:
+        if not self.sync_state.load_all():
             logger.error("No sync state available. Please run sync_memory.py first.")
             return 2  # Fixed: Ensure function returns an int exit code for error state
         
-        memory_files = list(MEMORY_BANK_DIR.glob("**/*.md"))
-        self.status['total_files'] = len(memory_files)
+        latest_sync = max((entry['last_synced'] for entry in self.sync_state.values()
+                           if entry['last_synced']), default=None)
         
-        latest_sync = None
-        
-        for file_path in memory_files:
-            rel_path = str(file_path.relative_to(MEMORY_BANK_DIR))
-            file_stat = file_path.stat()
-            
-            if rel_path not in self.sync_state:
+        for rel_path, file_stat in self._iter_files(paths):
+            sync_info = self.sync_state.get(rel_path)
+            if file_stat is None:
+                if sync_info is not None:
+                    # Deleted since the last sync
+                    self.status['out_of_sync'] += 1
+                    self.status['details'].append({
+                        'file': rel_path,
+                        'status': 'deleted',
+                        'last_synced': sync_info['last_synced']
+                    })
+                continue
+            self.status['total_files'] += 1
+            if sync_info is None:
                 self.status['never_synced'] += 1
                 self.status['details'].append({
                     'file': rel_path,
@@ -100,21 +339,13 @@ class MemorySyncChecker:
                     'last_modified': datetime.fromtimestamp(file_stat.st_mtime).isoformat()
                 })
                 continue
-                
-            sync_info = self.sync_state[rel_path]
-            last_modified = datetime.fromtimestamp(file_stat.st_mtime)
-            last_synced = datetime.fromisoformat(sync_info['last_synced'])
             
-            # Track the most recent sync time
-            if latest_sync is None or last_synced > latest_sync:
-                latest_sync = last_synced
-                
-            if last_modified > last_synced.replace(tzinfo=timezone.utc).astimezone():
-                self.status['out_of_sync'] += 1
-                status = 'out_of_sync'
-            else:
+            if self._stat_in_sync(sync_info, file_stat):
                 self.status['synced'] += 1
                 status = 'synced'
+            else:
+                self.status['out_of_sync'] += 1
+                status = 'out_of_sync'
                 
             self.status['details'].append({
                 'file': rel_path,
@@ -123,6 +354,15 @@ class MemorySyncChecker:
                 'last_synced': sync_info['last_synced']
             })  # Fixed: Added missing dictionary key/value pairs and closed brace
         
+        if paths is not None:
+            # Files git reports as unchanged since the synced commit
+            checked = set(paths)
+            unchanged = sum(1 for path in self.sync_state if path not in checked)
+            self.status['total_files'] += unchanged
+            self.status['synced'] += unchanged
+        
+        self.status['last_sync'] = latest_sync
+        
         # Protocol reference log
         logger.info("Checked according to Unified Memory System protocols (see docs/memory-protocols.md).")
         logger.info(f"Total files: {self.status['total_files']}")
@@ -147,17 +387,37 @@ def main():
     """
     Main entry point for the sync checker.
     Usage:
-        python tools/check_memory_sync.py [--verbose|--quiet]
+        python tools/check_memory_sync.py [--verbose|--quiet] [--daemon] [--discovery git] [--verify [--deep]]
     Returns exit code: 0=all synced, 1=out-of-sync, 2=error/no sync state.
     """
     import argparse
+    configure_logging()
     parser = argparse.ArgumentParser(description="Check memory sync status.")
     parser.add_argument('--verbose', action='store_true', help='Show full sync status JSON.')
     parser.add_argument('--quiet', action='store_true', help='Suppress all output except exit code.')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Ask a running sync daemon for status; rescan only if none is running.')
+    parser.add_argument('--discovery', choices=['scan', 'git'], default='scan',
+                        help='Check every file (default) or only those git reports as changed '
+                             'since the last synced commit.')
+    parser.add_argument('--verify', action='store_true',
+                        help='Also check the database: report missing, stale, orphaned and drifted entries.')
+    parser.add_argument('--deep', action='store_true',
+                        help='With --verify: re-hash files whose stat changed instead of reporting them stale.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'With --verify: threads for scanning and hashing (default: {DEFAULT_WORKERS}).')
     args = parser.parse_args()
 
     checker = MemorySyncChecker(verbose=args.verbose)
-    exit_code = checker.check_sync_status()
+    if args.verify or args.deep:
+        return checker.verify(deep=args.deep, workers=args.workers)
+    exit_code = checker.check_daemon_status() if args.daemon else None
+    if exit_code is None:
+        paths = None
+        if args.discovery == 'git':
+            from git_discovery import GitChangeDiscovery
+            paths = GitChangeDiscovery(checker.memory_bank_dir, checker.memory).changed_paths()
+        exit_code = checker.check_sync_status(paths)
     if args.quiet:
         pass  # Suppress output
     return exit_code
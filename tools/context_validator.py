@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Context Schema Validator
+========================
+
+Validates project context against config/context.schema.json.
+
+The schema is compiled once into specialised per-property check functions
+(generated Python source, compiled to a code object). The compiled form is
+cached on disk under logs/.schema_cache/, keyed by the SHA-256 of the schema
+file and of this module, so later processes skip the compile step entirely.
+
+---
+ONBOARDING & USAGE
+---
+- Purpose: Cheap enough to validate every context write, not only in CI.
+- Quickstart:
+    from context_validator import get_validator
+    validator = get_validator()
+    validator.validate(context)                     # full document
+    validator.validate_update({'reviewStatus': 'approved'})  # changed keys only
+- CLI / CI:
+    python tools/context_validator.py path/to/context.json [more.json ...]
+    Exit code: 0=all valid, 1=validation errors, 2=could not read input.
+- Benchmark:
+    python tools/bench_context_validator.py
+
+Supported keywords: type, enum, const, format (date-time, date), minLength,
+maxLength, pattern, minimum, maximum, exclusiveMinimum, exclusiveMaximum,
+items, properties, required, additionalProperties. Annotation keywords
+($schema, $comment, title, description, default, examples) are ignored.
+Any other keyword raises SchemaCompileError so a schema change never
+silently weakens validation.
+
+References:
+- Schema: config/context.schema.json
+- Checklist: checklist/05_context_schema_checklist.md
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+SCHEMA_PATH = Path(__file__).parent.parent / 'config' / 'context.schema.json'
+CACHE_DIR = Path(__file__).parent.parent / 'logs' / '.schema_cache'
+
+ANNOTATION_KEYWORDS = {'$schema', '$comment', '$id', 'title', 'description', 'default', 'examples'}
+SUPPORTED_KEYWORDS = {
+    'type', 'enum', 'const', 'format', 'minLength', 'maxLength', 'pattern',
+    'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+    'items', 'properties', 'required', 'additionalProperties',
+}
+
+# Type tests emitted into generated code. Booleans are excluded from the
+# numeric types, as JSON Schema requires.
+_TYPE_TESTS = {
+    'string': 'isinstance({v}, str)',
+    'integer': '(isinstance({v}, int) and not isinstance({v}, bool))',
+    'number': '(isinstance({v}, (int, float)) and not isinstance({v}, bool))',
+    'boolean': 'isinstance({v}, bool)',
+    'object': 'isinstance({v}, dict)',
+    'array': 'isinstance({v}, list)',
+    'null': '({v} is None)',
+}
+
+# Runtime helpers shared by all generated check functions.
+_PRELUDE = '''
+import re
+from datetime import date, datetime
+
+_DATE_TIME_RE = re.compile(r'^\\d{4}-\\d{2}-\\d{2}[Tt ]\\d{2}:\\d{2}:\\d{2}(\\.\\d+)?([Zz]|[+-]\\d{2}:\\d{2})$')
+_DATE_RE = re.compile(r'^\\d{4}-\\d{2}-\\d{2}$')
+
+
+def _is_date_time(value):
+    if not _DATE_TIME_RE.match(value):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00').replace('z', '+00:00'))
+    except ValueError:
+        return False
+    return True
+
+
+def _is_date(value):
+    if not _DATE_RE.match(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _json_key(value):
+    # JSON equality: true is not 1, but 1 is 1.0; None for arrays and objects
+    if isinstance(value, bool):
+        return ('boolean', value)
+    if isinstance(value, (int, float)):
+        return ('number', value)
+    if isinstance(value, (dict, list)):
+        return None
+    return (type(value).__name__, value)
+
+
+def _json_equal(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    key = _json_key(a)
+    return key is not None and key == _json_key(b)
+'''
+
+_FORMAT_TESTS = {
+    'date-time': '_is_date_time',
+    'date': '_is_date',
+}
+
+
+class SchemaCompileError(ValueError):
+    """Raised when the schema uses a keyword the compiler does not support."""
+
+
+class ContextValidationError(ValueError):
+    """Raised when a context document or update fails validation."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+class _CodeGen:
+    """Generates Python source for a schema, one function per property."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.counter = 0
+
+    def _name(self, hint: str) -> str:
+        self.counter += 1
+        safe = ''.join(c if c.isalnum() else '_' for c in hint)
+        return f'_check_{self.counter}_{safe}'
+
+    def emit_function(self, schema: Dict[str, Any], hint: str) -> str:
+        """Emit a check function for ``schema`` and return its name.
+
+        Generated functions take ``(value, path)`` and return a list of error
+        strings (empty when valid).
+        """
+        unknown = set(schema) - SUPPORTED_KEYWORDS - ANNOTATION_KEYWORDS
+        if unknown:
+            raise SchemaCompileError(f"Unsupported schema keyword(s) at {hint}: {sorted(unknown)}")
+
+        # Children first so their names are defined before use.
+        prop_funcs = {
+            key: self.emit_function(sub, f'{hint}.{key}')
+            for key, sub in schema.get('properties', {}).items()
+        }
+        items_func = self.emit_function(schema['items'], f'{hint}[]') if 'items' in schema else None
+        additional = schema.get('additionalProperties', True)
+        additional_func = (
+            self.emit_function(additional, f'{hint}.*') if isinstance(additional, dict) else None
+        )
+
+        name = self._name(hint)
+        body: List[str] = []
+        types = schema.get('type')
+        if types is not None:
+            types = [types] if isinstance(types, str) else list(types)
+            tests = ' or '.join(_TYPE_TESTS[t].format(v='value') for t in types)
+            body += [
+                f'if not ({tests}):',
+                f'    return [path + {": expected " + "/".join(types) + ", got "!r} + type(value).__name__]',
+            ]
+        if 'const' in schema:
+            body += [
+                f'if not _json_equal(value, {schema["const"]!r}):',
+                f'    return [path + {": must equal " + repr(schema["const"])!r}]',
+            ]
+        if 'enum' in schema:
+            allowed = tuple(schema['enum'])
+            hashable = all(not isinstance(v, (dict, list)) for v in allowed)
+            const_name = f'{name}_ENUM'
+            if hashable:
+                # Keyed by JSON kind, so True does not match 1 and lists never reach the set
+                self.lines.append(f'{const_name} = frozenset(_json_key(v) for v in {allowed!r})')
+                test = f'_json_key(value) not in {const_name}'
+            else:
+                self.lines.append(f'{const_name} = {allowed!r}')
+                test = f'not any(_json_equal(value, v) for v in {const_name})'
+            body += [
+                f'if {test}:',
+                f'    return [path + {": must be one of " + repr(list(allowed))!r}]',
+            ]
+
+        string_checks: List[str] = []
+        if 'minLength' in schema:
+            string_checks += [
+                f'    if len(value) < {int(schema["minLength"])}:',
+                f'        errors.append(path + ": shorter than {int(schema["minLength"])}")',
+            ]
+        if 'maxLength' in schema:
+            string_checks += [
+                f'    if len(value) > {int(schema["maxLength"])}:',
+                f'        errors.append(path + ": longer than {int(schema["maxLength"])}")',
+            ]
+        if 'pattern' in schema:
+            pattern_name = f'{name}_PATTERN'
+            self.lines.append(f'{pattern_name} = re.compile({schema["pattern"]!r})')
+            string_checks += [
+                f'    if not {pattern_name}.search(value):',
+                f'        errors.append(path + {": does not match " + repr(schema["pattern"])!r})',
+            ]
+        if 'format' in schema and schema['format'] in _FORMAT_TESTS:
+            string_checks += [
+                f'    if not {_FORMAT_TESTS[schema["format"]]}(value):',
+                f'        errors.append(path + ": not a valid {schema["format"]}")',
+            ]
+
+        numeric_checks: List[str] = []
+        for keyword, op in (('minimum', '<'), ('maximum', '>'),
+                            ('exclusiveMinimum', '<='), ('exclusiveMaximum', '>=')):
+            if keyword in schema:
+                numeric_checks += [
+                    f'    if value {op} {schema[keyword]!r}:',
+                    f'        errors.append(path + {": violates " + keyword + " " + repr(schema[keyword])!r})',
+                ]
+
+        body.append('errors = []')
+        if string_checks:
+            body.append('if isinstance(value, str):')
+            body += string_checks
+        if numeric_checks:
+            body.append('if isinstance(value, (int, float)) and not isinstance(value, bool):')
+            body += numeric_checks
+        if items_func:
+            body += [
+                'if isinstance(value, list):',
+                '    for index, item in enumerate(value):',
+                f'        errors.extend({items_func}(item, path + "[" + str(index) + "]"))',
+            ]
+        if prop_funcs or 'required' in schema or additional is not True:
+            table_name = f'{name}_PROPS'
+            self.lines.append(
+                f'{table_name} = {{' + ', '.join(f'{k!r}: {f}' for k, f in prop_funcs.items()) + '}'
+            )
+            body.append('if isinstance(value, dict):')
+            for key in schema.get('required', []):
+                body += [
+                    f'    if {key!r} not in value:',
+                    f'        errors.append(path + {": missing required property " + repr(key)!r})',
+                ]
+            body += [
+                '    for key, item in value.items():',
+                f'        check = {table_name}.get(key)',
+                '        if check is not None:',
+                '            errors.extend(check(item, path + "." + key))',
+            ]
+            if additional is False:
+                body += [
+                    '        else:',
+                    '            errors.append(path + ": unexpected property " + repr(key))',
+                ]
+            elif additional_func:
+                body += [
+                    '        else:',
+                    f'            errors.extend({additional_func}(item, path + "." + key))',
+                ]
+        body.append('return errors')
+
+        # Hoisted constants must precede the function definition.
+        self.lines.append(f'def {name}(value, path):')
+        self.lines += ['    ' + line for line in body]
+        self.lines.append('')
+        return name
+
+
+def generate_source(schema: Dict[str, Any]) -> str:
+    """Generate the Python source implementing ``schema``.
+
+    The top-level object schema is split into a per-property table
+    (``PROPERTY_CHECKS``) so partial updates can run only the checks for the
+    keys that changed.
+    """
+    gen = _CodeGen()
+    prop_funcs = {
+        key: gen.emit_function(sub, key)
+        for key, sub in schema.get('properties', {}).items()
+    }
+    rest = {k: v for k, v in schema.items() if k not in ('properties', 'required', 'additionalProperties')}
+    root_func = gen.emit_function(rest, '$')
+    additional = schema.get('additionalProperties', True)
+    additional_func = gen.emit_function(additional, '*') if isinstance(additional, dict) else None
+
+    lines = [_PRELUDE] + gen.lines + [
+        'PROPERTY_CHECKS = {' + ', '.join(f'{k!r}: {f}' for k, f in prop_funcs.items()) + '}',
+        f'REQUIRED = {tuple(schema.get("required", []))!r}',
+        f'ADDITIONAL_ALLOWED = {additional is not False!r}',
+        f'ADDITIONAL_CHECK = {additional_func or "None"}',
+        f'ROOT_CHECK = {root_func}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+class CompiledValidator:
+    """Validator built from generated check functions.
+
+    Use ``validate`` for whole documents and ``validate_update`` for partial
+    writes; the latter only runs the checks for the keys being changed.
+    """
+
+    def __init__(self, namespace: Dict[str, Any], schema_hash: str):
+        self.schema_hash = schema_hash
+        self._checks: Dict[str, Callable[[Any, str], List[str]]] = namespace['PROPERTY_CHECKS']
+        self._required: Tuple[str, ...] = namespace['REQUIRED']
+        self._additional_allowed: bool = namespace['ADDITIONAL_ALLOWED']
+        self._additional_check = namespace['ADDITIONAL_CHECK']
+        self._root_check = namespace['ROOT_CHECK']
+
+    def _check_key(self, key: str, value: Any) -> List[str]:
+        check = self._checks.get(key)
+        if check is not None:
+            return check(value, key)
+        if not self._additional_allowed:
+            return [f"$: unexpected property {key!r}"]
+        if self._additional_check is not None:
+            return self._additional_check(value, key)
+        return []
+
+    def iter_errors(self, context: Any) -> List[str]:
+        """Return all validation errors for a full context document."""
+        errors = self._root_check(context, '$')
+        if errors or not isinstance(context, dict):
+            return errors
+        for key in self._required:
+            if key not in context:
+                errors.append(f"$: missing required property {key!r}")
+        for key, value in context.items():
+            errors.extend(self._check_key(key, value))
+        return errors
+
+    def is_valid(self, context: Any) -> bool:
+        """Return True if ``context`` is a valid full document."""
+        return not self.iter_errors(context)
+
+    def validate(self, context: Any) -> None:
+        """Validate a full context document.
+
+        Raises:
+            ContextValidationError: If the document is invalid
+        """
+        errors = self.iter_errors(context)
+        if errors:
+            raise ContextValidationError(errors)
+
+    def validate_update(self, updates: Dict[str, Any], removed: Iterable[str] = ()) -> None:
+        """Validate a partial update against an already-valid document.
+
+        Only the properties present in ``updates`` are checked; removing a
+        required property is rejected.
+
+        Args:
+            updates: Changed properties and their new values
+            removed: Properties being deleted from the document
+
+        Raises:
+            ContextValidationError: If any changed property is invalid
+        """
+        errors: List[str] = []
+        for key, value in updates.items():
+            errors.extend(self._check_key(key, value))
+        for key in removed:
+            if key in self._required:
+                errors.append(f"$: cannot remove required property {key!r}")
+        if errors:
+            raise ContextValidationError(errors)
+
+
+@functools.lru_cache(maxsize=None)
+def _generator_hash() -> str:
+    # Generated code changes with this module, so its source is part of the key
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+def _cache_file(cache_dir: Path, schema_hash: str) -> Path:
+    # Code objects are only portable within one interpreter version.
+    return cache_dir / f'context-{schema_hash[:16]}-{_generator_hash()[:8]}-{sys.implementation.cache_tag}.bin'
+
+
+def compile_schema(schema_path: Path = SCHEMA_PATH, cache_dir: Optional[Path] = CACHE_DIR) -> CompiledValidator:
+    """Compile a schema file, reusing the on-disk cache when possible.
+
+    Args:
+        schema_path: Path to the JSON schema
+        cache_dir: Directory for compiled artefacts, or None to disable caching
+
+    Returns:
+        A CompiledValidator for the schema
+    """
+    raw = Path(schema_path).read_bytes()
+    schema_hash = hashlib.sha256(raw).hexdigest()
+
+    code = None
+    cache_file = _cache_file(Path(cache_dir), schema_hash) if cache_dir else None
+    if cache_file and cache_file.exists():
+        try:
+            code = marshal.loads(cache_file.read_bytes())
+        except (EOFError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable schema cache {cache_file}: {e}")
+
+    if code is None:
+        source = generate_source(json.loads(raw))
+        code = compile(source, f'<compiled {Path(schema_path).name}>', 'exec')
+        if cache_file:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache_file.with_suffix(f'.tmp{os.getpid()}')
+                tmp.write_bytes(marshal.dumps(code))
+                os.replace(tmp, cache_file)
+            except OSError as e:
+                logger.warning(f"Could not write schema cache {cache_file}: {e}")
+        logger.debug(f"Compiled schema {schema_path} ({schema_hash[:12]})")
+
+    namespace: Dict[str, Any] = {}
+    exec(code, namespace)
+    return CompiledValidator(namespace, schema_hash)
+
+
+# In-process memo: (path, size, mtime_ns) -> validator
+_validators: Dict[Tuple[str, int, int], CompiledValidator] = {}
+
+
+def get_validator(schema_path: Path = SCHEMA_PATH, cache_dir: Optional[Path] = CACHE_DIR) -> CompiledValidator:
+    """Return the validator for ``schema_path``, compiling at most once per process.
+
+    A stat check detects schema edits without re-reading the file.
+    """
+    stat = os.stat(schema_path)
+    key = (str(Path(schema_path).resolve()), stat.st_size, stat.st_mtime_ns)
+    validator = _validators.get(key)
+    if validator is None:
+        validator = compile_schema(schema_path, cache_dir)
+        _validators[key] = validator
+    return validator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Validate one or more context files.
+    Usage:
+        python tools/context_validator.py context.json [more.json ...] [--schema PATH]
+    Returns exit code: 0=all valid, 1=validation errors, 2=could not read input.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="Validate context files against context.schema.json.")
+    parser.add_argument('files', nargs='+', help='Context JSON files to validate')
+    parser.add_argument('--schema', default=str(SCHEMA_PATH), help='Schema file (default: config/context.schema.json)')
+    args = parser.parse_args(argv)
+
+    validator = get_validator(Path(args.schema))
+    exit_code = 0
+    for name in args.files:
+        try:
+            with open(name, 'r', encoding='utf-8') as f:
+                context = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"{name}: cannot read: {e}")
+            return 2
+        errors = validator.iter_errors(context)
+        if errors:
+            exit_code = 1
+            for error in errors:
+                print(f"{name}: {error}")
+        else:
+            print(f"{name}: valid")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Memory Export (Database -> Files)
+=================================
+
+Renders entities written through UnifiedMemory / SQLiteMemory back into
+memory-bank/ markdown files, the other half of the two-way sync promised
+in MEMORY_SYSTEM.md.
+
+---
+ONBOARDING & USAGE
+---
+- Purpose: Makes agent-written memory visible in memory-bank/ without
+  regenerating every file.
+- Quickstart:
+    python tools/export_memory.py              # export changes since the last run
+    python tools/export_memory.py --full       # re-render every entity
+    python tools/sync_memory.py --export       # files -> DB, then DB -> files
+- How it works:
+    - Triggers on the entities table append to the ``entity_changes`` log;
+      the exporter resumes from a cursor kept in ``sync_meta``. Writes made
+      by sync_memory.py are marked as coming from files and are not exported.
+    - Entities synced from a file are rendered back to that file. Entities
+      created in the database go to memory-bank/db/<type>/<id>.md with their
+      id in the frontmatter, so the next files -> DB sync maps them back to
+      the same entity instead of creating a copy.
+    - A file is only rewritten when the rendered text differs, through a
+      temporary file and an atomic rename. Database changes are merged into
+      the existing file: frontmatter keys the sync does not model (owner,
+      tags...) and the blank lines around the body are kept.
+    - If a file was edited since it was last synced (its hash no longer
+      matches the sync state), the database version is written to
+      memory-bank/_conflicts/ instead and the file is left alone. The same
+      happens when the file's frontmatter cannot be parsed for the merge.
+- Limitations:
+    - Entries of chunked logs (actionLog.md etc.) and the files they belong to
+      are not exported; edit those files directly.
+- Troubleshooting:
+    - Logs go to logs/memory_sync.log like the files -> DB sync.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+import frontmatter
+from sync_memory import MemorySynchronizer, configure_logging
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CURSOR_KEY = 'export_cursor'
+DB_EXPORT_DIR = 'db'
+# Metadata written by the sync itself; never rendered into frontmatter
+SYNC_METADATA_KEYS = frozenset({'source', 'file_path', 'last_updated', 'chunk_key'})
+# Frontmatter keys sync_memory.py reads into the entity; any others are the author's
+MODELED_KEYS = frozenset({'id', 'name', 'type', 'metadata'})
+
+
+def _entity_header(entity: Dict[str, Any], file_based: bool, stem: Optional[str] = None) -> Dict[str, Any]:
+    """Frontmatter keys the sync models (id, name, type, metadata) for an entity."""
+    header: Dict[str, Any] = {}
+    if not file_based:
+        header['id'] = entity['id']
+        header['name'] = entity['name']
+    elif stem is not None and entity['name'] != stem:
+        header['name'] = entity['name']
+    if not file_based or entity['type'] != 'document':
+        header['type'] = entity['type']
+    custom = {k: v for k, v in (entity.get('metadata') or {}).items() if k not in SYNC_METADATA_KEYS}
+    if custom:
+        header['metadata'] = custom
+    return header
+
+
+def _effective(header: Dict[str, Any], stem: Optional[str]) -> tuple:
+    """The modelled values a header stands for, with the sync's defaults filled in."""
+    return (header.get('id'), header.get('name', stem), header.get('type', 'document'),
+            header.get('metadata') or {})
+
+
+def _header_lines(header: Dict[str, Any], original: Dict[str, Any]) -> List[str]:
+    lines = []
+    for key, value in header.items():
+        if key in MODELED_KEYS:
+            lines.append(f"{key}: {json.dumps(value, sort_keys=True, ensure_ascii=False)}")
+        else:
+            # Human-authored keys keep their YAML types (dates, multi-line strings)
+            yaml, _ = frontmatter._yaml()
+            lines.append(yaml.safe_dump({key: original[key]}, allow_unicode=True,
+                                        default_flow_style=False, sort_keys=False).rstrip('\n'))
+    return lines
+
+
+def render_entity(entity: Dict[str, Any], file_based: bool, existing: Optional[str] = None,
+                  stem: Optional[str] = None) -> Optional[str]:
+    """Render an entity as markdown with frontmatter.
+
+    Values are written as JSON, which YAML parses as flow scalars and
+    mappings; keys are sorted so unchanged entities render byte-identically.
+    Entities that came from a file keep that file's name, so only their type
+    and custom metadata go into the frontmatter.
+
+    With ``existing`` (the current text of the file, unchanged since it was
+    synced) the database changes are merged into it: frontmatter keys the
+    sync does not model (``owner:``, ``tags:``...) are kept, the header is
+    left byte-identical when none of the modelled values changed, and the
+    blank lines around the body are preserved. Returns None if the existing
+    frontmatter cannot be parsed, so nothing would be merged safely.
+    """
+    header = _entity_header(entity, file_based, stem)
+    content = (entity.get('content') or '').strip('\n')
+    if existing is None:
+        lines: List[str] = []
+        if header:
+            lines = ['---'] + _header_lines(header, {}) + ['---']
+        return '\n'.join(lines + [content]) + '\n'
+
+    original = frontmatter.parse_frontmatter(existing)
+    if original.error:
+        return None
+    old_body = existing[len(original.raw):]
+    if old_body.strip() == content.strip():
+        body = old_body
+    else:
+        lead = old_body[:len(old_body) - len(old_body.lstrip())]
+        body = lead + content.strip() + (old_body[len(old_body.rstrip()):] or '\n')
+
+    if _effective(original.metadata, stem) == _effective(header, stem):
+        return original.raw + body
+    merged = {}
+    for key in original.metadata:
+        if key not in MODELED_KEYS:
+            merged[key] = original.metadata[key]
+        elif key in header:
+            merged[key] = header[key]
+    merged.update((key, value) for key, value in header.items() if key not in merged)
+    if not merged:
+        return body
+    return '\n'.join(['---'] + _header_lines(merged, original.metadata) + ['---']) + '\n' + body
+
+
+class MemoryExporter:
+    """Incrementally writes database changes back into the memory bank."""
+
+    def __init__(self, synchronizer: MemorySynchronizer):
+        """
+        Args:
+            synchronizer: Provides the database, sync state, memory bank
+                          location and hash algorithm shared with the
+                          files -> DB direction
+        """
+        self.sync = synchronizer
+        self.memory = synchronizer.memory
+        self.memory_bank_dir = synchronizer.memory_bank_dir
+
+    def _db_export_path(self, entity: Dict[str, Any]) -> str:
+        entity_type = re.sub(r'[^\w.-]', '_', entity['type']) or 'document'
+        return os.path.join(DB_EXPORT_DIR, entity_type, f"{entity['id']}.md")
+
+    def _file_state(self, rel_path: str):
+        """Return (current bytes or None, True if untouched since the last sync)."""
+        path = self.memory_bank_dir / rel_path
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            data = None
+        known = self.sync.sync_state.get(rel_path)
+        if known is None:
+            return data, data is None
+        if data is None:
+            return None, False  # deleted on disk since the last sync
+        return data, self.sync.hash_bytes(data, known.get('algo')) == known['hash']
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp{os.getpid()}")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_conflict(self, rel_path: str, seq: int, data: bytes):
+        target = self.sync.conflict_dir / Path(rel_path).with_suffix(f'.db-{seq}.md')
+        self._write_atomic(target, data)
+        logger.warning(f"Conflict: {rel_path} changed on disk and in the database; "
+                       f"database version written to {target}")
+
+    def _record(self, rel_path: str, data: bytes, entity_id: str):
+        st = os.stat(self.memory_bank_dir / rel_path)
+        with self.memory._get_connection() as conn:
+            entity_hash = self.sync.entity_hash(conn, entity_id)
+        self.sync.sync_state[rel_path] = self.sync._state_entry(self.sync.hash_bytes(data), st,
+                                                                 entity_id, entity_hash)
+
+    def export_entity(self, entity_id: str, seq: int, stats: Dict[str, int], dry_run: bool = False):
+        """Bring the file of one changed (or deleted) entity up to date."""
+        entity = self.memory.get_entity(entity_id)
+        rel_path = self.sync.sync_state.path_for_entity(entity_id)
+
+        if entity is None or entity.get('deleted_at'):
+            if rel_path is None:
+                return
+            data, untouched = self._file_state(rel_path)
+            if data is not None and not untouched:
+                stats['conflicts'] += 1
+                logger.warning(f"Conflict: entity {entity_id} was deleted but {rel_path} was edited; keeping the file")
+            elif not dry_run:
+                if data is not None:
+                    (self.memory_bank_dir / rel_path).unlink()
+                del self.sync.sync_state[rel_path]
+                stats['deleted'] += 1
+                logger.info(f"Removed {rel_path} (entity {entity_id} deleted)")
+            return
+
+        if entity['metadata'].get('chunk_key'):
+            stats['skipped'] += 1
+            return
+        file_based = rel_path is not None and not rel_path.startswith(DB_EXPORT_DIR + os.sep)
+        if rel_path is None:
+            rel_path = self._db_export_path(entity)
+        if file_based:
+            with self.memory._get_connection() as conn:
+                if self.sync.sync_state.chunk_rows(conn, rel_path):
+                    stats['skipped'] += 1
+                    return
+
+        data, untouched = self._file_state(rel_path)
+        rendered = render_entity(entity, file_based).encode('utf-8')
+        if data is not None and untouched:
+            # Merge into the file as synced, keeping what the sync does not model
+            try:
+                merged = render_entity(entity, file_based, data.decode('utf-8'), Path(rel_path).stem)
+            except UnicodeDecodeError:
+                merged = None
+            if merged is None:
+                untouched = False  # cannot merge safely; write a conflict file instead
+                logger.warning(f"Cannot merge into the frontmatter of {rel_path}")
+            else:
+                rendered = merged.encode('utf-8')
+        if data == rendered:
+            stats['unchanged'] += 1
+            if not dry_run and self.sync.sync_state.get(rel_path, {}).get('hash') != self.sync.hash_bytes(data):
+                self._record(rel_path, data, entity_id)
+            return
+        if not untouched:
+            stats['conflicts'] += 1
+            if not dry_run:
+                self._write_conflict(rel_path, seq, rendered)
+            return
+
+        stats['exported'] += 1
+        if dry_run:
+            logger.info(f"Would write {rel_path}")
+            return
+        self._write_atomic(self.memory_bank_dir / rel_path, rendered)
+        self._record(rel_path, rendered, entity_id)
+        logger.info(f"Exported entity {entity_id} to {rel_path}")
+
+    def export(self, full: bool = False, dry_run: bool = False) -> Dict[str, int]:
+        """Export every entity changed since the last run (or all with ``full``).
+
+        Returns:
+            Counters: exported, unchanged, deleted, conflicts, skipped, errors
+        """
+        stats = {'exported': 0, 'unchanged': 0, 'deleted': 0, 'conflicts': 0, 'skipped': 0, 'errors': 0}
+        with self.memory._get_connection() as conn:
+            cursor = int(get_meta(conn, EXPORT_CURSOR_KEY, '0'))
+            last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM entity_changes').fetchone()[0]
+            if full:
+                pending = {row['id']: last_seq for row in conn.execute('SELECT id FROM entities')}
+            else:
+                # Only the newest change per entity matters; if it came from a
+                # file the database already matches that file
+                latest: Dict[str, Any] = {}
+                for row in conn.execute('SELECT seq, entity_id, origin FROM entity_changes '
+                                        'WHERE seq > ? AND seq <= ? ORDER BY seq', (cursor, last_seq)):
+                    latest[row['entity_id']] = row
+                pending = {entity_id: row['seq'] for entity_id, row in latest.items() if row['origin'] == 'db'}
+
+        logger.info(f"Exporting {len(pending)} changed entities (changes {cursor + 1}..{last_seq})")
+        for entity_id, seq in pending.items():
+            try:
+                self.export_entity(entity_id, seq, stats, dry_run)
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error exporting entity {entity_id}: {e}", exc_info=True)
+
+        if not dry_run:
+            # Sync state and cursor move together, so an interrupted run is
+            # simply repeated (rendering is idempotent)
+            with self.memory.transaction() as conn:
+                self.sync.sync_state.flush()
+                if not stats['errors']:  # failed entities are retried next run
+                    set_meta(conn, EXPORT_CURSOR_KEY, str(last_seq))
+        logger.info(f"Export complete: {stats['exported']} written, {stats['unchanged']} unchanged, "
+                    f"{stats['deleted']} removed, {stats['conflicts']} conflicts, {stats['errors']} errors")
+        return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the export script."""
+    import argparse
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Write database changes back into memory-bank/ files.")
+    parser.add_argument('--full', action='store_true', help='Re-render every entity, not just recent changes')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be written without writing')
+    args = parser.parse_args(argv)
+
+    stats = MemoryExporter(MemorySynchronizer()).export(full=args.full, dry_run=args.dry_run)
+    print(json.dumps(stats))
+    if stats['errors']:
+        return 2
+    return 1 if stats['conflicts'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
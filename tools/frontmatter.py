@@ -0,0 +1,125 @@
+"""
+Frontmatter Reader
+==================
+
+Reads the YAML frontmatter block at the top of memory-bank markdown files
+without splitting the whole document.
+
+---
+ONBOARDING & USAGE
+---
+- Used by sync_memory.py; agents never need it.
+- A frontmatter block starts with a ``---`` line as the very first line and
+  ends at the next ``---`` (or ``...``) line. Horizontal rules further down
+  the document are never mistaken for it.
+- Examples:
+    header = parse_frontmatter(text)       # text already in memory
+    body = text[len(header.raw):]
+    with open(path, 'rb') as f:
+        header = read_frontmatter(f)       # reads only the header lines
+        body = f.read()                    # or stream the rest of f
+- ``header.metadata`` is {} when there is no block or it is invalid;
+  ``header.error`` then says why. Treat it as read-only: parsed headers are
+  cached and shared between files with identical frontmatter.
+- Uses PyYAML's C loader (libyaml) when available, else the pure-Python one;
+  PyYAML is imported when the first block is parsed, not at import.
+"""
+
+import functools
+from typing import Any, BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+
+# A block not closed within this many bytes is not treated as frontmatter
+MAX_HEADER_BYTES = 64 * 1024
+# Distinct frontmatter blocks kept parsed; memory-bank files share few
+PARSE_CACHE_SIZE = 4096
+
+_OPEN = '---'
+_CLOSE = ('---', '...')
+
+
+class Frontmatter(NamedTuple):
+    """A parsed frontmatter block."""
+    metadata: Dict[str, Any]
+    raw: str  # the block including both delimiter lines; '' if there is none
+    error: Optional[str] = None
+
+
+NO_FRONTMATTER = Frontmatter({}, '')
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml():
+    """Import PyYAML on first use (it is the slowest import of the sync tools)."""
+    try:
+        import yaml
+    except ImportError:  # frontmatter parsing is skipped without PyYAML
+        return None, None
+    return yaml, getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _load(source: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Parse YAML once per distinct block; returns (metadata, error)."""
+    yaml, loader = _yaml()
+    if yaml is None:
+        return None, "PyYAML is not installed"
+    try:
+        metadata = yaml.load(source, Loader=loader)
+    except yaml.YAMLError as e:
+        return None, str(e)
+    if metadata is None:
+        return {}, None
+    if not isinstance(metadata, dict):
+        return None, f"expected a mapping, got {type(metadata).__name__}"
+    return metadata, None
+
+
+def _parsed(raw: str, source: str) -> Frontmatter:
+    metadata, error = _load(source)
+    return Frontmatter(metadata if metadata is not None else {}, raw, error)
+
+
+def parse_frontmatter(text: str) -> Frontmatter:
+    """Find and parse the frontmatter block at the start of ``text``."""
+    if not text.startswith(_OPEN):
+        return NO_FRONTMATTER
+    end = text.find('\n')
+    if end < 0 or text[:end].rstrip() != _OPEN:
+        return NO_FRONTMATTER
+    start = pos = end + 1
+    limit = min(len(text), MAX_HEADER_BYTES)
+    while pos < limit:
+        end = text.find('\n', pos)
+        line_end = len(text) if end < 0 else end + 1
+        if text[pos:line_end].rstrip() in _CLOSE:
+            return _parsed(text[:line_end], text[start:pos])
+        pos = line_end
+    return NO_FRONTMATTER
+
+
+def read_frontmatter(stream: BinaryIO, max_bytes: int = MAX_HEADER_BYTES) -> Frontmatter:
+    """Read the frontmatter block from a binary file positioned at its start.
+
+    Only the header lines are read, so the stream is left at the first byte
+    of the body and large bodies can be streamed by the caller. Without a
+    block the stream is rewound to where it was.
+    """
+    start = stream.tell()
+    first = stream.readline(max_bytes)
+    if first.rstrip().decode('utf-8', 'replace') != _OPEN:
+        stream.seek(start)
+        return NO_FRONTMATTER
+    lines = [first]
+    size = len(first)
+    while size < max_bytes:
+        line = stream.readline(max_bytes - size)
+        if not line:
+            break
+        lines.append(line)
+        size += len(line)
+        if line.rstrip().decode('utf-8', 'replace') in _CLOSE:
+            raw = b''.join(lines).decode('utf-8')
+            return _parsed(raw, b''.join(lines[1:-1]).decode('utf-8'))
+    stream.seek(start)
+    return NO_FRONTMATTER
@@ -0,0 +1,132 @@
+"""
+Git Change Discovery
+====================
+
+Asks git which memory-bank files changed since the last synced commit, so
+sync_memory.py and check_memory_sync.py can skip walking and stat'ing the
+whole tree. Useful in CI, where the memory bank is a git checkout.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/sync_memory.py --discovery git
+    python tools/check_memory_sync.py --discovery git
+- How it works:
+    - `git diff --name-only <synced commit>` lists tracked files changed since
+      the commit recorded by the last git-discovery sync (committed, staged
+      and unstaged changes, deletions included).
+    - `git ls-files --others --exclude-standard` adds untracked files.
+    - After a successful sync the HEAD commit is recorded in the sync_meta
+      table of the memory database, together with the paths that differed
+      from it (dirty or untracked). Those are always checked again, since
+      reverting a dirty file or deleting a synced untracked one leaves no
+      trace in the diff against HEAD.
+- Falls back to a full scan when there is no recorded commit yet, when it
+  is no longer reachable (e.g. after a rebase or in a shallow clone), or
+  when the memory bank is not inside a git work tree.
+- Files ignored by .gitignore are never discovered; run a plain sync to
+  pick those up.
+"""
+
+import json
+import logging
+import os
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+from sqlite_memory import SQLiteMemory
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+SYNCED_COMMIT_KEY = 'git_synced_commit'
+SYNCED_DIRTY_KEY = 'git_synced_dirty'
+
+
+class GitChangeDiscovery:
+    """Lists memory-bank paths changed since the last synced commit."""
+
+    def __init__(self, memory_bank_dir: Path, memory: SQLiteMemory):
+        """
+        Args:
+            memory_bank_dir: Memory bank root; git commands run from here
+            memory: Database whose sync_meta table holds the synced commit
+        """
+        self.memory_bank_dir = Path(memory_bank_dir)
+        self.memory = memory
+
+    def _git(self, *args: str) -> Optional[str]:
+        """Run git in the memory bank; return stdout, or None if it failed."""
+        try:
+            result = subprocess.run(['git', *args], cwd=self.memory_bank_dir,
+                                    capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.debug(f"git {' '.join(args)} failed: {getattr(e, 'stderr', e)}")
+            return None
+        return result.stdout
+
+    @staticmethod
+    def _split(output: str) -> List[str]:
+        # -z output: NUL separated, no quoting; git always uses '/'
+        return [path.replace('/', os.sep) for path in output.split('\0') if path]
+
+    def head(self) -> Optional[str]:
+        """Return the HEAD commit, or None outside a git work tree."""
+        output = self._git('rev-parse', '--verify', '-q', 'HEAD')
+        return output.strip() if output else None
+
+    def synced_commit(self) -> Optional[str]:
+        with self.memory._get_connection() as conn:
+            return get_meta(conn, SYNCED_COMMIT_KEY)
+
+    def synced_dirty(self) -> Set[str]:
+        """Paths that differed from the synced commit when it was recorded."""
+        with self.memory._get_connection() as conn:
+            return set(json.loads(get_meta(conn, SYNCED_DIRTY_KEY, '[]')))
+
+    def dirty_paths(self) -> Optional[Set[str]]:
+        """Return the paths that differ from HEAD (modified, deleted or untracked)."""
+        tracked = self._git('diff', '--name-only', '--relative', '--no-renames', '-z', 'HEAD', '--', '.')
+        untracked = self._git('ls-files', '--others', '--exclude-standard', '-z', '--', '.')
+        if tracked is None or untracked is None:
+            return None
+        return set(self._split(tracked)) | set(self._split(untracked))
+
+    def changed_paths(self) -> Optional[Set[str]]:
+        """Return paths (relative to the memory bank) changed since the synced commit.
+
+        Returns None when a full scan is needed instead.
+        """
+        since = self.synced_commit()
+        if since is None:
+            logger.info("No synced commit recorded yet; using a full scan")
+            return None
+        if self._git('cat-file', '-e', f'{since}^{{commit}}') is None:
+            logger.warning(f"Synced commit {since[:12]} is not available; using a full scan")
+            return None
+        tracked = self._git('diff', '--name-only', '--relative', '--no-renames', '-z', since, '--', '.')
+        untracked = self._git('ls-files', '--others', '--exclude-standard', '-z', '--', '.')
+        if tracked is None or untracked is None:
+            return None
+        paths = set(self._split(tracked)) | set(self._split(untracked)) | self.synced_dirty()
+        logger.info(f"git reports {len(paths)} changed path(s) since {since[:12]}")
+        return paths
+
+    def record(self, commit: str, dirty: Optional[Iterable[str]] = None):
+        """Remember ``commit`` as synced; the next discovery diffs against it.
+
+        Args:
+            commit: The HEAD commit the sync started from
+            dirty: dirty_paths() taken before the sync; the paths dirty now
+                are added, so a file reverted during the sync is still seen
+        """
+        now = self.dirty_paths()
+        if now is None:
+            logger.warning("Cannot list dirty paths; not recording the synced commit")
+            return
+        dirty = sorted(now | set(dirty or ()))
+        with self.memory.transaction() as conn:
+            set_meta(conn, SYNCED_COMMIT_KEY, commit)
+            set_meta(conn, SYNCED_DIRTY_KEY, json.dumps(dirty))
@@ -0,0 +1,99 @@
+"""
+Markdown Chunking
+=================
+
+Splits append-only memory-bank logs (actionLog.md, decisionLog.md, votes.md,
+milestones.md) into entries, so the sync only re-ingests the entries that
+changed instead of the whole file.
+
+---
+ONBOARDING & USAGE
+---
+- Used by sync_memory.py; agents never need it.
+- Rules:
+    - Text before the first ``##``-or-deeper heading is the preamble.
+    - Every such heading starts a chunk that runs to the next heading.
+    - Every data row of a markdown table is its own chunk (a new log line
+      is a new chunk); text after a table continues its section.
+    - Headings inside fenced code blocks are ignored.
+- Concatenating the preamble and the chunk texts reproduces the input
+  exactly, so files can be rebuilt from their chunks.
+- Chunk keys are stable across appends and edits: the heading text, or the
+  first cell of a table row, de-duplicated with a ``#n`` suffix.
+"""
+
+import re
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+HEADING_RE = re.compile(r'^(#{2,6})\s+(.*?)\s*#*\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+
+
+class Chunk(NamedTuple):
+    """One entry of a chunked file."""
+    key: str    # stable identity within the file
+    title: str  # heading text or first table cell
+    text: str   # exact source text, including trailing newlines
+    hash: str
+
+
+def _first_cell(row: str) -> str:
+    cells = [cell.strip() for cell in row.strip().strip('|').split('|')]
+    return next((cell for cell in cells if cell), row.strip())
+
+
+def split_chunks(text: str, new_hasher: Callable) -> Tuple[str, List[Chunk]]:
+    """Split markdown into (preamble, chunks).
+
+    Args:
+        text: Markdown body (frontmatter already removed)
+        new_hasher: hashlib-style constructor used for the chunk hashes
+
+    Returns:
+        The preamble text and the chunks in document order
+    """
+    lines = text.splitlines(keepends=True)
+    preamble: List[str] = []
+    pieces: List[Tuple[str, str, List[str]]] = []  # (key base, title, lines)
+    current = preamble
+    section = ''
+    in_fence = False
+    in_table = False
+
+    def start(key: str, title: str):
+        nonlocal current
+        current = []
+        pieces.append((key, title, current))
+
+    for i, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            heading = HEADING_RE.match(line)
+            if heading:
+                section = heading.group(2)
+                in_table = False
+                start(section, section)
+            elif in_table:
+                if line.lstrip().startswith('|'):
+                    start(f"{section}|{_first_cell(line)}", _first_cell(line))
+                else:
+                    in_table = False
+                    if line.strip():
+                        start(f"{section}+", section)
+            elif TABLE_SEPARATOR_RE.match(line) and i > 0 and '|' in lines[i - 1]:
+                in_table = True
+        current.append(line)
+
+    chunks: List[Chunk] = []
+    seen: Dict[str, int] = {}
+    for key, title, chunk_lines in pieces:
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
+        chunk_text = ''.join(chunk_lines)
+        hasher = new_hasher()
+        hasher.update(chunk_text.encode('utf-8'))
+        chunks.append(Chunk(key, title, chunk_text, hasher.hexdigest()))
+    return ''.join(preamble), chunks
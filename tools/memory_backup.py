@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Memory Database Backup
+======================
+
+Online backups of the memory database and verified restores, without
+stopping the agents that are writing to it.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_cli.py backup                       # one snapshot now
+    python tools/memory_cli.py backup --list
+    python tools/memory_cli.py restore memory-bank/backups/windsurf_memory-20261019-120000.db
+    python tools/memory_backup.py --every 3600 --keep 24    # hourly snapshots, keep a day
+- How it works:
+    - Backups use SQLite's online backup API and copy ``pages`` pages per
+      step, sleeping between steps. A step holds a read lock only for as
+      long as it copies its pages, so writers get the database in between.
+      If a writer changes the database mid-copy, SQLite restarts the copy,
+      so every snapshot is consistent; after a few restarts under constant
+      writes the copy is finished in one step instead.
+    - A snapshot is written to a temporary file and renamed into
+      ``memory-bank/backups/`` once complete; older snapshots beyond
+      ``keep`` are removed.
+    - Restore copies the snapshot into a fresh file next to the database,
+      runs ``PRAGMA integrity_check`` on it, and only then copies it over
+      the live database in a single transaction, so readers see either the
+      old contents or the restored ones.
+- Troubleshooting:
+    - A restore refused with "integrity check failed" left the database
+      untouched; try an older snapshot.
+    - Writes made by agents while a restore runs are lost with the rest of
+      the old contents; pause writers first if that matters.
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from query_cache import EPOCH_KEY
+from sqlite_memory import SQLiteMemory
+from sync_state import set_meta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_SLEEP = 0.005
+DEFAULT_KEEP = 10
+DEFAULT_MAX_RESTARTS = 3
+BACKUP_PREFIX = 'windsurf_memory-'
+
+
+class BackupError(Exception):
+    """Raised when a backup or restore cannot be completed safely."""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def online_backup(source_path: str, dest_path: str, pages: int = DEFAULT_PAGES_PER_STEP,
+                  sleep: float = DEFAULT_STEP_SLEEP, max_restarts: int = DEFAULT_MAX_RESTARTS):
+    """Copy ``source_path`` into ``dest_path`` a few pages at a time.
+
+    Each write to the source from another connection restarts a stepped copy.
+    After ``max_restarts`` restarts the copy is done in a single step instead,
+    which holds the read lock for the whole copy but always finishes.
+    ``dest_path`` is written through a temporary file and renamed into place
+    when complete, so it never holds a partial copy.
+    """
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+
+    tmp_path = f"{dest_path}.tmp"
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        except _TooManyRestarts:
+            logger.info(f"Backup of {source_path} restarted {restarts} times; copying in one step")
+            source.backup(target, pages=-1)
+    except BaseException:
+        target.close()
+        os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(tmp_path, dest_path)
+
+
+def integrity_errors(path: str) -> List[str]:
+    """Run ``PRAGMA integrity_check`` and return its complaints (empty if the file is sound)."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = [row[0] for row in conn.execute('PRAGMA integrity_check')]
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    finally:
+        conn.close()
+    return [] if rows == ['ok'] else rows
+
+
+class BackupManager:
+    """Snapshots of one memory database, kept in a backup directory."""
+
+    def __init__(self, memory: SQLiteMemory, backup_dir: str = None, keep: int = DEFAULT_KEEP,
+                 pages: int = DEFAULT_PAGES_PER_STEP, sleep: float = DEFAULT_STEP_SLEEP):
+        """
+        Args:
+            memory: Database to back up and restore into
+            backup_dir: Where snapshots live (default: backups/ next to the database)
+            keep: Number of snapshots kept; older ones are deleted after each snapshot
+            pages: Pages copied per backup step
+            sleep: Seconds writers get between backup steps
+        """
+        self.memory = memory
+        self.db_path = Path(memory.db_path)
+        self.backup_dir = Path(backup_dir) if backup_dir else self.db_path.parent / 'backups'
+        self.keep = max(1, keep)
+        self.pages = pages
+        self.sleep = sleep
+
+    def snapshots(self) -> List[Path]:
+        """Existing snapshots, oldest first."""
+        if not self.backup_dir.exists():
+            return []
+        return sorted(self.backup_dir.glob(f'{BACKUP_PREFIX}*.db'))
+
+    def snapshot(self) -> Path:
+        """Take a snapshot now and apply retention; returns the snapshot path."""
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = self.backup_dir / f'{BACKUP_PREFIX}{stamp}.db'
+        start = time.perf_counter()
+        online_backup(str(self.db_path), str(path), pages=self.pages, sleep=self.sleep)
+        logger.info(f"Backed up {self.db_path} to {path} in {time.perf_counter() - start:.2f}s")
+        self.prune()
+        return path
+
+    def prune(self) -> List[Path]:
+        """Delete all but the newest ``keep`` snapshots; returns the deleted paths."""
+        snapshots = self.snapshots()
+        removed = snapshots[:-self.keep]
+        for path in removed:
+            path.unlink()
+            logger.info(f"Removed old backup {path}")
+        return removed
+
+    def restore(self, snapshot: str):
+        """Replace the database with ``snapshot`` after verifying a copy of it.
+
+        Raises:
+            BackupError: If the snapshot is missing or fails the integrity check
+        """
+        snapshot = Path(snapshot)
+        if not snapshot.is_file():
+            raise BackupError(f"Backup not found: {snapshot}")
+        staged = self.db_path.with_name(f'{self.db_path.name}.restore')
+        try:
+            online_backup(str(snapshot), str(staged), pages=-1, sleep=0)
+        except sqlite3.DatabaseError as e:
+            raise BackupError(f"Cannot read backup {snapshot}: {e}") from e
+        errors = integrity_errors(str(staged))
+        if errors:
+            staged.unlink()
+            raise BackupError(f"Integrity check failed for {snapshot}: {'; '.join(errors[:5])}")
+        # A new cache epoch, so results cached before the restore cannot be
+        # mistaken for the restored state (see query_cache.py)
+        epoch, epoch_written = uuid.uuid4().hex, False
+        conn = sqlite3.connect(str(staged))
+        try:
+            with conn:
+                set_meta(conn, EPOCH_KEY, epoch)
+            epoch_written = True
+        except sqlite3.OperationalError:
+            pass  # a backup older than sync_meta; written once the schema is upgraded
+        finally:
+            conn.close()
+
+        # Copy the verified file over the live database in a single backup
+        # step: one write transaction on the destination, so other
+        # connections see either the old contents or the restored ones
+        source = sqlite3.connect(str(staged))
+        target = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            source.backup(target, pages=-1)
+        finally:
+            source.close()
+            target.close()
+            staged.unlink()
+        # Bring a snapshot taken before a schema upgrade up to date
+        self.memory._ensure_db_exists()
+        if not epoch_written:
+            with self.memory._get_connection() as conn:
+                set_meta(conn, EPOCH_KEY, epoch)
+        logger.info(f"Restored {self.db_path} from {snapshot}")
+
+    def run(self, interval: float):
+        """Take a snapshot every ``interval`` seconds until interrupted."""
+        logger.info(f"Backing up {self.db_path} every {interval}s, keeping {self.keep}")
+        try:
+            while True:
+                try:
+                    self.snapshot()
+                except (OSError, sqlite3.Error) as e:
+                    logger.error(f"Backup failed: {e}", exc_info=True)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Scheduled backups stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for scheduled backups."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Back up the memory database.")
+    parser.add_argument('--db', default=None, help='Database (default: memory-bank/windsurf_memory.db)')
+    parser.add_argument('--dir', default=None, help='Backup directory (default: backups/ next to the database)')
+    parser.add_argument('--keep', type=int, default=DEFAULT_KEEP,
+                        help=f'Snapshots to keep (default: {DEFAULT_KEEP})')
+    parser.add_argument('--every', type=float, default=None, metavar='SECONDS',
+                        help='Take a snapshot every SECONDS instead of once')
+    args = parser.parse_args(argv)
+
+    manager = BackupManager(SQLiteMemory(args.db), args.dir, keep=args.keep)
+    if args.every:
+        manager.run(args.every)
+    else:
+        print(manager.snapshot())
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Memory Batch Runner
+===================
+
+Executes a JSONL stream of memory_cli commands over one database
+connection, committing them in groups, and streams one JSONL result per
+command back in input order.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_cli.py batch commands.jsonl
+    generate_commands | python tools/memory_cli.py batch - --group-size 1000 > results.jsonl
+    python tools/memory_cli.py batch commands.jsonl --atomic
+    python tools/memory_cli.py batch commands.jsonl --continue-on-error
+- Commands (one JSON object per line; fields as in the memory_cli subcommands):
+    {"command": "create", "type": "note", "data": {"name": "n", "content": "..."}}
+    {"command": "update", "entity_id": "ent_1", "data": {"name": "renamed"}}
+    {"command": "delete", "entity_id": "ent_1"}
+    {"command": "relate", "from_id": "ent_1", "to_id": "ent_2", "rel_type": "refers_to", "data": {}}
+    {"command": "search", "query": "sync", "type": "note", "limit": 10}
+    {"command": "get", "entity_id": "ent_1"}
+- Results, one line per non-blank input line, in order:
+    {"line": 3, "ok": true, "result": {...}}
+    {"line": 4, "ok": false, "error": "Entity ent_9 not found"}
+  followed by one summary line:
+    {"summary": {"commands": 4, "ok": 3, "failed": 1, "committed": 3}}
+  Results are written as commands run; only the commands counted in
+  ``committed`` are in the database.
+- Transactions:
+    - By default commands are committed ``--group-size`` at a time (default
+      500) and the batch stops at the first failing command. Everything
+      before it is committed and nothing after it runs.
+    - ``--continue-on-error``: a failing command is rolled back on its own
+      (each command runs in a savepoint) and the batch carries on.
+    - ``--atomic``: the whole batch is one transaction; any failure rolls
+      everything back.
+- A ``get`` of a missing entity is not an error (result ``null``); an
+  ``update``, ``delete`` or ``relate`` that finds nothing to act on is.
+"""
+
+import json
+import logging
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from unified_memory import UnifiedMemory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_SIZE = 500
+
+
+class CommandError(Exception):
+    """A batch command that is malformed or found nothing to act on."""
+
+
+def _require(command: Dict[str, Any], *fields: str):
+    missing = [field for field in fields if command.get(field) in (None, '')]
+    if missing:
+        raise CommandError(f"{command.get('command')} needs {', '.join(missing)}")
+
+
+def execute(memory: UnifiedMemory, command: Any) -> Any:
+    """Run one batch command and return its result."""
+    if not isinstance(command, dict):
+        raise CommandError('A command must be a JSON object')
+    name = command.get('command')
+    data = command.get('data') or {}
+    if not isinstance(data, dict):
+        raise CommandError('data must be a JSON object')
+    if name == 'create':
+        _require(command, 'type')
+        return memory.create_entity({**data, 'type': command['type']})
+    if name == 'get':
+        _require(command, 'entity_id')
+        return memory.get_entity(command['entity_id'])
+    if name == 'update':
+        _require(command, 'entity_id')
+        entity = memory.update_entity(command['entity_id'], data)
+        if entity is None:
+            raise CommandError(f"Entity {command['entity_id']} not found")
+        return entity
+    if name == 'delete':
+        _require(command, 'entity_id')
+        if not memory.delete_entity(command['entity_id']):
+            raise CommandError(f"Entity {command['entity_id']} not found")
+        return True
+    if name == 'relate':
+        _require(command, 'from_id', 'to_id', 'rel_type')
+        if not memory.create_relationship(command['from_id'], command['to_id'], command['rel_type'], data):
+            raise CommandError('Relationship exists or an entity is missing')
+        return True
+    if name == 'search':
+        _require(command, 'query')
+        return memory.search_entities(command['query'], command.get('type'), command.get('limit', 10))
+    raise CommandError(f"Unknown command {name!r}")
+
+
+class BatchRunner:
+    """Runs command streams against one UnifiedMemory in transaction groups."""
+
+    def __init__(self, memory: UnifiedMemory, group_size: int = DEFAULT_GROUP_SIZE,
+                 atomic: bool = False, continue_on_error: bool = False):
+        """
+        Args:
+            memory: Memory to run the commands against; give it
+                ``reuse_connections=True`` so every group uses one connection
+            group_size: Commands per transaction (ignored with ``atomic``)
+            atomic: Run the whole stream as one transaction
+            continue_on_error: Roll back only the failing command and go on
+        """
+        if atomic and continue_on_error:
+            raise ValueError('atomic and continue_on_error are mutually exclusive')
+        self.memory = memory
+        self.group_size = max(1, group_size)
+        self.atomic = atomic
+        self.continue_on_error = continue_on_error
+
+    def run(self, lines: Iterable[str], out: IO[str]) -> Dict[str, int]:
+        """Execute every command in ``lines``, writing results to ``out``; returns the summary."""
+        db = self.memory.db
+        summary = {'commands': 0, 'ok': 0, 'failed': 0, 'committed': 0}
+        pending = 0  # succeeded in the open transaction
+        group = ExitStack()
+        in_group = 0
+        try:
+            for line_no, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                if in_group == 0:
+                    group.enter_context(db.transaction())
+                in_group += 1
+                summary['commands'] += 1
+                try:
+                    command = json.loads(line)
+                    with db.transaction():  # a savepoint, so a failure undoes only this command
+                        result = execute(self.memory, command)
+                except Exception as e:
+                    summary['failed'] += 1
+                    self._write(out, {'line': line_no, 'ok': False, 'error': str(e) or type(e).__name__})
+                    if self.atomic:
+                        pending = 0
+                        group.__exit__(type(e), e, e.__traceback__)  # rolls the batch back
+                        in_group = 0
+                        break
+                    if not self.continue_on_error:
+                        break
+                else:
+                    summary['ok'] += 1
+                    pending += 1
+                    self._write(out, {'line': line_no, 'ok': True, 'result': result})
+                if not self.atomic and in_group >= self.group_size:
+                    group.close()
+                    summary['committed'] += pending
+                    pending = in_group = 0
+                    out.flush()
+        except BaseException as e:
+            if in_group:
+                group.__exit__(type(e), e, e.__traceback__)
+            raise
+        if in_group:
+            group.close()
+            summary['committed'] += pending
+        self._write(out, {'summary': summary})
+        out.flush()
+        logger.info(f"Batch: {summary['ok']} ok, {summary['failed']} failed, {summary['committed']} committed")
+        return summary
+
+    @staticmethod
+    def _write(out: IO[str], record: Dict[str, Any]):
+        out.write(json.dumps(record, ensure_ascii=False, default=str))
+        out.write('\n')
@@ -16,18 +16,43 @@ Example usage:
   python tools/memory_cli.py get <entity_id>
   python tools/memory_cli.py update <entity_id> --data '{"role": "Reviewer"}'
   python tools/memory_cli.py list agent
+  python tools/memory_cli.py query 'type:knowledge tag:decision updated>2026-01-01 "auth flow"'
+  python tools/memory_cli.py query 'type:task' --all --format ndjson --fields id,name | jq .
+  python tools/memory_cli.py count 'type:task'
+  python tools/memory_cli.py backup [--keep 10]
+  python tools/memory_cli.py restore memory-bank/backups/<file>.db
+  python tools/memory_cli.py export memory.jsonl.gz
+  python tools/memory_cli.py import memory.jsonl.gz
+  python tools/memory_cli.py batch commands.jsonl [--atomic | --continue-on-error]
+
+When tools/memory_server.py is running for the same database, get, create,
+update, delete, search, relate, get-rels, list, query and count are sent to it
+instead of opening the database (except query --explain); --no-server
+forces direct mode.
 """
 
 import argparse
 import json
+import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Iterator, Optional, List
 
 # Add parent directory to path to allow imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from tools.unified_memory import UnifiedMemory
+# Light enough to import unconditionally; the database modules are only
+# imported when the command runs in-process
+from tools.memory_server import MemoryClient
+
+# Defaults duplicated from memory_backup / memory_jsonl to keep them lazy
+DEFAULT_KEEP = 10
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_GROUP_SIZE = 500
+# Commands a running memory server can answer
+SERVER_COMMANDS = {'create', 'get', 'update', 'delete', 'search', 'relate', 'get-rels', 'list', 'query', 'count'}
+# Duplicated from memory_output.FORMATS
+OUTPUT_FORMATS = ('text', 'ndjson', 'csv', 'table')
 
 def print_entity(entity: Dict[str, Any], indent: int = 0) -> None:
     """
@@ -56,6 +81,47 @@ def print_entity(entity: Dict[str, Any], indent: int = 0) -> None:
             else:
                 print(f"{indent_str}{k}: {v}")
 
+def add_paging_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--page-size', '--limit', dest='page_size', type=int, default=20,
+                        help='Entities per page')
+    parser.add_argument('--cursor', '--after', dest='cursor',
+                        help='Cursor printed at the end of the previous page')
+    parser.add_argument('--all', action='store_true',
+                        help='Stream every remaining entity instead of one page')
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                        help='Output format (ndjson, csv and table are written row by row)')
+    parser.add_argument('--fields', help='Comma-separated fields to output, e.g. id,name,metadata.tags')
+
+def write_entities(entities: Iterable[Dict[str, Any]], args: argparse.Namespace) -> int:
+    """
+    Write entities as they arrive in the format chosen by --format.
+    Returns:
+        int: Number of entities written.
+    """
+    from tools.memory_output import make_writer, parse_fields, project
+    fields = parse_fields(args.fields)
+    if args.format != 'text':
+        writer = make_writer(args.format, sys.stdout, fields)
+        for entity in entities:
+            writer.write(entity)
+        return writer.close()
+    count = 0
+    for count, entity in enumerate(entities, 1):
+        print(f"\n--- Result {count} ---")
+        print_entity(project(entity, fields), indent=2)
+    return count
+
+def iter_pages(memory, query: str, page_size: int, cursor: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Every entity matching a query, fetched a page at a time (for the memory server)."""
+    while True:
+        page = memory.query_entities(query, limit=page_size, after=cursor)
+        yield from page['entities']
+        cursor = page['next']
+        if not cursor:
+            return
+
 def parse_args():
     """
     Parse command line arguments for the memory CLI.
@@ -63,6 +129,8 @@ def parse_args():
         argparse.Namespace: Parsed arguments.
     """
     parser = argparse.ArgumentParser(description='Windsurf Memory System CLI')
+    parser.add_argument('--no-server', action='store_true',
+                        help='Open the database directly even if a memory server is running')
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
     
     # Create entity
@@ -82,10 +150,53 @@ def parse_args():
     # List entities
     list_parser = subparsers.add_parser('list', help='List entities of a given type')
     list_parser.add_argument('type', help='Entity type to list')
-    list_parser.add_argument('--limit', type=int, default=20, help='Max number of entities to list')
+    add_paging_arguments(list_parser)
+    add_output_arguments(list_parser)
+
+    # Query entities (see tools/memory_query.py for the language)
+    query_parser = subparsers.add_parser('query', help='Find entities with a filter query')
+    query_parser.add_argument('query', help='e.g. \'type:knowledge tag:decision "auth flow"\'')
+    add_paging_arguments(query_parser)
+    add_output_arguments(query_parser)
+    query_parser.add_argument('--explain', action='store_true', help='Print the SQL and query plan instead')
+
+    # Count entities without reading them
+    count_parser = subparsers.add_parser('count', help='Count the entities matching a filter query')
+    count_parser.add_argument('query', nargs='?', default='', help='Filter query (default: all entities)')
+
+    # Back up / restore the database
+    backup_parser = subparsers.add_parser('backup', help='Take an online backup of the database')
+    backup_parser.add_argument('--dir', help='Backup directory (default: memory-bank/backups)')
+    backup_parser.add_argument('--keep', type=int, default=DEFAULT_KEEP, help='Number of backups to keep')
+    backup_parser.add_argument('--list', action='store_true', help='List existing backups instead')
+    restore_parser = subparsers.add_parser('restore', help='Restore the database from a backup')
+    restore_parser.add_argument('backup', help='Backup file to restore')
+
+    # Bulk export / import as JSON lines
+    export_parser = subparsers.add_parser('export', help='Export entities and relations as JSONL')
+    export_parser.add_argument('path', help='Output file (.gz to compress) or - for stdout')
+    export_parser.add_argument('--gzip', action='store_true', default=None, help='Compress the output')
+    export_parser.add_argument('--no-relations', action='store_true', help='Export entities only')
+    import_parser = subparsers.add_parser('import', help='Import a JSONL export')
+    import_parser.add_argument('path', help='Input file (gzip detected) or - for stdin')
+    import_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                               help='Lines committed per transaction')
+    import_parser.add_argument('--bulk', action='store_true',
+                               help='Relax durability and defer index builds until the end')
+    import_parser.add_argument('--restart', action='store_true',
+                               help='Ignore the checkpoint of an interrupted import')
+
+    # Run a JSONL stream of commands (see tools/memory_batch.py)
+    batch_parser = subparsers.add_parser('batch', help='Run JSONL commands over one connection')
+    batch_parser.add_argument('path', nargs='?', default='-', help='Command file (gzip detected) or - for stdin')
+    batch_parser.add_argument('--group-size', type=int, default=DEFAULT_GROUP_SIZE,
+                              help='Commands committed per transaction')
+    batch_mode = batch_parser.add_mutually_exclusive_group()
+    batch_mode.add_argument('--atomic', action='store_true',
+                            help='Run everything in one transaction; any failure rolls it all back')
+    batch_mode.add_argument('--continue-on-error', action='store_true',
+                            help='Roll back only failing commands and keep going')
 
-    return parser.parse_args()
-    
     # Delete entity
     delete_parser = subparsers.add_parser('delete', help='Delete an entity')
     delete_parser.add_argument('entity_id', help='Entity ID')
@@ -95,6 +206,7 @@ def parse_args():
     search_parser.add_argument('query', help='Search query')
     search_parser.add_argument('--type', help='Filter by entity type')
     search_parser.add_argument('--limit', type=int, default=10, help='Maximum number of results')
+    add_output_arguments(search_parser)
     
     # Create relationship
     rel_parser = subparsers.add_parser('relate', help='Create a relationship between entities')
@@ -107,8 +219,7 @@ def parse_args():
     get_rel_parser = subparsers.add_parser('get-rels', help='Get relationships for an entity')
     get_rel_parser.add_argument('entity_id', help='Entity ID')
     get_rel_parser.add_argument('--type', help='Filter by relationship type')
-    
-    
+
     return parser.parse_args()
 
 def main():
@@ -118,7 +229,13 @@ def main():
     Provides error handling and usage examples.
     """
     args = parse_args()
-    memory = UnifiedMemory()
+    memory = None
+    if args.command in SERVER_COMMANDS and not args.no_server and not getattr(args, 'explain', False):
+        memory = MemoryClient.connect()
+    if memory is None:
+        from tools.unified_memory import UnifiedMemory, configure_logging
+        configure_logging()
+        memory = UnifiedMemory(reuse_connections=args.command == 'batch')
 
     if args.command is None:
         print("""
@@ -141,7 +258,7 @@ Example usage:
                 except json.JSONDecodeError:
                     print("Error: Invalid JSON for --data")
                     return
-            entity = memory.create_entity(args.type, data)
+            entity = memory.create_entity({**data, 'type': args.type})
             print("Entity created:")
             print("Created entity:")
             print_entity(entity)
@@ -174,10 +291,9 @@ Example usage:
                 entity_type=args.type,
                 limit=args.limit
             )
-            print(f"Found {len(results)} results:")
-            for i, entity in enumerate(results, 1):
-                print(f"\n--- Result {i} ---")
-                print_entity(entity, indent=2)
+            if args.format == 'text':
+                print(f"Found {len(results)} results:")
+            write_entities(results, args)
                 
         elif args.command == 'relate':
             data = json.loads(args.data) if args.data else {}
@@ -204,6 +320,83 @@ Example usage:
                 if rel.get('data'):
                     print("  Data:", json.dumps(rel['data'], indent=2))
                     
+        elif args.command in ('list', 'query'):
+            if args.command == 'list':
+                query = 'type:' + json.dumps(args.type, ensure_ascii=False)
+            else:
+                query = args.query
+            if args.command == 'query' and args.explain:
+                from tools.memory_query import explain
+                plan = explain(memory.db, query, None if args.all else args.page_size, args.cursor)
+                print(plan['sql'])
+                print("Parameters:", json.dumps(plan['params'], ensure_ascii=False))
+                print("Full-text index:", "yes" if plan['full_text'] else "no")
+                print("Plan:")
+                for step in plan['plan']:
+                    print(f"  {step}")
+                return
+            next_cursor = None
+            if not args.all:
+                page = memory.query_entities(query, limit=args.page_size, after=args.cursor)
+                entities, next_cursor = page['entities'], page['next']
+            elif isinstance(memory, MemoryClient):
+                entities = iter_pages(memory, query, args.page_size, args.cursor)
+            else:
+                entities = memory.iter_entities(query, after=args.cursor)
+            count = write_entities(entities, args)
+            if args.format == 'text':
+                print(f"\n{count} entities")
+            if next_cursor:
+                # Machine-readable output keeps stdout clean for the consumer
+                hint = sys.stdout if args.format in ('text', 'table') else sys.stderr
+                print(f"More results: --cursor {next_cursor}", file=hint)
+
+        elif args.command == 'count':
+            print(memory.count_entities(args.query))
+
+        elif args.command == 'backup':
+            from tools.memory_backup import BackupManager
+            manager = BackupManager(memory.db, args.dir, keep=args.keep)
+            if args.list:
+                for path in manager.snapshots():
+                    print(path)
+            else:
+                print(f"Backup written to {manager.snapshot()}")
+
+        elif args.command == 'restore':
+            from tools.memory_backup import BackupError, BackupManager
+            try:
+                BackupManager(memory.db).restore(args.backup)
+            except BackupError as e:
+                print(f"Restore failed: {e}")
+                sys.exit(1)
+            print(f"Restored database from {args.backup}")
+
+        elif args.command == 'export':
+            from tools.memory_jsonl import export_jsonl
+            counts = export_jsonl(memory.db, args.path, compress=args.gzip,
+                                  relations=not args.no_relations)
+            if args.path != '-':
+                print(f"Exported {counts['entity']} entities and {counts['relation']} relations to {args.path}")
+
+        elif args.command == 'import':
+            from tools.memory_jsonl import JsonlImporter
+            importer = JsonlImporter(memory.db, chunk_size=args.chunk_size,
+                                     bulk=args.bulk, resume=not args.restart)
+            stats = importer.import_file(args.path)
+            resumed = f" (resumed after line {stats['resumed_at']})" if stats['resumed_at'] else ""
+            print(f"Imported {stats['entities']} entities and {stats['relations']} relations{resumed}")
+
+        elif args.command == 'batch':
+            from tools.memory_batch import BatchRunner
+            from tools.memory_jsonl import open_input
+            runner = BatchRunner(memory, group_size=args.group_size, atomic=args.atomic,
+                                 continue_on_error=args.continue_on_error)
+            with open_input(args.path) as commands:
+                summary = runner.run(commands, sys.stdout)
+            if summary['failed']:
+                sys.exit(1)
+
         elif args.command == 'sync':
             print("Starting synchronization from files...")
             result = memory.sync_from_files()
@@ -219,6 +412,10 @@ Example usage:
             print("No command specified. Use --help for usage.")
             sys.exit(1)
             
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); drop whatever is still buffered
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON: {e}")
         sys.exit(1)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Memory HTTP API
+===============
+
+A local HTTP service over UnifiedMemory, so agents written in any language
+can use the memory system without shelling out to memory_cli.py.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart (needs ``fastapi`` and ``uvicorn`` from requirements.txt):
+    python tools/memory_http.py                       # http://127.0.0.1:8765
+    curl localhost:8765/entities/<id>
+    curl -X POST localhost:8765/entities -d '{"type": "note", "name": "n"}'
+    curl 'localhost:8765/search?q=sync&limit=500'     # NDJSON stream
+    python tools/bench_http.py --serve                # load test, see that file
+- Endpoints (JSON bodies; streams are NDJSON, one JSON object per line):
+    GET    /entities/{id}                 ETag; If-None-Match answers 304
+    POST   /entities                      create one
+    PATCH  /entities/{id}                 update; If-Match answers 412 on a stale ETag
+    DELETE /entities/{id}
+    GET    /entities?type=&limit=         stream, newest first
+    GET    /search?q=&type=&limit=        stream, newest first
+    GET    /export?relations=true         stream in memory_jsonl export format
+    POST   /batch/get     {"ids": [...]}          -> {"entities": [entity or null, ...]}
+    POST   /batch/create  {"entities": [...]}     one transaction
+    POST   /batch/upsert  {"entities": [...]}     by id; one transaction
+    GET    /entities/{id}/relationships?type=
+    POST   /relationships {"from_id", "to_id", "type", "data"}
+    GET    /health
+- Handlers are async. Database work runs on worker threads, at most
+  ``--pool-size`` at a time, each keeping its connection open between
+  requests (SQLiteMemory reuse_connections).
+- Entity GETs are served from a cache of encoded responses and their ETags.
+  It is dropped on writes through the service and whenever
+  ``PRAGMA data_version`` shows another process has committed, so a
+  conditional GET of an unchanged entity touches no table at all.
+- Streams page through the database by key, so a slow client never holds a
+  read lock that would block writers.
+- Binds to 127.0.0.1 by default and has no authentication; do not expose it.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import anyio
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from memory_jsonl import iter_records
+from memory_query import keyset_after, keyset_order
+from memory_server import DEFAULT_CACHE_SIZE, ReadCache
+from sqlite_memory import SQLiteMemory
+from unified_memory import UnifiedMemory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_POOL_SIZE = 8
+MAX_BATCH = 1000
+STREAM_PAGE_SIZE = 500
+NDJSON = 'application/x-ndjson'
+
+
+class BatchGet(BaseModel):
+    ids: List[str] = Field(max_length=MAX_BATCH)
+
+
+class EntityBatch(BaseModel):
+    entities: List[Dict[str, Any]] = Field(max_length=MAX_BATCH)
+
+
+class RelationshipIn(BaseModel):
+    from_id: str
+    to_id: str
+    type: str
+    data: Dict[str, Any] = {}
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _parse_entity(row) -> Dict[str, Any]:
+    entity = dict(row)
+    entity['metadata'] = json.loads(entity['metadata']) if entity['metadata'] else {}
+    return entity
+
+
+def get_many(db: SQLiteMemory, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Fetch ``ids`` with one query per 500; None for ids that do not exist."""
+    found: Dict[str, Dict[str, Any]] = {}
+    unique = list(dict.fromkeys(ids))
+    with db._get_connection() as conn:
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            rows = conn.execute(f"SELECT * FROM entities WHERE id IN ({', '.join('?' for _ in chunk)})", chunk)
+            for row in rows:
+                found[row['id']] = _parse_entity(row)
+    return [found.get(entity_id) for entity_id in ids]
+
+
+def iter_entities(db: SQLiteMemory, query: Optional[str] = None, entity_type: Optional[str] = None,
+                  limit: Optional[int] = None, page_size: int = STREAM_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield live entities matching ``query`` (name or content) and ``entity_type``, newest first.
+
+    Pages are read by (updated_at, id) keyset along idx_entities_updated (see
+    memory_query.keyset_order), each on its own short read. A type filter
+    lets SQLite pick idx_entities_type instead and sort only that type.
+    """
+    where = ['e.deleted_at IS NULL']
+    params: List[Any] = []
+    if query:
+        where.append('(e.name LIKE ? OR e.content LIKE ?)')
+        params += [f'%{query}%'] * 2
+    if entity_type:
+        where.append('e.type = ?')
+        params.append(entity_type)
+    remaining = limit
+    last = None
+    while remaining is None or remaining > 0:
+        page_where = list(where)
+        page_params = list(params)
+        if last is not None:
+            clause, clause_params = keyset_after('e.updated_at', True, *last)
+            page_where.append(clause)
+            page_params += clause_params
+        size = page_size if remaining is None else min(page_size, remaining)
+        with db._get_connection() as conn:
+            page = conn.execute(f"SELECT e.* FROM entities e WHERE {' AND '.join(page_where)} "
+                                f"ORDER BY {keyset_order('e.updated_at', True, True)} LIMIT ?",
+                                page_params + [size]).fetchall()
+        if not page:
+            return
+        last = (page[-1]['updated_at'], page[-1]['id'])
+        if remaining is not None:
+            remaining -= len(page)
+        for row in page:
+            yield _parse_entity(row)
+
+
+class MemoryService:
+    """The HTTP API over one database; ``app`` is the ASGI application."""
+
+    def __init__(self, db_path: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.memory = UnifiedMemory(db_path=db_path, reuse_connections=True)
+        self.db = self.memory.db
+        self.pool_size = pool_size
+        self.cache = ReadCache(cache_size)
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self.app = self._build_app()
+
+    async def run(self, func, *args):
+        """Run blocking database work on a worker thread, at most ``pool_size`` at once."""
+        if self._limiter is None:  # must be created inside the event loop
+            self._limiter = anyio.CapacityLimiter(self.pool_size)
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._limiter)
+
+    # -- blocking helpers, run on worker threads ---------------------------
+
+    def _sync_cache(self):
+        with self.db._get_connection() as conn:
+            self.cache.sync(conn)
+
+    def _wrote(self):
+        self.cache.clear()
+        self._sync_cache()  # our own commit is not a reason to clear again
+
+    def _entity_response(self, entity_id: str):
+        """(body, etag) for ``entity_id``, or None if it does not exist."""
+        self._sync_cache()
+        hit, cached = self.cache.get(entity_id)
+        if hit:
+            return cached
+        generation = self.cache.generation
+        entity = self.memory.get_entity(entity_id)
+        if entity is None:
+            return None
+        body = _encode(entity)
+        cached = (body, _etag(body))
+        self.cache.put(entity_id, cached, generation)
+        return cached
+
+    def _write(self, func, *args):
+        try:
+            return func(*args)
+        finally:
+            self._wrote()
+
+    def _update(self, entity_id: str, updates: Dict[str, Any], if_match: Optional[str]):
+        with self.db.transaction():
+            if if_match is not None:
+                current = self.memory.get_entity(entity_id)
+                if current is None:
+                    return None
+                if if_match != '*' and _etag(_encode(current)) not in [t.strip() for t in if_match.split(',')]:
+                    raise HTTPException(status_code=412, detail='Entity changed since it was read')
+            return self.memory.update_entity(entity_id, updates)
+
+    def _create_many(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self.db.transaction():
+            return [self.memory.create_entity(entity) for entity in entities]
+
+    def _upsert_many(self, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if any(not entity.get('id') for entity in entities):
+            raise HTTPException(status_code=422, detail='Every entity in an upsert needs an id')
+        results, created = [], 0
+        with self.db.transaction():
+            existing = get_many(self.db, [entity['id'] for entity in entities])
+            for entity, current in zip(entities, existing):
+                if current is None:
+                    results.append(self.memory.create_entity(entity))
+                    created += 1
+                else:
+                    updates = {k: v for k, v in entity.items() if k != 'id'}
+                    results.append(self.memory.update_entity(entity['id'], updates))
+        return {'entities': results, 'created': created, 'updated': len(results) - created}
+
+    # -- streaming ----------------------------------------------------------
+
+    def _ndjson(self, records: Iterator[Dict[str, Any]]) -> StreamingResponse:
+        async def body():
+            while True:
+                page = await self.run(lambda: list(itertools.islice(records, STREAM_PAGE_SIZE)))
+                if not page:
+                    break
+                yield b''.join(_encode(record) + b'\n' for record in page)
+        return StreamingResponse(body(), media_type=NDJSON)
+
+    # -- routes -------------------------------------------------------------
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title='Windsurf Memory API')
+
+        @app.get('/health')
+        async def health():
+            return {'status': 'ok', 'db_path': self.db.db_path}
+
+        @app.get('/entities/{entity_id}')
+        async def get_entity(entity_id: str, request: Request):
+            cached = await self.run(self._entity_response, entity_id)
+            if cached is None:
+                raise HTTPException(status_code=404, detail=f'Entity {entity_id} not found')
+            body, etag = cached
+            headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+            if_none_match = request.headers.get('if-none-match')
+            if if_none_match and (if_none_match.strip() == '*' or
+                                  etag in [t.strip() for t in if_none_match.split(',')]):
+                return Response(status_code=304, headers=headers)
+            return Response(body, media_type='application/json', headers=headers)
+
+        @app.post('/entities', status_code=201)
+        async def create_entity(entity: Dict[str, Any]):
+            return await self.run(self._write, self.memory.create_entity, entity)
+
+        @app.patch('/entities/{entity_id}')
+        async def update_entity(entity_id: str, updates: Dict[str, Any], request: Request):
+            entity = await self.run(self._write, self._update, entity_id, updates,
+                                    request.headers.get('if-match'))
+            if entity is None:
+                raise HTTPException(status_code=404, detail=f'Entity {entity_id} not found')
+            return entity
+
+        @app.delete('/entities/{entity_id}', status_code=204)
+        async def delete_entity(entity_id: str):
+            if not await self.run(self._write, self.memory.delete_entity, entity_id):
+                raise HTTPException(status_code=404, detail=f'Entity {entity_id} not found')
+            return Response(status_code=204)
+
+        @app.get('/entities')
+        async def list_entities(type: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)):
+            return self._ndjson(iter_entities(self.db, entity_type=type, limit=limit))
+
+        @app.get('/search')
+        async def search(q: str, type: Optional[str] = None, limit: Optional[int] = Query(100, ge=1)):
+            return self._ndjson(iter_entities(self.db, query=q, entity_type=type, limit=limit))
+
+        @app.get('/export')
+        async def export(relations: bool = True):
+            return self._ndjson(iter_records(self.db, relations=relations))
+
+        @app.post('/batch/get')
+        async def batch_get(request: BatchGet):
+            return {'entities': await self.run(get_many, self.db, request.ids)}
+
+        @app.post('/batch/create', status_code=201)
+        async def batch_create(request: EntityBatch):
+            return {'entities': await self.run(self._write, self._create_many, request.entities)}
+
+        @app.post('/batch/upsert')
+        async def batch_upsert(request: EntityBatch):
+            return await self.run(self._write, self._upsert_many, request.entities)
+
+        @app.get('/entities/{entity_id}/relationships')
+        async def get_relationships(entity_id: str, type: Optional[str] = None):
+            return {'relationships': await self.run(self.memory.get_relationships, entity_id, type)}
+
+        @app.post('/relationships', status_code=201)
+        async def create_relationship(rel: RelationshipIn):
+            if not await self.run(self._write, self.memory.create_relationship,
+                                  rel.from_id, rel.to_id, rel.type, rel.data):
+                raise HTTPException(status_code=409, detail='Relationship exists or an entity is missing')
+            return {'from_id': rel.from_id, 'to_id': rel.to_id, 'type': rel.type, 'data': rel.data}
+
+        return app
+
+
+def create_app(db_path: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE) -> FastAPI:
+    """ASGI application serving ``db_path`` (for ``uvicorn --factory`` and tests)."""
+    return MemoryService(db_path, pool_size).app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the HTTP API."""
+    import argparse
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve the memory system over HTTP.")
+    parser.add_argument('--db', default=None, help='Database (default: memory-bank/windsurf_memory.db)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Interface to bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help=f'Concurrent database workers (default: {DEFAULT_POOL_SIZE})')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    uvicorn.run(create_app(args.db, args.pool_size), host=args.host, port=args.port,
+                log_level='warning', access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
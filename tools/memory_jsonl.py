@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+JSONL Export / Import
+=====================
+
+Bulk export and import of the memory database as newline-delimited JSON,
+one entity or relation per line, in constant memory.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_cli.py export memory.jsonl.gz      # gzip chosen by suffix
+    python tools/memory_cli.py export - | head             # to stdout
+    python tools/memory_cli.py import memory.jsonl.gz      # gzip detected from content
+    python tools/memory_cli.py import big.jsonl --bulk     # bulk-load mode, see below
+- Format: every line is a JSON object with ``"kind": "entity"`` or
+  ``"kind": "relation"`` plus the table's columns, values exactly as stored
+  (``metadata`` / ``properties`` stay JSON strings). Entities come first, so
+  relations never point at entities not yet imported. Relations carry no
+  id; they are matched on (source_id, target_id, type).
+- Export pages through the tables by primary key, so writers are never held
+  up; rows changed during a long export may or may not be included. Take a
+  backup (memory_cli.py backup) and export that for an exact snapshot.
+- Import:
+    - Rows are upserted ``chunk_size`` lines per transaction.
+    - Bulk-load mode (``--bulk``) sets ``synchronous=OFF`` and a large page
+      cache for the importing connection, and drops the secondary indexes
+      until the end. It pays off for large imports into large databases on
+      slow disks. A crash of the importer is safe; a power loss during the
+      import can corrupt the database, so back up first.
+    - The number of lines applied is stored in sync_meta in the same
+      transaction as each chunk. Running the same import again after an
+      interruption resumes after the last committed chunk; a changed input
+      file starts over.
+    - Indexes dropped by an interrupted import are recreated the next time
+      the database is opened by SQLiteMemory.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sqlite_memory import SCHEMA_VERSION, SQLiteMemory
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+EXPORT_PAGE_SIZE = 1000
+BULK_CACHE_KIB = 256 * 1024
+CHECKPOINT_PREFIX = 'jsonl_import:'
+# Secondary indexes dropped during a bulk load; (name, definition)
+DEFERRED_INDEXES = (
+    ('idx_entities_type', 'entities(type)'),
+    ('idx_entities_name', 'entities(name)'),
+    ('idx_entities_updated', 'entities(updated_at, id)'),
+    ('idx_entities_created', 'entities(created_at, id)'),
+    ('idx_entities_created_by', "entities(json_extract(metadata, '$.created_by'))"),
+    ('idx_relations_source', 'relations(source_id)'),
+    ('idx_relations_target', 'relations(target_id)'),
+    ('idx_relations_type', 'relations(type)'),
+)
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def iter_records(memory: SQLiteMemory, relations: bool = True,
+                 page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield every entity, then every relation, as export records."""
+    tables = [('entity', 'entities')] + ([('relation', 'relations')] if relations else [])
+    for kind, table in tables:
+        last_id = None
+        while True:
+            with memory._get_connection() as conn:
+                if last_id is None:
+                    page = conn.execute(f'SELECT * FROM {table} ORDER BY id LIMIT ?', (page_size,)).fetchall()
+                else:
+                    page = conn.execute(f'SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?',
+                                        (last_id, page_size)).fetchall()
+            if not page:
+                break
+            last_id = page[-1]['id']
+            for row in page:
+                record = dict(row)
+                if kind == 'relation':
+                    del record['id']
+                yield {'kind': kind, **record}
+
+
+def open_output(path: str, compress: Optional[bool] = None) -> IO[str]:
+    """Open ``path`` (or ``-`` for stdout) for writing JSONL, gzipped if asked or named *.gz."""
+    if path == '-':
+        return sys.stdout
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    return open(path, 'w', encoding='utf-8')
+
+
+def open_input(path: str) -> IO[str]:
+    """Open ``path`` (or ``-`` for stdin) for reading JSONL, detecting gzip from its content."""
+    if path == '-':
+        return sys.stdin
+    raw = open(path, 'rb')
+    if raw.peek(2)[:2] == _GZIP_MAGIC:
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding='utf-8')
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def export_jsonl(memory: SQLiteMemory, path: str, compress: Optional[bool] = None,
+                 relations: bool = True) -> Dict[str, int]:
+    """Write the database to ``path`` as JSONL; returns counts per kind."""
+    counts = {'entity': 0, 'relation': 0}
+    out = open_output(path, compress)
+    try:
+        for record in iter_records(memory, relations):
+            out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            out.write('\n')
+            counts[record['kind']] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    logger.info(f"Exported {counts['entity']} entities and {counts['relation']} relations to {path}")
+    return counts
+
+
+class JsonlImporter:
+    """Loads a JSONL export into a memory database in chunked transactions."""
+
+    def __init__(self, memory: SQLiteMemory, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 bulk: bool = False, resume: bool = True):
+        """
+        Args:
+            memory: Database to import into
+            chunk_size: Lines applied per transaction
+            bulk: Relax durability pragmas and defer secondary indexes
+            resume: Continue from the checkpoint of an interrupted import of the same file
+        """
+        self.memory = memory
+        self.chunk_size = max(1, chunk_size)
+        self.bulk = bulk
+        self.resume = resume
+
+    @staticmethod
+    def _checkpoint_key(path: str) -> Optional[str]:
+        return None if path == '-' else CHECKPOINT_PREFIX + str(Path(path).resolve())
+
+    @staticmethod
+    def _fingerprint(path: str) -> Dict[str, int]:
+        st = os.stat(path)
+        return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    def _start_line(self, conn, path: str, key: Optional[str]) -> int:
+        if key is None or not self.resume:
+            return 0
+        value = get_meta(conn, key)
+        if not value:
+            return 0
+        checkpoint = json.loads(value)
+        if {k: checkpoint.get(k) for k in ('size', 'mtime_ns')} != self._fingerprint(path):
+            logger.warning(f"{path} changed since the interrupted import; starting over")
+            return 0
+        return checkpoint['line']
+
+    @staticmethod
+    def _apply(conn, tables: Dict[str, List[str]], records: List[Dict[str, Any]]):
+        """Upsert ``records``; columns absent from a record keep their table defaults."""
+        groups: Dict[tuple, List[List[Any]]] = {}
+        for record in records:
+            kind = record.get('kind')
+            if kind not in tables:
+                continue
+            columns = tuple(c for c in tables[kind] if c in record)
+            groups.setdefault((kind, columns), []).append([record[c] for c in columns])
+        for (kind, columns), rows in groups.items():
+            table = 'entities' if kind == 'entity' else 'relations'
+            conn.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                             f"VALUES ({', '.join('?' for _ in columns)})", rows)
+
+    def import_file(self, path: str) -> Dict[str, Any]:
+        """Import ``path`` (or ``-`` for stdin); returns counts and whether it resumed."""
+        key = self._checkpoint_key(path)
+        fingerprint = self._fingerprint(path) if key else None
+        conn = self.memory._connect()
+        conn.isolation_level = None  # transactions are managed explicitly below
+        stats = {'lines': 0, 'entities': 0, 'relations': 0, 'chunks': 0, 'resumed_at': 0}
+        start = time.perf_counter()
+        try:
+            if self.bulk:
+                conn.execute('PRAGMA synchronous = OFF')
+                conn.execute(f'PRAGMA cache_size = -{BULK_CACHE_KIB}')
+                conn.execute('PRAGMA temp_store = MEMORY')
+                # Marks the schema incomplete, so SQLiteMemory recreates the
+                # indexes on next open if this import is killed
+                conn.execute('PRAGMA user_version = 0')
+                for name, _ in DEFERRED_INDEXES:
+                    conn.execute(f'DROP INDEX IF EXISTS {name}')
+            skip = stats['resumed_at'] = self._start_line(conn, path, key)
+            if skip:
+                logger.info(f"Resuming import of {path} after line {skip}")
+            # Relations are matched on their unique key, never on the exporter's ids
+            tables = {'entity': _columns(conn, 'entities'),
+                      'relation': [c for c in _columns(conn, 'relations') if c != 'id']}
+
+            line_no = 0
+            chunk: List[Dict[str, Any]] = []
+            with open_input(path) as stream:
+                for line in stream:
+                    line_no += 1
+                    if line_no <= skip:
+                        continue
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        chunk.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}:{line_no}: invalid JSON: {e}") from e
+                    if len(chunk) >= self.chunk_size:
+                        self._commit_chunk(conn, tables, chunk, key, fingerprint, line_no, stats)
+                        chunk = []
+                self._commit_chunk(conn, tables, chunk, key, fingerprint, line_no, stats)
+
+            if key:
+                conn.execute('DELETE FROM sync_meta WHERE key = ?', (key,))
+        finally:
+            if self.bulk:
+                start_index = time.perf_counter()
+                for name, definition in DEFERRED_INDEXES:
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                logger.info(f"Rebuilt indexes in {time.perf_counter() - start_index:.2f}s")
+            conn.close()
+        stats['lines'] = line_no
+        logger.info(f"Imported {stats['entities']} entities and {stats['relations']} relations "
+                    f"from {path} in {time.perf_counter() - start:.2f}s")
+        return stats
+
+    def _commit_chunk(self, conn, tables, chunk, key, fingerprint, line_no, stats):
+        """Apply one chunk and advance the checkpoint in the same transaction."""
+        if not chunk and not key:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._apply(conn, tables, chunk)
+            if key:
+                set_meta(conn, key, json.dumps({'line': line_no, **fingerprint}))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        stats['chunks'] += 1
+        stats['entities'] += sum(1 for record in chunk if record.get('kind') == 'entity')
+        stats['relations'] += sum(1 for record in chunk if record.get('kind') == 'relation')
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+MCP Memory Server
+=================
+
+A long-running JSON-RPC server on stdin/stdout that exposes the memory
+database through the knowledge-graph tools of MCP memory servers, so tool
+hosts keep one process instead of spawning a script per operation.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart (tool host configuration):
+    {"command": "python", "args": ["tools/memory_mcp.py"]}
+  or by hand:
+    echo '{"jsonrpc": "2.0", "id": 1, "method": "read_graph"}' | python tools/memory_mcp.py
+    python tools/bench_mcp.py                    # calls per second, see that file
+- Protocol: JSON-RPC 2.0, one message per line.
+    - MCP: ``initialize``, ``ping``, ``tools/list`` and ``tools/call``
+      (results as a JSON text content item; failures set ``isError``).
+    - The tools may also be called directly as methods, e.g.
+      {"jsonrpc": "2.0", "id": 2, "method": "open_nodes", "params": {"names": ["tasks"]}},
+      which returns the result object itself.
+    - A JSON array is a batch and is answered by one array.
+- Tools (MCP memory server shapes):
+    create_entities  {"entities": [{"name", "entityType", "observations": [...]}]}
+    add_observations {"observations": [{"entityName", "contents": [...]}]}
+    create_relations {"relations": [{"from", "to", "relationType"}]}
+    search_nodes     {"query"}       name, type or observation contains query
+    open_nodes       {"names": [...]}
+    read_graph       {}
+  Graphs are {"entities": [...], "relations": [...]}, with only the relations
+  between the returned entities.
+- Mapping onto SQLiteMemory, the same one sync_memory.py uses:
+    - name -> ``name``, entityType -> ``type``, and the observations are the
+      non-empty lines of ``content``.
+    - Names are not unique in the database; the most recently updated live
+      entity with a name is the one the tools see.
+    - Existing entities and relations are skipped by the create tools, and
+      observations already present by add_observations.
+- Pipelining: requests are handled as they arrive, without waiting for
+  earlier responses. Reads run concurrently on ``--workers`` threads;
+  writes run one at a time in arrival order, and a read waits for the
+  writes that arrived before it. Responses are written as they finish,
+  so they may come back out of order; match them by id.
+"""
+
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from memory_server import (INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR,
+                           SERVER_ERROR)
+from sqlite_memory import SQLiteMemory
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = '2024-11-05'
+SERVER_INFO = {'name': 'windsurf-memory', 'version': '1.0.0'}
+DEFAULT_WORKERS = 4
+_IN_CHUNK = 500
+
+_ENTITY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string'},
+        'entityType': {'type': 'string'},
+        'observations': {'type': 'array', 'items': {'type': 'string'}},
+    },
+    'required': ['name', 'entityType', 'observations'],
+}
+_RELATION_SCHEMA = {
+    'type': 'object',
+    'properties': {'from': {'type': 'string'}, 'to': {'type': 'string'}, 'relationType': {'type': 'string'}},
+    'required': ['from', 'to', 'relationType'],
+}
+
+# Tool name -> (writes, description, input schema)
+TOOLS = {
+    'create_entities': (True, 'Create entities in the knowledge graph; existing names are skipped', {
+        'type': 'object',
+        'properties': {'entities': {'type': 'array', 'items': _ENTITY_SCHEMA}},
+        'required': ['entities'],
+    }),
+    'add_observations': (True, 'Add observations to existing entities', {
+        'type': 'object',
+        'properties': {'observations': {'type': 'array', 'items': {
+            'type': 'object',
+            'properties': {'entityName': {'type': 'string'},
+                           'contents': {'type': 'array', 'items': {'type': 'string'}}},
+            'required': ['entityName', 'contents'],
+        }}},
+        'required': ['observations'],
+    }),
+    'create_relations': (True, 'Create relations (in active voice) between entities; existing ones are skipped', {
+        'type': 'object',
+        'properties': {'relations': {'type': 'array', 'items': _RELATION_SCHEMA}},
+        'required': ['relations'],
+    }),
+    'search_nodes': (False, 'Find entities whose name, type or observations contain the query', {
+        'type': 'object',
+        'properties': {'query': {'type': 'string'}},
+        'required': ['query'],
+    }),
+    'open_nodes': (False, 'Get entities by name, with the relations between them', {
+        'type': 'object',
+        'properties': {'names': {'type': 'array', 'items': {'type': 'string'}}},
+        'required': ['names'],
+    }),
+    'read_graph': (False, 'Read the whole knowledge graph', {'type': 'object', 'properties': {}}),
+}
+
+
+def _observations(content: Optional[str]) -> List[str]:
+    return [line for line in (content or '').split('\n') if line.strip()]
+
+
+def _chunks(values: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(values), _IN_CHUNK):
+        yield values[start:start + _IN_CHUNK]
+
+
+class KnowledgeGraph:
+    """The MCP knowledge-graph tools over a SQLiteMemory database."""
+
+    def __init__(self, memory: SQLiteMemory):
+        self.memory = memory
+
+    # -- lookups ------------------------------------------------------------
+
+    def _live(self, conn, where: str, params: List[Any]) -> Dict[str, Any]:
+        """name -> row for the live entities matching ``where``; newest wins per name."""
+        rows = conn.execute(f"SELECT id, name, type, content FROM entities "
+                            f"WHERE deleted_at IS NULL AND {where} ORDER BY updated_at", params)
+        return {row['name']: row for row in rows}
+
+    def _by_name(self, conn, names: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        for chunk in _chunks(list(dict.fromkeys(names))):
+            found.update(self._live(conn, f"name IN ({', '.join('?' for _ in chunk)})", chunk))
+        return found
+
+    def _graph(self, conn, entities: Dict[str, Any], all_relations: bool = False) -> Dict[str, Any]:
+        """MCP graph of ``entities`` (name -> row) and the relations among them."""
+        names = {row['id']: name for name, row in entities.items()}
+        relations = []
+        if all_relations:
+            rows = conn.execute('SELECT source_id, target_id, type FROM relations ORDER BY id')
+        else:
+            rows = []
+            for chunk in _chunks(list(names)):
+                rows += conn.execute(f"SELECT source_id, target_id, type FROM relations "
+                                     f"WHERE source_id IN ({', '.join('?' for _ in chunk)}) ORDER BY id",
+                                     chunk).fetchall()
+        for row in rows:
+            if row['source_id'] in names and row['target_id'] in names:
+                relations.append({'from': names[row['source_id']], 'to': names[row['target_id']],
+                                  'relationType': row['type']})
+        return {
+            'entities': [{'name': name, 'entityType': row['type'], 'observations': _observations(row['content'])}
+                         for name, row in entities.items()],
+            'relations': relations,
+        }
+
+    # -- tools --------------------------------------------------------------
+
+    def create_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create the entities whose names are not taken; returns those created."""
+        created = []
+        with self.memory.transaction() as conn:
+            taken = set(self._by_name(conn, [entity['name'] for entity in entities]))
+            for entity in entities:
+                if entity['name'] in taken:
+                    continue
+                taken.add(entity['name'])
+                observations = list(entity.get('observations') or [])
+                self.memory.create_entity({
+                    'type': entity['entityType'],
+                    'name': entity['name'],
+                    'content': '\n'.join(observations),
+                    'metadata': {'source': 'mcp'},
+                })
+                created.append({'name': entity['name'], 'entityType': entity['entityType'],
+                                'observations': observations})
+        return created
+
+    def add_observations(self, observations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append the observations not already present; every entity must exist."""
+        results = []
+        with self.memory.transaction() as conn:
+            entities = self._by_name(conn, [item['entityName'] for item in observations])
+            for item in observations:
+                row = entities.get(item['entityName'])
+                if row is None:
+                    raise ValueError(f"Entity with name {item['entityName']} not found")
+                current = _observations(row['content'])
+                added = [text for text in dict.fromkeys(item['contents']) if text not in current]
+                if added:
+                    content = '\n'.join(current + added)
+                    conn.execute('UPDATE entities SET content = ?, updated_at = ?, version = version + 1 '
+                                 'WHERE id = ?', (content, datetime.utcnow().isoformat(), row['id']))
+                    entities[item['entityName']] = {**dict(row), 'content': content}
+                results.append({'entityName': item['entityName'], 'addedObservations': added})
+        return results
+
+    def create_relations(self, relations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create the relations that do not exist yet; both ends must exist."""
+        created = []
+        with self.memory.transaction() as conn:
+            entities = self._by_name(conn, [name for rel in relations for name in (rel['from'], rel['to'])])
+            now = datetime.utcnow().isoformat()
+            for rel in relations:
+                for end in ('from', 'to'):
+                    if rel[end] not in entities:
+                        raise ValueError(f"Entity with name {rel[end]} not found")
+                cursor = conn.execute('INSERT OR IGNORE INTO relations (source_id, target_id, type, properties, '
+                                      'created_at) VALUES (?, ?, ?, ?, ?)',
+                                      (entities[rel['from']]['id'], entities[rel['to']]['id'],
+                                       rel['relationType'], '{}', now))
+                if cursor.rowcount:
+                    created.append({'from': rel['from'], 'to': rel['to'], 'relationType': rel['relationType']})
+        return created
+
+    def search_nodes(self, query: str) -> Dict[str, Any]:
+        pattern = f'%{query}%'
+        with self.memory._get_connection() as conn:
+            entities = self._live(conn, '(name LIKE ? OR type LIKE ? OR content LIKE ?)', [pattern] * 3)
+            return self._graph(conn, entities)
+
+    def open_nodes(self, names: List[str]) -> Dict[str, Any]:
+        with self.memory._get_connection() as conn:
+            found = self._by_name(conn, names)
+            return self._graph(conn, {name: found[name] for name in dict.fromkeys(names) if name in found})
+
+    def read_graph(self) -> Dict[str, Any]:
+        with self.memory._get_connection() as conn:
+            return self._graph(conn, self._live(conn, '1', []), all_relations=True)
+
+
+class _RequestError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class StdioServer:
+    """Reads JSON-RPC messages from ``stdin`` and pipelines them onto ``graph``."""
+
+    def __init__(self, graph: KnowledgeGraph, stdin: BinaryIO, stdout: BinaryIO,
+                 workers: int = DEFAULT_WORKERS):
+        self.graph = graph
+        self.stdin = stdin
+        self.stdout = stdout
+        self._readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mcp-read')
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mcp-write')
+        self._last_write: Optional[Future] = None
+        self._out_lock = threading.Lock()
+
+    # -- dispatch -----------------------------------------------------------
+
+    def _call_tool(self, name: str, arguments: Any) -> Any:
+        if name not in TOOLS:
+            raise _RequestError(METHOD_NOT_FOUND, f'Unknown tool {name}')
+        if not isinstance(arguments, dict):
+            raise _RequestError(INVALID_PARAMS, 'Arguments must be an object')
+        try:
+            return getattr(self.graph, name)(**arguments)
+        except (TypeError, KeyError) as e:
+            raise _RequestError(INVALID_PARAMS, f'Invalid arguments for {name}: {e}') from e
+
+    def _dispatch(self, method: str, params: Any) -> Any:
+        if method == 'initialize':
+            return {'protocolVersion': (params or {}).get('protocolVersion', PROTOCOL_VERSION),
+                    'capabilities': {'tools': {}}, 'serverInfo': SERVER_INFO}
+        if method == 'ping':
+            return {}
+        if method == 'tools/list':
+            return {'tools': [{'name': name, 'description': description, 'inputSchema': schema}
+                              for name, (_, description, schema) in TOOLS.items()]}
+        if method == 'tools/call':
+            params = params or {}
+            try:
+                result = self._call_tool(params.get('name'), params.get('arguments') or {})
+            except Exception as e:
+                # MCP reports tool failures in the result, for the model to see
+                return {'content': [{'type': 'text', 'text': str(e)}], 'isError': True}
+            return {'content': [{'type': 'text', 'text': json.dumps(result, indent=2, ensure_ascii=False)}]}
+        if method in TOOLS:
+            return self._call_tool(method, params if params is not None else {})
+        if method.startswith('notifications/'):
+            return None
+        raise _RequestError(METHOD_NOT_FOUND, f'Method not found: {method}')
+
+    def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Answer one request; None for notifications."""
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST, 'message': 'Invalid request'}}
+        is_notification = 'id' not in request
+        try:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'result': self._dispatch(request['method'], request.get('params'))}
+        except _RequestError as e:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            logger.debug(f"Request {request['method']} failed: {e}", exc_info=True)
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': SERVER_ERROR, 'message': str(e)}}
+        return None if is_notification else response
+
+    @staticmethod
+    def _writes(request: Any) -> bool:
+        if not isinstance(request, dict):
+            return False
+        method = request.get('method')
+        if method == 'tools/call':
+            method = (request.get('params') or {}).get('name')
+        return method in TOOLS and TOOLS[method][0]
+
+    def _after(self, barrier: Optional[Future], request: Any):
+        if barrier is not None:
+            wait([barrier])
+        return self.handle(request)
+
+    def submit(self, request: Any) -> Future:
+        """Schedule one request: writes in order on the writer, reads after earlier writes."""
+        if self._writes(request):
+            self._last_write = self._writer.submit(self.handle, request)
+            return self._last_write
+        return self._readers.submit(self._after, self._last_write, request)
+
+    # -- I/O ----------------------------------------------------------------
+
+    def _send(self, message: Any):
+        data = json.dumps(message, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        with self._out_lock:
+            self.stdout.write(data + b'\n')
+            self.stdout.flush()
+
+    def _send_when_done(self, futures: List[Future], batch: bool):
+        """Write the response(s) once every future in ``futures`` has finished."""
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            responses = [response for response in (f.result() for f in futures) if response is not None]
+            if batch and responses:
+                self._send(responses)
+            elif not batch and responses:
+                self._send(responses[0])
+
+        for future in futures:
+            future.add_done_callback(done)
+
+    def serve(self):
+        """Handle messages until end of input, then wait for the ones in flight."""
+        try:
+            for line in self.stdin:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError as e:
+                    self._send({'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': str(e)}})
+                    continue
+                if isinstance(message, list):
+                    if not message:
+                        self._send({'jsonrpc': '2.0', 'id': None,
+                                    'error': {'code': INVALID_REQUEST, 'message': 'Empty batch'}})
+                        continue
+                    self._send_when_done([self.submit(request) for request in message], batch=True)
+                else:
+                    self._send_when_done([self.submit(message)], batch=False)
+        finally:
+            self._writer.shutdown(wait=True)
+            self._readers.shutdown(wait=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the stdio server."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the memory database as MCP knowledge-graph tools on stdio.")
+    parser.add_argument('--db', default=None, help='Database (default: memory-bank/windsurf_memory.db)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Threads serving reads concurrently (default: {DEFAULT_WORKERS})')
+    args = parser.parse_args(argv)
+
+    # stdout carries the protocol; logs go to stderr
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    graph = KnowledgeGraph(SQLiteMemory(args.db, reuse_connections=True))
+    StdioServer(graph, sys.stdin.buffer, sys.stdout.buffer, workers=args.workers).serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Memory Output Formats
+=====================
+
+Row-by-row writers for memory_cli result listings: NDJSON, CSV and an
+aligned table, each with optional field projection.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_cli.py query 'type:task' --all --format ndjson | jq .name
+    python tools/memory_cli.py list agent --format csv --fields id,name,metadata.created_by > agents.csv
+    python tools/memory_cli.py search auth --format table
+- ``--fields`` is a comma-separated list of entity keys; dotted paths reach
+  into nested values (``metadata.created_by``, ``metadata.tags``). Missing
+  fields are empty. Without it NDJSON writes whole entities and CSV and
+  table write ``id,type,name,updated_at``.
+- Every writer emits each row as it is given, so output starts at once and
+  memory use does not grow with the result. The table writer holds back the
+  first TABLE_SAMPLE rows to size its columns; longer values are cut to
+  TABLE_MAX_WIDTH characters.
+- In CSV and table output nested values are written as compact JSON.
+"""
+
+import csv
+import json
+from typing import Any, Dict, IO, List, Optional, Sequence
+
+FORMATS = ('text', 'ndjson', 'csv', 'table')
+DEFAULT_FIELDS = ('id', 'type', 'name', 'updated_at')
+TABLE_SAMPLE = 100
+TABLE_MAX_WIDTH = 40
+
+
+def parse_fields(spec: Optional[str]) -> Optional[List[str]]:
+    """``'id,name'`` -> ``['id', 'name']``; None or empty means no projection."""
+    if not spec:
+        return None
+    return [field.strip() for field in spec.split(',') if field.strip()]
+
+
+def field_value(entity: Dict[str, Any], path: str) -> Any:
+    value: Any = entity
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def project(entity: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """The entity limited to ``fields`` (keyed by the full path), or unchanged."""
+    if fields is None:
+        return entity
+    return {field: field_value(entity, field) for field in fields}
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+    return str(value)
+
+
+class NdjsonWriter:
+    """One JSON object per line."""
+
+    def __init__(self, out: IO[str], fields: Optional[Sequence[str]] = None):
+        self.out = out
+        self.fields = fields
+        self.count = 0
+
+    def write(self, entity: Dict[str, Any]):
+        self.out.write(json.dumps(project(entity, self.fields), ensure_ascii=False, default=str))
+        self.out.write('\n')
+        self.count += 1
+
+    def close(self) -> int:
+        self.out.flush()
+        return self.count
+
+
+class CsvWriter:
+    """A header row, then one row per entity."""
+
+    def __init__(self, out: IO[str], fields: Optional[Sequence[str]] = None):
+        self.out = out
+        self.fields = list(fields or DEFAULT_FIELDS)
+        self.writer = csv.writer(out)
+        self.writer.writerow(self.fields)
+        self.count = 0
+
+    def write(self, entity: Dict[str, Any]):
+        self.writer.writerow([_cell(field_value(entity, field)) for field in self.fields])
+        self.count += 1
+
+    def close(self) -> int:
+        self.out.flush()
+        return self.count
+
+
+class TableWriter:
+    """Space-aligned columns sized from the first TABLE_SAMPLE rows."""
+
+    def __init__(self, out: IO[str], fields: Optional[Sequence[str]] = None):
+        self.out = out
+        self.fields = list(fields or DEFAULT_FIELDS)
+        self.widths: Optional[List[int]] = None
+        self.pending: List[List[str]] = []
+        self.count = 0
+
+    def write(self, entity: Dict[str, Any]):
+        row = [_cell(field_value(entity, field)).replace('\n', ' ') for field in self.fields]
+        self.count += 1
+        if self.widths is not None:
+            self._line(row)
+            return
+        self.pending.append(row)
+        if len(self.pending) >= TABLE_SAMPLE:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        rows = [self.fields] + self.pending
+        self.widths = [min(TABLE_MAX_WIDTH, max(len(row[i]) for row in rows)) for i in range(len(self.fields))]
+        self._line(self.fields)
+        self._line(['-' * width for width in self.widths])
+        for row in self.pending:
+            self._line(row)
+        self.pending = []
+
+    def _line(self, row: List[str]):
+        cells = []
+        for value, width in zip(row, self.widths):
+            if len(value) > width:
+                value = value[:width - 1] + '…'
+            cells.append(value.ljust(width))
+        self.out.write('  '.join(cells).rstrip() + '\n')
+
+    def close(self) -> int:
+        if self.widths is None:
+            self._flush_pending()
+        self.out.flush()
+        return self.count
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'csv': CsvWriter, 'table': TableWriter}
+
+
+def make_writer(fmt: str, out: IO[str], fields: Optional[Sequence[str]] = None):
+    """A writer for ``fmt`` (one of FORMATS other than ``text``)."""
+    try:
+        return WRITERS[fmt](out, fields)
+    except KeyError:
+        raise ValueError(f"Unknown format {fmt!r}") from None
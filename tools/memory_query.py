@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Memory Query Language
+=====================
+
+A small filter language for entities, compiled to parameterized SQL:
+
+    type:knowledge tag:decision created_by:architect updated>2026-01-01 "auth flow"
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_cli.py query 'type:knowledge tag:decision "auth flow"'
+    python tools/memory_cli.py query 'created_by:architect sort:-created' --limit 50
+    python tools/memory_cli.py query 'type:task' --after <cursor>     # next page
+    python tools/memory_cli.py query 'type:task tag:urgent' --explain
+  From Python: ``UnifiedMemory().query_entities('type:task', limit=20)``
+  returns ``{'entities': [...], 'next': <cursor or None>}``.
+- Terms (all must match; ``-`` in front of any term negates it):
+    word, "quoted phrase"     full-text match on name and content; ``auth*``
+                              matches word prefixes
+    type:  name:  id:         the entity columns; ``name:auth*`` is a prefix
+    tag:decision              ``decision`` is in metadata.tags
+    is:deleted                tombstoned entities (hidden otherwise)
+    created>  updated<=       timestamps, compared as ISO strings
+    version>=2                the entity version
+    <key>:<value>             any other key is a metadata field, e.g.
+                              created_by:architect or author.team:core
+    sort:<field>, sort:-<field>
+                              order by created, updated, name, type, id or
+                              version (``-`` descending); default -updated
+  ``key:a,b`` matches any of the values; values may be quoted
+  (``created_by:"Agent Smith"``). Comparisons are ``: = > >= < <=``.
+- How it runs:
+    - Column filters and ``created_by`` use indexes; other metadata keys use
+      json_extract on the metadata column.
+    - Text terms use the FTS5 index ``entities_fts``. It is updated from the
+      ``entity_changes`` log just before a text query runs; where that is
+      impossible (no FTS5, a read-only or busy database) they fall back to
+      LIKE substring matching.
+    - Pages are read by keyset: ``next`` encodes the sort value and id of the
+      last row, so later pages cost the same as the first. The created and
+      updated sorts walk the ``(created_at, id)`` and ``(updated_at, id)``
+      indexes; entities without a timestamp come first in either direction,
+      which is the order those indexes can be read in.
+    - iter_query streams every match from one cursor without a LIMIT;
+      count_query counts matches without reading them.
+"""
+
+import base64
+import json
+import logging
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+FTS_TABLE = 'entities_fts'
+FTS_CURSOR_KEY = 'fts_seq'
+# Longest a text query waits for the write lock to bring the index up to date
+FTS_BUSY_MS = 200
+_IN_CHUNK = 500
+STREAM_FETCH_SIZE = 500
+
+# Query key -> (column, nullable)
+COLUMNS = {
+    'id': ('e.id', False),
+    'type': ('e.type', False),
+    'name': ('e.name', False),
+    'created': ('e.created_at', True),
+    'updated': ('e.updated_at', True),
+    'version': ('e.version', False),
+}
+COLUMNS['created_at'] = COLUMNS['created']
+COLUMNS['updated_at'] = COLUMNS['updated']
+DEFAULT_SORT = '-updated'
+_OPERATORS = {':': '=', '=': '=', '>': '>', '>=': '>=', '<': '<', '<=': '<='}
+_TOKEN = re.compile(r'''
+    \s*(?P<neg>-)?
+    (?:(?P<key>[A-Za-z_][\w.]*)(?P<op>>=|<=|[:=<>]))?
+    (?P<value>"(?:[^"\\]|\\.)*"|[^\s"]+)
+''', re.VERBOSE)
+_METADATA_KEY = re.compile(r'^[A-Za-z_][\w]*(\.[A-Za-z_][\w]*)*$')
+
+
+class QuerySyntaxError(ValueError):
+    """A query or cursor that cannot be parsed."""
+
+
+class Term(NamedTuple):
+    negated: bool
+    key: Optional[str]
+    op: Optional[str]
+    values: Tuple[str, ...]
+
+
+class CompiledQuery(NamedTuple):
+    sql: str
+    params: List[Any]
+    sort: str
+    full_text: bool
+
+
+def _unquote(value: str) -> str:
+    if value.startswith('"'):
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+def parse(text: str) -> List[Term]:
+    """Split a query into terms."""
+    terms = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            if '"' in text[pos:]:
+                raise QuerySyntaxError(f"Unterminated quote in: {text[pos:]!r}")
+            raise QuerySyntaxError(f"Cannot parse query at: {text[pos:]!r}")
+        pos = match.end()
+        raw = match.group('value')
+        key, op = match.group('key'), match.group('op')
+        if key and op in (':', '=') and not raw.startswith('"'):
+            values = tuple(v for v in raw.split(',') if v)
+        else:
+            values = (_unquote(raw),)
+        if not values or values == ('',):
+            raise QuerySyntaxError(f"Missing value for {key}")
+        terms.append(Term(bool(match.group('neg')), key.lower() if key else None, op, values))
+    return terms
+
+
+def _typed(value: str) -> Any:
+    """Metadata values as json_extract returns them: numbers and booleans unquoted."""
+    if value in ('true', 'false'):
+        return int(value == 'true')
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _fts_phrase(word: str) -> str:
+    prefix = word.endswith('*')
+    word = word.rstrip('*')
+    return '"' + word.replace('"', '""') + '"' + ('*' if prefix else '')
+
+
+def _compare(expr: str, op: str, values: Tuple[Any, ...]) -> Tuple[str, List[Any]]:
+    if len(values) > 1:
+        if op != '=':
+            raise QuerySyntaxError('Comma-separated values only work with ":"')
+        return f"{expr} IN ({', '.join('?' for _ in values)})", list(values)
+    return f"{expr} {op} ?", [values[0]]
+
+
+def encode_cursor(sort: str, value: Any, entity_id: str) -> str:
+    raw = json.dumps([sort, value, entity_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, entity_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise QuerySyntaxError('Invalid cursor') from e
+    if cursor_sort != sort:
+        raise QuerySyntaxError(f"Cursor is for sort:{cursor_sort}, not sort:{sort}")
+    return value, entity_id
+
+
+def keyset_order(column: str, nullable: bool, descending: bool) -> str:
+    """ORDER BY terms that read an index on ``(column, id)`` in order.
+
+    NULLs come first in either direction, the order such an index yields.
+    """
+    direction = 'DESC' if descending else 'ASC'
+    return f"{column} {direction}{' NULLS FIRST' if nullable and descending else ''}, e.id {direction}"
+
+
+def keyset_after(column: str, descending: bool, value: Any, entity_id: str) -> Tuple[str, List[Any]]:
+    """WHERE clause for the rows after ``(value, entity_id)`` in keyset_order."""
+    op = '<' if descending else '>'
+    if value is None:
+        # Still inside the leading run of NULLs; every non-NULL row follows
+        return f"(({column} IS NULL AND e.id {op} ?) OR {column} IS NOT NULL)", [entity_id]
+    return f"({column}, e.id) {op} (?, ?)", [value, entity_id]
+
+
+def compile_query(text: str, limit: Optional[int] = DEFAULT_LIMIT, after: Optional[str] = None,
+                  full_text: bool = True, count: bool = False) -> CompiledQuery:
+    """Compile ``text`` to SQL selecting one page of entities (plus one row to detect more).
+
+    With ``limit`` None every matching entity is selected, and with ``count``
+    only their number. With ``full_text`` False, text terms use LIKE instead
+    of the FTS index.
+    """
+    where: List[str] = []
+    params: List[Any] = []
+    words: List[str] = []
+    sort = DEFAULT_SORT
+    deleted = False
+
+    for term in parse(text):
+        key, values = term.key, term.values
+        op = _OPERATORS.get(term.op)
+        if key is None:
+            if term.negated:
+                clause, clause_params = _text_clause([values[0]], full_text)
+                where.append(f"NOT {clause}")
+                params += clause_params
+            else:
+                words.append(values[0])
+            continue
+        if key == 'sort':
+            if term.negated or op != '=':
+                raise QuerySyntaxError('Use sort:<field> or sort:-<field>')
+            sort = values[0]
+            if sort.lstrip('-') not in COLUMNS:
+                raise QuerySyntaxError(f"Cannot sort by {sort.lstrip('-')}")
+            continue
+        if key == 'is':
+            if values != ('deleted',) or op != '=':
+                raise QuerySyntaxError('Only is:deleted is supported')
+            deleted = not term.negated
+            continue
+
+        if key in COLUMNS:
+            column = COLUMNS[key][0]
+            if key == 'name' and op == '=' and len(values) == 1 and values[0].endswith('*'):
+                clause, clause_params = f"{column} GLOB ?", [values[0].rstrip('*').replace('[', '[[]') + '*']
+            else:
+                typed = tuple(_typed(v) for v in values) if key == 'version' else values
+                clause, clause_params = _compare(column, op, typed)
+        elif key == 'tag':
+            if op != '=':
+                raise QuerySyntaxError('Use tag:<tag>')
+            clause = (f"EXISTS (SELECT 1 FROM json_each(e.metadata, '$.tags') "
+                      f"WHERE value IN ({', '.join('?' for _ in values)}))")
+            clause_params = list(values)
+        elif _METADATA_KEY.match(key):
+            clause, clause_params = _compare(f"json_extract(e.metadata, '$.{key}')", op,
+                                             tuple(_typed(v) for v in values))
+        else:
+            raise QuerySyntaxError(f"Invalid key {key!r}")
+        where.append(f"NOT ({clause})" if term.negated else clause)
+        params += clause_params
+
+    if words:
+        clause, clause_params = _text_clause(words, full_text)
+        where.insert(0, clause)
+        params[:0] = clause_params
+    where.append('e.deleted_at IS NOT NULL' if deleted else 'e.deleted_at IS NULL')
+
+    descending = sort.startswith('-')
+    column, nullable = COLUMNS[sort.lstrip('-')]
+    if after:
+        clause, clause_params = keyset_after(column, descending, *decode_cursor(after, sort))
+        where.append(clause)
+        params += clause_params
+
+    if count:
+        sql = f"SELECT COUNT(*) FROM entities e WHERE {' AND '.join(where)}"
+        return CompiledQuery(sql, params, sort, full_text and bool(words))
+    sql = (f"SELECT e.* FROM entities e WHERE {' AND '.join(where)} "
+           f"ORDER BY {keyset_order(column, nullable, descending)}")
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit + 1)
+    return CompiledQuery(sql, params, sort, full_text and bool(words))
+
+
+def _text_clause(words: List[str], full_text: bool) -> Tuple[str, List[Any]]:
+    if full_text:
+        return (f"e.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)",
+                [' '.join(_fts_phrase(word) for word in words)])
+    clauses, params = [], []
+    for word in words:
+        pattern = '%' + word.rstrip('*') + '%'
+        clauses.append('(e.name LIKE ? OR e.content LIKE ?)')
+        params += [pattern, pattern]
+    return '(' + ' AND '.join(clauses) + ')', params
+
+
+def refresh_fts(conn) -> bool:
+    """Bring the full-text index up to date; False if it cannot be used right now."""
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone():
+            return False
+        last_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM entity_changes').fetchone()[0]
+        indexed = get_meta(conn, FTS_CURSOR_KEY)
+        if indexed is not None and int(indexed) >= last_seq:
+            return True
+        conn.execute(f'PRAGMA busy_timeout = {FTS_BUSY_MS}')
+        try:
+            with conn:
+                if indexed is None:
+                    _rebuild_fts(conn)
+                else:
+                    _update_fts(conn, int(indexed), last_seq)
+                set_meta(conn, FTS_CURSOR_KEY, str(last_seq))
+        finally:
+            conn.execute('PRAGMA busy_timeout = 5000')
+        return True
+    except sqlite3.OperationalError as e:
+        # No FTS5, a read-only database or a long-running writer
+        logger.debug(f"Full-text index not usable: {e}")
+        return False
+
+
+def _rebuild_fts(conn):
+    logger.info("Building the full-text index")
+    conn.execute(f'DELETE FROM {FTS_TABLE}')
+    conn.execute('DELETE FROM entities_fts_map')
+    conn.execute(f'INSERT INTO {FTS_TABLE} (rowid, name, content) SELECT rowid, name, content FROM entities')
+    conn.execute('INSERT INTO entities_fts_map (entity_id, fts_rowid) SELECT id, rowid FROM entities')
+
+
+def _update_fts(conn, after_seq: int, last_seq: int):
+    """Reindex the entities changed after ``after_seq``."""
+    ids = [row[0] for row in conn.execute('SELECT DISTINCT entity_id FROM entity_changes WHERE seq > ? AND seq <= ?',
+                                          (after_seq, last_seq))]
+    chunks = [ids[i:i + _IN_CHUNK] for i in range(0, len(ids), _IN_CHUNK)]
+    # Every stale row goes before any new one, as rowids may have been reused
+    for chunk in chunks:
+        marks = ', '.join('?' for _ in chunk)
+        conn.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                     f'(SELECT fts_rowid FROM entities_fts_map WHERE entity_id IN ({marks}))', chunk)
+        conn.execute(f'DELETE FROM entities_fts_map WHERE entity_id IN ({marks})', chunk)
+    for chunk in chunks:
+        marks = ', '.join('?' for _ in chunk)
+        conn.execute(f'INSERT INTO {FTS_TABLE} (rowid, name, content) '
+                     f'SELECT rowid, name, content FROM entities WHERE id IN ({marks})', chunk)
+        conn.execute(f'INSERT INTO entities_fts_map (entity_id, fts_rowid) '
+                     f'SELECT id, rowid FROM entities WHERE id IN ({marks})', chunk)
+
+
+def _prepare(conn, text: str, limit: Optional[int], after: Optional[str], count: bool = False) -> CompiledQuery:
+    if limit is not None and limit < 1:
+        raise QuerySyntaxError('limit must be at least 1')
+    compiled = compile_query(text, limit, after, count=count)
+    if compiled.full_text and not refresh_fts(conn):
+        compiled = compile_query(text, limit, after, full_text=False, count=count)
+    return compiled
+
+
+def _entity(row) -> Dict[str, Any]:
+    entity = dict(row)
+    entity['metadata'] = json.loads(entity['metadata']) if entity['metadata'] else {}
+    return entity
+
+
+def run_query(memory, text: str, limit: int = DEFAULT_LIMIT, after: Optional[str] = None) -> Dict[str, Any]:
+    """Run a query on a SQLiteMemory; returns ``{'entities': [...], 'next': cursor or None}``."""
+    with memory._get_connection() as conn:
+        compiled = _prepare(conn, text, limit, after)
+        rows = conn.execute(compiled.sql, compiled.params).fetchall()
+    entities = [_entity(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = entities[-1]
+        key = COLUMNS[compiled.sort.lstrip('-')][0].split('.', 1)[1]
+        next_cursor = encode_cursor(compiled.sort, last[key], last['id'])
+    return {'entities': entities, 'next': next_cursor}
+
+
+def iter_query(memory, text: str, after: Optional[str] = None,
+               fetch_size: int = STREAM_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield every entity matching a query, read from one cursor ``fetch_size`` rows at a time.
+
+    The rows come from a single read transaction, so the stream is a
+    consistent snapshot however long the consumer takes.
+    """
+    with memory._get_connection() as conn:
+        compiled = _prepare(conn, text, None, after)
+        cursor = conn.execute(compiled.sql, compiled.params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _entity(row)
+
+
+def count_query(memory, text: str = '') -> int:
+    """Number of entities matching a query; ``sort:`` terms are ignored."""
+    with memory._get_connection() as conn:
+        compiled = _prepare(conn, text, None, None, count=True)
+        return conn.execute(compiled.sql, compiled.params).fetchone()[0]
+
+
+def explain(memory, text: str, limit: int = DEFAULT_LIMIT, after: Optional[str] = None) -> Dict[str, Any]:
+    """The SQL, parameters and SQLite query plan for a query."""
+    with memory._get_connection() as conn:
+        compiled = _prepare(conn, text, limit, after)
+        plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + compiled.sql, compiled.params)]
+    return {'sql': compiled.sql, 'params': compiled.params, 'full_text': compiled.full_text, 'plan': plan}
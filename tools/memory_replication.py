@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Memory Replication (Merkle Anti-Entropy)
+========================================
+
+Reconciles two memory databases (developer machine, CI, shared server) by
+transferring only the rows that differ, instead of copying whole files.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    # Two local databases
+    python tools/memory_replication.py sync memory-bank/windsurf_memory.db /backup/windsurf_memory.db
+    # Only report what differs
+    python tools/memory_replication.py diff a.db b.db
+    # A remote database over a pipe (any command that runs ``serve``)
+    python tools/memory_replication.py sync memory-bank/windsurf_memory.db \\
+        --remote-cmd "ssh server python3 tools/memory_replication.py serve /srv/windsurf_memory.db"
+- How it works:
+    - Every entity (``e:<id>``) and relation (``r:<source>|<target>|<type>``)
+      gets a content hash. Keys are bucketed by the prefix of their hashed
+      key (16**depth leaf buckets), and a Merkle tree is built over the
+      buckets.
+    - Both sides exchange tree levels top-down, descending only into
+      subtrees whose hashes differ: depth + 1 round trips find the
+      differing leaf buckets.
+    - Per-row digests of those buckets decide which rows differ; only those
+      rows are transferred and applied, in one transaction per side.
+- Conflict policies (--policy):
+    - lww (default): the row with the later updated_at wins.
+    - version: the row with the higher ``entities.version`` wins (bumped on
+      every update), falling back to lww on a tie or for deletions.
+    - Exact ties are broken by content hash, so both sides converge.
+- Deletions: entities deleted with SQLiteMemory.delete_entity propagate as
+  tombstones derived from the entity_changes log. Relations deleted on their
+  own are not tracked and come back from the other side.
+- Timestamps come from each machine's clock; keep clocks in sync for lww.
+"""
+
+import hashlib
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sqlite_memory import SQLiteMemory
+
+logger = logging.getLogger(__name__)
+
+TREE_DEPTH = 3  # 4096 leaf buckets
+HEX_DIGITS = '0123456789abcdef'
+ENTITY_COLUMNS = ('id', 'type', 'name', 'content', 'metadata', 'created_at',
+                  'updated_at', 'deleted_at', 'version')
+RELATION_COLUMNS = ('source_id', 'target_id', 'type', 'properties', 'created_at')
+DELETED = 'deleted'  # row hash of a deleted entity
+POLICIES = ('lww', 'version')
+
+
+def _digest(*parts: str) -> str:
+    hasher = hashlib.sha1()
+    for part in parts:
+        hasher.update(part.encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+def _timestamp(value: Optional[str]) -> str:
+    # CURRENT_TIMESTAMP ('2025-01-01 10:00:00') sorts like isoformat with a 'T'
+    return (value or '').replace(' ', 'T')
+
+
+class ReplicaStore:
+    """One side of a replication: a memory database and its Merkle tree."""
+
+    def __init__(self, memory: SQLiteMemory, depth: int = TREE_DEPTH):
+        """
+        Args:
+            memory: Database to replicate
+            depth: Tree depth; both sides must use the same
+        """
+        self.memory = memory
+        self.depth = depth
+        self._digests: Optional[Dict[str, Dict[str, Any]]] = None
+        self._tree: Dict[str, str] = {}
+
+    def _load(self):
+        """Hash every row and build the tree (once, until the next apply)."""
+        if self._digests is not None:
+            return
+        digests: Dict[str, Dict[str, Any]] = {}
+        with self.memory._get_connection() as conn:
+            for row in conn.execute(f"SELECT {', '.join(ENTITY_COLUMNS)} FROM entities"):
+                values = [str(row[column]) if row[column] is not None else '' for column in ENTITY_COLUMNS]
+                digests[f"e:{row['id']}"] = {'hash': _digest(*values), 'updated_at': row['updated_at'],
+                                             'version': row['version']}
+            for row in conn.execute(f"SELECT {', '.join(RELATION_COLUMNS)} FROM relations"):
+                key = f"r:{row['source_id']}|{row['target_id']}|{row['type']}"
+                digests[key] = {'hash': _digest(row['properties'] or ''), 'updated_at': row['created_at'],
+                                'version': None}
+            # Entities whose latest change is a delete
+            for row in conn.execute('''
+                SELECT c.entity_id, c.changed_at FROM entity_changes c
+                JOIN (SELECT entity_id, MAX(seq) AS seq FROM entity_changes GROUP BY entity_id) last
+                  ON last.seq = c.seq
+                WHERE c.op = 'delete' AND c.entity_id NOT IN (SELECT id FROM entities)
+            '''):
+                digests[f"e:{row['entity_id']}"] = {'hash': DELETED, 'updated_at': row['changed_at'],
+                                                    'version': None}
+
+        leaves: Dict[str, List[str]] = {}
+        for key, digest in digests.items():
+            digest['bucket'] = _digest(key)[:self.depth]
+            leaves.setdefault(digest['bucket'], []).append(key + digest['hash'])
+        tree = {bucket: _digest(*sorted(parts)) for bucket, parts in leaves.items()}
+        level = dict(tree)
+        for _ in range(self.depth):
+            parents: Dict[str, List[str]] = {}
+            for prefix, node_hash in level.items():
+                parents.setdefault(prefix[:-1], []).append(prefix + node_hash)
+            level = {prefix: _digest(*sorted(parts)) for prefix, parts in parents.items()}
+            tree.update(level)
+        self._digests, self._tree = digests, tree
+
+    def hashes(self, prefixes: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Return the tree hash of each prefix (None for empty subtrees)."""
+        self._load()
+        return {prefix: self._tree.get(prefix) for prefix in prefixes}
+
+    def digests(self, buckets: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {key: {'hash', 'updated_at', 'version'}} for the rows in ``buckets``."""
+        self._load()
+        wanted = set(buckets)
+        return {key: {k: v for k, v in digest.items() if k != 'bucket'}
+                for key, digest in self._digests.items() if digest['bucket'] in wanted}
+
+    def rows(self, keys: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Return the full rows for ``keys``; None marks a deleted entity."""
+        result: Dict[str, Optional[Dict[str, Any]]] = {}
+        with self.memory._get_connection() as conn:
+            for key in keys:
+                kind, _, ident = key.partition(':')
+                if kind == 'e':
+                    row = conn.execute(f"SELECT {', '.join(ENTITY_COLUMNS)} FROM entities WHERE id = ?",
+                                       (ident,)).fetchone()
+                else:
+                    source_id, target_id, relation_type = ident.split('|', 2)
+                    row = conn.execute(f"SELECT {', '.join(RELATION_COLUMNS)} FROM relations "
+                                       "WHERE source_id = ? AND target_id = ? AND type = ?",
+                                       (source_id, target_id, relation_type)).fetchone()
+                result[key] = dict(row) if row else None
+        return result
+
+    def apply(self, rows: Dict[str, Optional[Dict[str, Any]]]) -> int:
+        """Write rows received from the other side in one transaction; returns the count."""
+        # Entities first, so relations never point at rows not yet written
+        ordered = sorted(rows.items(), key=lambda item: item[0][0] != 'e')
+        with self.memory.transaction() as conn:
+            for key, row in ordered:
+                kind, _, ident = key.partition(':')
+                if row is None:
+                    if kind == 'e' and not self.memory.delete_entity(ident):
+                        # Never existed here: record the tombstone so both trees agree
+                        conn.execute("INSERT INTO entity_changes (entity_id, op) VALUES (?, 'delete')", (ident,))
+                elif kind == 'e':
+                    updates = ', '.join(f"{column} = excluded.{column}" for column in ENTITY_COLUMNS[1:])
+                    conn.execute(f"INSERT INTO entities ({', '.join(ENTITY_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' for _ in ENTITY_COLUMNS)}) "
+                                 f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                                 [row[column] for column in ENTITY_COLUMNS])
+                else:
+                    conn.execute(f"INSERT INTO relations ({', '.join(RELATION_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' for _ in RELATION_COLUMNS)}) "
+                                 "ON CONFLICT(source_id, target_id, type) DO UPDATE SET "
+                                 "properties = excluded.properties, created_at = excluded.created_at",
+                                 [row[column] for column in RELATION_COLUMNS])
+        self._digests = None
+        return len(rows)
+
+
+class PipePeer:
+    """ReplicaStore interface for a store served over a pipe (see ``serve``)."""
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    def spawn(cls, command: str) -> 'PipePeer':
+        """Start ``command`` (which must run ``memory_replication.py serve``) and talk to it."""
+        process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        peer = cls(process.stdout, process.stdin)
+        peer.process = process
+        return peer
+
+    def _call(self, method: str, *args):
+        self.writer.write(json.dumps({'method': method, 'args': args}).encode('utf-8') + b'\n')
+        self.writer.flush()
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Replication peer closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"Replication peer failed: {response['error']}")
+        return response['result']
+
+    def hashes(self, prefixes):
+        return self._call('hashes', list(prefixes))
+
+    def digests(self, buckets):
+        return self._call('digests', list(buckets))
+
+    def rows(self, keys):
+        return self._call('rows', list(keys))
+
+    def apply(self, rows):
+        return self._call('apply', rows)
+
+    def close(self):
+        self.writer.close()
+        if hasattr(self, 'process'):
+            self.process.wait()
+
+
+def serve(store: ReplicaStore, reader: BinaryIO, writer: BinaryIO):
+    """Answer PipePeer calls (one JSON object per line) until the input ends."""
+    methods = {'hashes': store.hashes, 'digests': store.digests, 'rows': store.rows, 'apply': store.apply}
+    for line in reader:
+        try:
+            request = json.loads(line)
+            response = {'result': methods[request['method']](*request['args'])}
+        except Exception as e:
+            logger.error(f"Replication request failed: {e}", exc_info=True)
+            response = {'error': str(e)}
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        writer.flush()
+
+
+def find_differing_buckets(local, remote, depth: int = TREE_DEPTH) -> Tuple[List[str], int]:
+    """Descend both trees where their hashes differ; returns (leaf buckets, round trips)."""
+    frontier = ['']
+    round_trips = 0
+    for level in range(depth + 1):
+        ours, theirs = local.hashes(frontier), remote.hashes(frontier)
+        round_trips += 1
+        frontier = [prefix for prefix in frontier if ours[prefix] != theirs[prefix]]
+        if not frontier or level == depth:
+            break
+        frontier = [prefix + digit for prefix in frontier for digit in HEX_DIGITS]
+    return frontier, round_trips
+
+
+def _wins(mine: Dict[str, Any], other: Dict[str, Any], policy: str) -> bool:
+    """Whether our version of a row beats theirs under ``policy``."""
+    if DELETED in (mine['hash'], other['hash']):
+        # Deletion times only have second resolution; within the same
+        # second the deletion wins
+        def rank(digest):
+            return _timestamp(digest['updated_at'])[:19], digest['hash'] == DELETED
+        return rank(mine) > rank(other)
+
+    def rank(digest):
+        return ((digest['version'] or 0) if policy == 'version' else 0,
+                _timestamp(digest['updated_at']), digest['hash'])
+    return rank(mine) > rank(other)
+
+
+def replicate(local, remote, policy: str = 'lww', direction: str = 'both',
+              dry_run: bool = False, depth: int = TREE_DEPTH) -> Dict[str, Any]:
+    """Make ``local`` and ``remote`` agree, transferring only differing rows.
+
+    Args:
+        local, remote: ReplicaStore or PipePeer
+        policy: 'lww' or 'version' (see the module docstring)
+        direction: 'both', 'push' (only write remote) or 'pull' (only write local)
+        dry_run: Report the differences without transferring anything
+
+    Returns:
+        Counters: buckets, round_trips, pushed, pulled, resolved (rows present on
+        both sides that differed and were decided by the policy)
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy {policy!r}; choose from {POLICIES}")
+    buckets, round_trips = find_differing_buckets(local, remote, depth)
+    stats = {'buckets': len(buckets), 'round_trips': round_trips, 'pushed': 0, 'pulled': 0, 'resolved': 0}
+    if not buckets:
+        return stats
+
+    ours, theirs = local.digests(buckets), remote.digests(buckets)
+    stats['round_trips'] += 1
+    push, pull = [], []
+    deleted = set()  # entity ids that end up deleted on both sides
+    for key in sorted(ours.keys() | theirs.keys()):
+        mine, other = ours.get(key), theirs.get(key)
+        if mine is not None and other is not None:
+            if mine['hash'] == other['hash']:
+                continue
+            stats['resolved'] += 1
+            winner, target = (mine, push) if _wins(mine, other, policy) else (other, pull)
+        else:
+            winner, target = (mine, push) if other is None else (other, pull)
+        if winner['hash'] == DELETED:
+            deleted.add(key[2:])
+        target.append(key)
+
+    def removed_with_entity(key: str) -> bool:
+        # Deleting an entity deletes its relations; do not copy them back
+        if not key.startswith('r:'):
+            return False
+        source_id, target_id, _ = key[2:].split('|', 2)
+        return bool({source_id, target_id} & deleted)
+    push = [key for key in push if not removed_with_entity(key)]
+    pull = [key for key in pull if not removed_with_entity(key)]
+    if direction == 'pull':
+        push = []
+    elif direction == 'push':
+        pull = []
+    stats['pushed'], stats['pulled'] = len(push), len(pull)
+    if dry_run:
+        stats['keys'] = {'push': push, 'pull': pull}
+        return stats
+
+    if push:
+        remote.apply(local.rows(push))
+        stats['round_trips'] += 1
+    if pull:
+        local.apply(remote.rows(pull))
+        stats['round_trips'] += 2
+    logger.info(f"Replicated {len(buckets)} differing buckets in {stats['round_trips']} round trips: "
+                f"{len(push)} rows pushed, {len(pull)} pulled, {stats['resolved']} resolved by {policy}")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the replication tool."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Reconcile two memory databases row by row.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('sync', 'Make two databases agree'), ('diff', 'Report rows that differ')):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument('local', help='Local database path')
+        cmd.add_argument('remote', nargs='?', help='Second local database path')
+        cmd.add_argument('--remote-cmd', help='Command serving the remote database over stdin/stdout')
+        cmd.add_argument('--policy', choices=POLICIES, default='lww', help='Conflict policy (default: lww)')
+        cmd.add_argument('--direction', choices=('both', 'push', 'pull'), default='both',
+                         help='Which side may be written (default: both)')
+    serve_cmd = sub.add_parser('serve', help='Serve a database to a peer over stdin/stdout')
+    serve_cmd.add_argument('db', help='Database path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(ReplicaStore(SQLiteMemory(args.db)), sys.stdin.buffer, sys.stdout.buffer)
+        return 0
+    if bool(args.remote) == bool(args.remote_cmd):
+        parser.error("give either a second database path or --remote-cmd")
+
+    local = ReplicaStore(SQLiteMemory(args.local))
+    remote = PipePeer.spawn(args.remote_cmd) if args.remote_cmd else ReplicaStore(SQLiteMemory(args.remote))
+    try:
+        stats = replicate(local, remote, policy=args.policy, direction=args.direction,
+                          dry_run=args.command == 'diff')
+    finally:
+        if isinstance(remote, PipePeer):
+            remote.close()
+    print(json.dumps(stats, indent=2 if args.command == 'diff' else None))
+    return 1 if args.command == 'diff' and (stats['pushed'] or stats['pulled']) else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Memory Server
+=============
+
+A long-lived local process that serves the memory API over a Unix domain
+socket, so shell automation calling memory_cli.py thousands of times stops
+paying interpreter startup, imports and a database open for every query.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_server.py &                  # serve memory-bank/windsurf_memory.db
+    python tools/memory_cli.py get <entity_id>       # answered by the server
+    python tools/memory_cli.py --no-server get <id>     # bypass it
+    python tools/memory_server.py --status
+    python tools/memory_server.py --stop
+- memory_cli.py uses the server whenever one is listening for the same
+  database and falls back to opening the database itself otherwise.
+  Backup, restore, export, import and sync always run directly.
+- Protocol: one JSON object per line, JSON-RPC 2.0 shaped:
+    -> {"id": 1, "method": "get_entity", "params": {"entity_id": "ent_1"}}
+    <- {"id": 1, "result": {...}}   or   {"id": 1, "error": {"code": -32000, "message": "..."}}
+  - Pipelining: send any number of requests without waiting; responses
+    come back on the same connection in request order.
+  - Batches: a JSON array of requests is answered by one array of responses.
+  - Methods are the UnifiedMemory methods listed in METHODS, plus ``ping``
+    and ``stats``.
+- The server keeps one open connection per worker thread and caches read
+  results. The cache is dropped on every write through the server and
+  whenever ``PRAGMA data_version`` shows another process (e.g. a sync) has
+  committed.
+- Idle shutdown: with no client connected and no request for
+  ``--idle-timeout`` seconds (default 900) the server exits and removes its
+  socket.
+- The socket is named after the database path and lives in
+  ``$XDG_RUNTIME_DIR``, or else in a private (0700) windsurf-memory-<uid>
+  directory under the temp directory (see socket_path). Clients only talk
+  to a socket owned by their own user. Unix only; on Windows memory_cli.py
+  always runs directly.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same default as SQLiteMemory; resolved here so clients need not import it
+DEFAULT_DB_PATH = Path(__file__).parent.parent / 'memory-bank' / 'windsurf_memory.db'
+DEFAULT_IDLE_TIMEOUT = 900.0
+DEFAULT_WORKERS = 4
+DEFAULT_CACHE_SIZE = 10000
+CONNECT_TIMEOUT = 0.5
+
+# Method name -> whether it writes; everything else is rejected
+METHODS = {
+    'get_entity': False,
+    'search_entities': False,
+    'query_entities': False,
+    'count_entities': False,
+    'get_relationships': False,
+    'create_entity': True,
+    'update_entity': True,
+    'delete_entity': True,
+    'create_relationship': True,
+}
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RemoteError(Exception):
+    """An error returned by the memory server."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def socket_dir() -> Path:
+    """Per-user directory holding the server sockets."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir)
+    user = os.getuid() if hasattr(os, 'getuid') else 0
+    return Path(tempfile.gettempdir()) / f"windsurf-memory-{user}"
+
+
+def socket_path(db_path: Optional[str] = None) -> Path:
+    """Socket a server for ``db_path`` listens on (one per user and database)."""
+    resolved = str(Path(db_path or DEFAULT_DB_PATH).resolve())
+    digest = hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:12]
+    return socket_dir() / f"windsurf-memory-{digest}.sock"
+
+
+def _owned_by_user(path: Path) -> bool:
+    """Whether ``path`` belongs to the current user (always true without uids)."""
+    return not hasattr(os, 'getuid') or os.stat(path).st_uid == os.getuid()
+
+
+def _ensure_private_dir(directory: Path):
+    """Create ``directory`` as 0700 and refuse one another user could write to."""
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(directory)
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & 0o022):
+        raise RuntimeError(f"Socket directory {directory} is not private to this user")
+
+
+class MemoryClient:
+    """Client for a running memory server."""
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self._next_id = 0
+
+    @classmethod
+    def connect(cls, db_path: Optional[str] = None, path: Optional[str] = None) -> Optional['MemoryClient']:
+        """Connect to the server for ``db_path``; None if no server is listening."""
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        target = Path(path or socket_path(db_path))
+        try:
+            if not _owned_by_user(target):
+                logger.warning(f"Ignoring memory server socket {target} owned by another user")
+                return None
+        except OSError:
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(target))
+        except OSError:
+            sock.close()
+            return None
+        sock.settimeout(None)
+        return cls(sock)
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._next_id += 1
+        return {'id': self._next_id, 'method': method, 'params': params}
+
+    def _read(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("memory server closed the connection")
+        return json.loads(line)
+
+    @staticmethod
+    def _result(response: Dict[str, Any]) -> Any:
+        if 'error' in response:
+            raise RemoteError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def call(self, method: str, **params) -> Any:
+        """Call one method and wait for its result."""
+        self._sock.sendall(json.dumps(self._request(method, params)).encode('utf-8') + b'\n')
+        return self._result(self._read())
+
+    def pipeline(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Send every call before reading any response; results in call order.
+
+        A failed call's RemoteError is returned in its place rather than raised.
+        """
+        payload = b''.join(json.dumps(self._request(method, params)).encode('utf-8') + b'\n'
+                           for method, params in calls)
+        self._sock.sendall(payload)
+        results = []
+        for _ in calls:
+            try:
+                results.append(self._result(self._read()))
+            except RemoteError as e:
+                results.append(e)
+        return results
+
+    def batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Send the calls as one batch message; results (or RemoteErrors) in call order."""
+        requests = [self._request(method, params) for method, params in calls]
+        self._sock.sendall(json.dumps(requests).encode('utf-8') + b'\n')
+        results = []
+        for response in self._read():
+            try:
+                results.append(self._result(response))
+            except RemoteError as e:
+                results.append(e)
+        return results
+
+    def __getattr__(self, method: str):
+        """``client.get_entity(entity_id=...)``: the UnifiedMemory API, served remotely."""
+        if method not in METHODS:
+            raise AttributeError(method)
+        return lambda *args, **params: self.call(method, **_bind(method, args, params))
+
+
+# Positional parameter names, so proxied calls may pass arguments positionally
+_POSITIONAL = {
+    'get_entity': ('entity_id',),
+    'search_entities': ('query', 'entity_type', 'limit'),
+    'query_entities': ('query', 'limit', 'after'),
+    'count_entities': ('query',),
+    'get_relationships': ('entity_id', 'rel_type'),
+    'create_entity': ('entity_data',),
+    'update_entity': ('entity_id', 'updates'),
+    'delete_entity': ('entity_id',),
+    'create_relationship': ('from_id', 'to_id', 'rel_type', 'data'),
+}
+
+
+def _bind(method: str, args: tuple, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {**dict(zip(_POSITIONAL[method], args)), **params}
+
+
+class ReadCache:
+    """LRU cache of read results, dropped whenever the database may have changed."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._seen = threading.local()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def sync(self, conn):
+        """Clear the cache if another connection committed since this thread last looked.
+
+        ``conn`` must be the calling thread's long-lived connection:
+        ``PRAGMA data_version`` only changes between calls on the same one.
+        A thread looking for the first time cannot tell what was committed
+        before, so it clears the cache too.
+        """
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._seen, 'version', None) != version:
+            self.clear()
+        self._seen.version = version
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value: Any, generation: int):
+        """Store ``value`` unless the cache was cleared since it was read (``generation``)."""
+        with self._lock:
+            if generation != self.generation or self.size <= 0:
+                return
+            self._entries[key] = value
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+
+class MemoryServer:
+    """Serves one database over a Unix socket until stopped or idle."""
+
+    def __init__(self, db_path: Optional[str] = None, path: Optional[str] = None,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT, workers: int = DEFAULT_WORKERS,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        sys.path.append(str(Path(__file__).parent))
+        from unified_memory import UnifiedMemory
+
+        self.db_path = str(db_path or DEFAULT_DB_PATH)
+        self.path = Path(path or socket_path(self.db_path))
+        self.idle_timeout = idle_timeout
+        self.workers = workers
+        self.memory = UnifiedMemory(db_path=self.db_path, reuse_connections=True)
+        self.cache = ReadCache(cache_size)
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._last_activity = time.time()
+        self._started = time.time()
+        self._requests = 0
+        self._stop = threading.Event()
+        self._listener: Optional[socket.socket] = None
+
+    # -- request handling -------------------------------------------------
+
+    def _check_data_version(self):
+        """Drop the cache if another connection committed since this thread last looked."""
+        with self.memory.db._get_connection() as conn:
+            self.cache.sync(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'pid': os.getpid(), 'db_path': self.db_path, 'socket': str(self.path),
+                'uptime': round(time.time() - self._started, 1), 'clients': self._clients,
+                'requests': self._requests, 'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses}
+
+    def handle(self, request: Any) -> Dict[str, Any]:
+        """Answer one request object."""
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return {'id': None, 'error': {'code': INVALID_REQUEST, 'message': 'invalid request'}}
+        request_id, method = request.get('id'), request['method']
+        params = request.get('params') or {}
+        self._requests += 1
+        try:
+            if method == 'ping':
+                return {'id': request_id, 'result': 'pong'}
+            if method == 'stats':
+                return {'id': request_id, 'result': self.stats()}
+            if method not in METHODS:
+                return {'id': request_id, 'error': {'code': METHOD_NOT_FOUND, 'message': f'unknown method {method}'}}
+            if not isinstance(params, dict):
+                params = _bind(method, tuple(params), {})
+            if METHODS[method]:
+                result = getattr(self.memory, method)(**params)
+                self.cache.clear()
+                self._check_data_version()  # our own commit is not a reason to clear again
+            else:
+                self._check_data_version()
+                key = json.dumps([method, params], sort_keys=True)
+                hit, result = self.cache.get(key)
+                if not hit:
+                    generation = self.cache.generation
+                    result = getattr(self.memory, method)(**params)
+                    self.cache.put(key, result, generation)
+            return {'id': request_id, 'result': result}
+        except Exception as e:
+            logger.debug(f"Request {method} failed: {e}", exc_info=True)
+            return {'id': request_id, 'error': {'code': SERVER_ERROR, 'message': str(e)}}
+
+    def handle_line(self, line: bytes) -> Any:
+        """Answer one line: a request or a batch of requests."""
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return {'id': None, 'error': {'code': PARSE_ERROR, 'message': str(e)}}
+        if isinstance(message, list):
+            return [self.handle(request) for request in message]
+        return self.handle(message)
+
+    def _serve_client(self, conn: socket.socket):
+        with self._lock:
+            self._clients += 1
+        try:
+            with conn, conn.makefile('rb') as reader:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    self._last_activity = time.time()
+                    response = self.handle_line(line)
+                    conn.sendall(json.dumps(response, default=str).encode('utf-8') + b'\n')
+        except OSError as e:  # client went away mid-response
+            logger.debug(f"Client connection closed: {e}")
+        finally:
+            with self._lock:
+                self._clients -= 1
+                self._last_activity = time.time()
+
+    # -- lifecycle --------------------------------------------------------
+
+    def _bind(self) -> socket.socket:
+        _ensure_private_dir(self.path.parent)
+        if self.path.exists():
+            if not _owned_by_user(self.path):
+                raise RuntimeError(f"{self.path} belongs to another user")
+            if MemoryClient.connect(path=str(self.path)) is not None:
+                raise RuntimeError(f"A memory server is already listening on {self.path}")
+            self.path.unlink()  # left behind by a server that died
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created 0600 from the start; a chmod after bind leaves a window
+        umask = os.umask(0o177)
+        try:
+            listener.bind(str(self.path))
+        finally:
+            os.umask(umask)
+        listener.listen(64)
+        listener.settimeout(1.0)
+        return listener
+
+    def _idle(self) -> bool:
+        with self._lock:
+            return (self.idle_timeout > 0 and self._clients == 0
+                    and time.time() - self._last_activity > self.idle_timeout)
+
+    def serve_forever(self):
+        """Accept clients until stopped, interrupted or idle for ``idle_timeout``."""
+        from concurrent.futures import ThreadPoolExecutor
+        self._listener = self._bind()
+        logger.info(f"Memory server for {self.db_path} listening on {self.path}")
+        # Long-lived workers keep their warm database connections between clients
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='memory-server')
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._listener.accept()
+                except socket.timeout:
+                    if self._idle():
+                        logger.info(f"Idle for {self.idle_timeout:.0f}s; shutting down")
+                        break
+                    continue
+                conn.settimeout(None)
+                pool.submit(self._serve_client, conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._listener.close()
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.info("Memory server stopped")
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the memory server."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the memory database over a Unix socket.")
+    parser.add_argument('--db', default=None, help='Database (default: memory-bank/windsurf_memory.db)')
+    parser.add_argument('--socket', default=None, help='Socket path (default: derived from the database path)')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f'Exit after this many idle seconds; 0 never (default: {DEFAULT_IDLE_TIMEOUT:.0f})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Clients served concurrently (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--status', action='store_true', help='Print the running server\'s stats and exit')
+    parser.add_argument('--stop', action='store_true', help='Stop the running server')
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("Unix domain sockets are not available on this platform")
+        return 2
+    if args.status or args.stop:
+        client = MemoryClient.connect(args.db, args.socket)
+        if client is None:
+            print("No memory server is running")
+            return 1
+        stats = client.call('stats')
+        client.close()
+        if args.stop:
+            os.kill(stats['pid'], 15)
+            print(f"Stopped memory server {stats['pid']}")
+        else:
+            print(json.dumps(stats, indent=2))
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = MemoryServer(args.db, args.socket, idle_timeout=args.idle_timeout, workers=args.workers)
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Binary Memory Snapshots
+=======================
+
+A compact columnar snapshot of the memory database for fast cold starts:
+new agent containers load it into an in-memory, read-only SQLiteMemory
+instead of replaying markdown or JSON.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    python tools/memory_snapshot.py write memory.snap          # from memory-bank/windsurf_memory.db
+    python tools/memory_snapshot.py info memory.snap
+    # In an agent container:
+    from memory_snapshot import load_snapshot
+    memory = load_snapshot('memory.snap')     # SQLiteMemory API, read-only, in memory
+    memory.search_entities('auth')
+- Format (all integers little-endian):
+    - 8-byte magic ``WSMSNAP1``, a uint32 header length and a JSON header
+      listing the tables, their columns and where each column's section is.
+    - One section per column:
+        - ``text``: the values joined with NUL into one UTF-8 blob, split
+          back in a single call on load; columns containing NUL fall back
+          to a uint32 length array plus the blob.
+        - ``dict``: interned strings (types): a string table plus one
+          uint32 code per row.
+        - ``ref``: entity ids (relation endpoints) as uint32 indexes into
+          the id table; entity ids themselves are the table, in row order.
+        - ``int``: an int64 array.
+      Nullable columns carry a one-byte-per-row null map.
+- The loader memory-maps the file and slices the sections out of the map;
+  rows are inserted (entities in id order) into a shared-cache ``:memory:``
+  database in one transaction, without the change-log triggers, and the
+  secondary indexes are built afterwards.
+- Snapshots are for reading. Writes through the loaded SQLiteMemory fail
+  with "attempt to write a readonly database".
+"""
+
+import itertools
+import json
+import logging
+import mmap
+import sqlite3
+import struct
+import sys
+import time
+import uuid
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sqlite_memory import SQLiteMemory
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'WSMSNAP1'
+FORMAT_VERSION = 1
+# Columns whose few distinct values are stored once in a string table
+INTERNED_COLUMNS = {('entities', 'type'), ('relations', 'type')}
+# Relation columns holding entity ids
+REF_COLUMNS = {('relations', 'source_id'), ('relations', 'target_id')}
+TABLES = ('entities', 'relations')
+# Entities are stored in primary key order so loading appends to the key index
+ROW_ORDER = {'entities': 'id', 'relations': 'rowid'}
+# Secondary indexes built after the rows are loaded
+_INDEXES = ('idx_entities_type', 'idx_entities_name', 'idx_entities_updated', 'idx_entities_created',
+            'idx_entities_created_by',
+            'idx_relations_source', 'idx_relations_target', 'idx_relations_type')
+
+_UINT32 = struct.Struct('<I')
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class SnapshotError(Exception):
+    """Raised for files that are not readable snapshots."""
+
+
+def _to_le(values: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode_text(values: List[Optional[str]]) -> Tuple[str, List[bytes]]:
+    """Encode a string column; returns (encoding, parts)."""
+    strings = ['' if v is None else v for v in values]
+    joined = '\x00'.join(strings)
+    if joined.count('\x00') == max(len(strings) - 1, 0):
+        return 'nul', [joined.encode('utf-8')]
+    encoded = [s.encode('utf-8') for s in strings]
+    return 'lengths', [_to_le(array('I', map(len, encoded))), b''.join(encoded)]
+
+
+def _decode_text(encoding: str, blobs: List[Any], count: int) -> List[str]:
+    if count == 0:
+        return []
+    if encoding == 'nul':
+        return bytes(blobs[0]).decode('utf-8').split('\x00')
+    lengths = _from_le('I', blobs[0])
+    data = bytes(blobs[1])
+    offsets = itertools.accumulate(lengths, initial=0)
+    return [data[start:start + length].decode('utf-8') for start, length in zip(offsets, lengths)]
+
+
+class SnapshotWriter:
+    """Writes a snapshot of one memory database."""
+
+    def __init__(self, memory: SQLiteMemory):
+        self.memory = memory
+
+    def write(self, path: str) -> Dict[str, int]:
+        """Write the snapshot to ``path`` (atomically); returns row counts."""
+        conn = self.memory._connect()
+        sections: List[bytes] = []
+        offset = 0
+        header: Dict[str, Any] = {'version': FORMAT_VERSION, 'tables': {}}
+
+        def add(blob: bytes) -> List[int]:
+            nonlocal offset
+            sections.append(blob)
+            offset += len(blob)
+            return [offset - len(blob), len(blob)]
+
+        try:
+            conn.execute('BEGIN')  # one read transaction: all columns from the same state
+            entity_ids = [row[0] for row in conn.execute(f"SELECT id FROM entities ORDER BY {ROW_ORDER['entities']}")]
+            id_codes = {entity_id: code for code, entity_id in enumerate(entity_ids)}
+            extra_ids: List[str] = []  # relation endpoints with no entity row
+            for table in TABLES:
+                count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                columns = []
+                for name in [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]:
+                    values = [row[0] for row in conn.execute(f'SELECT {name} FROM {table} ORDER BY {ROW_ORDER[table]}')]
+                    column: Dict[str, Any] = {'name': name}
+                    if any(v is None for v in values):
+                        column['nulls'] = add(bytes(v is None for v in values))
+                    if table == 'entities' and name == 'id':
+                        column['encoding'] = 'ids'
+                    elif (table, name) in REF_COLUMNS:
+                        codes = array('I')
+                        for value in values:
+                            code = id_codes.get(value)
+                            if code is None:
+                                code = id_codes[value] = len(id_codes)
+                                extra_ids.append(value)
+                            codes.append(code)
+                        column['encoding'] = 'ref'
+                        column['sections'] = [add(_to_le(codes))]
+                    elif (table, name) in INTERNED_COLUMNS:
+                        strings = list(dict.fromkeys(values))
+                        codes_of = {s: i for i, s in enumerate(strings)}
+                        column['encoding'] = 'dict'
+                        column['strings'] = strings
+                        column['sections'] = [add(_to_le(array('I', (codes_of[v] for v in values))))]
+                    elif all(v is None or isinstance(v, int) for v in values):
+                        column['encoding'] = 'int'
+                        column['sections'] = [add(_to_le(array('q', (v or 0 for v in values))))]
+                    else:
+                        column['encoding'], parts = _encode_text(
+                            [v if v is None or isinstance(v, str) else str(v) for v in values])
+                        column['sections'] = [add(part) for part in parts]
+                    columns.append(column)
+                header['tables'][table] = {'count': count, 'columns': columns}
+            ids_encoding, id_parts = _encode_text(entity_ids + extra_ids)
+            header['ids'] = {'count': len(entity_ids) + len(extra_ids), 'encoding': ids_encoding,
+                             'sections': [add(part) for part in id_parts]}
+            conn.rollback()
+        finally:
+            conn.close()
+
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_UINT32.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for blob in sections:
+                f.write(blob)
+        Path(tmp_path).replace(path)
+        counts = {table: header['tables'][table]['count'] for table in TABLES}
+        logger.info(f"Wrote snapshot {path}: {counts['entities']} entities, {counts['relations']} relations")
+        return counts
+
+
+def read_header(data) -> Tuple[Dict[str, Any], int]:
+    """Parse the header of a mapped snapshot; returns (header, offset of the first section)."""
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("not a memory snapshot (bad magic)")
+    start = len(MAGIC) + _UINT32.size
+    (length,) = _UINT32.unpack(data[len(MAGIC):start])
+    header = json.loads(bytes(data[start:start + length]))
+    if header.get('version') != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot version {header.get('version')}")
+    return header, start + length
+
+
+def _decode_columns(data, header: Dict[str, Any], base: int) -> Dict[str, Tuple[List[str], List[List[Any]]]]:
+    """Decode every column of every table from the mapped file."""
+    def section(spec):
+        return data[base + spec[0]:base + spec[0] + spec[1]]
+
+    ids_spec = header['ids']
+    ids = _decode_text(ids_spec['encoding'], [section(s) for s in ids_spec['sections']], ids_spec['count'])
+    tables = {}
+    for table in TABLES:
+        spec = header['tables'][table]
+        count = spec['count']
+        names, values = [], []
+        for column in spec['columns']:
+            encoding = column['encoding']
+            if encoding == 'ids':
+                decoded = ids[:count]
+            elif encoding == 'ref':
+                decoded = [ids[code] for code in _from_le('I', section(column['sections'][0]))]
+            elif encoding == 'dict':
+                strings = column['strings']
+                decoded = [strings[code] for code in _from_le('I', section(column['sections'][0]))]
+            elif encoding == 'int':
+                decoded = _from_le('q', section(column['sections'][0])).tolist()
+            else:
+                decoded = _decode_text(encoding, [section(s) for s in column['sections']], count)
+            if 'nulls' in column:
+                nulls = bytes(section(column['nulls']))
+                decoded = [None if null else value for null, value in zip(nulls, decoded)]
+            names.append(column['name'])
+            values.append(decoded)
+        tables[table] = (names, values)
+    return tables
+
+
+class SnapshotMemory(SQLiteMemory):
+    """A read-only SQLiteMemory held in a shared-cache in-memory database."""
+
+    def __init__(self):
+        self._uri = f"file:memory_snapshot_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        # The database lives as long as at least one connection to it is open
+        self._anchor = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        self._read_only = False
+        super().__init__(self._uri)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._uri, uri=True)
+        conn.row_factory = sqlite3.Row
+        if self._read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def close(self):
+        """Release the in-memory database."""
+        self._anchor.close()
+
+
+def load_snapshot(path: str) -> SnapshotMemory:
+    """Load a snapshot file into a read-only in-memory SQLiteMemory."""
+    start = time.perf_counter()
+    memory = SnapshotMemory()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = memoryview(mapped)
+        try:
+            header, base = read_header(data)
+            tables = _decode_columns(data, header, base)
+        finally:
+            data.release()
+
+    conn = memory._connect()
+    try:
+        conn.execute('BEGIN')
+        for name in _INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+        # Change-log triggers would double the load time and log nothing useful
+        triggers = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]
+        for name in triggers:
+            conn.execute(f'DROP TRIGGER {name}')
+        for table, (names, values) in tables.items():
+            # Only columns this version's schema knows about are loaded
+            known = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            keep = [i for i, name in enumerate(names) if name in known]
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(names[i] for i in keep)}) "
+                f"VALUES ({', '.join('?' for _ in keep)})",
+                zip(*(values[i] for i in keep)))
+        conn.commit()
+    finally:
+        conn.close()
+    memory._create_schema()  # rebuilds the secondary indexes and triggers
+    memory._read_only = True
+    counts = {table: header['tables'][table]['count'] for table in TABLES}
+    logger.info(f"Loaded snapshot {path} ({counts['entities']} entities, {counts['relations']} relations) "
+                f"in {time.perf_counter() - start:.2f}s")
+    return memory
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for writing and inspecting snapshots."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Write or inspect binary memory snapshots.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    write_parser = subparsers.add_parser('write', help='Write a snapshot of the database')
+    write_parser.add_argument('path', help='Snapshot file to write')
+    write_parser.add_argument('--db', default=None, help='Database (default: memory-bank/windsurf_memory.db)')
+    info_parser = subparsers.add_parser('info', help='Show what a snapshot contains')
+    info_parser.add_argument('path', help='Snapshot file')
+    args = parser.parse_args(argv)
+
+    if args.command == 'write':
+        counts = SnapshotWriter(SQLiteMemory(args.db)).write(args.path)
+        print(f"Wrote {counts['entities']} entities and {counts['relations']} relations to {args.path}")
+        return 0
+
+    with open(args.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header, _ = read_header(mapped)
+    for table in TABLES:
+        spec = header['tables'][table]
+        columns = ', '.join(f"{c['name']}:{c['encoding']}" for c in spec['columns'])
+        print(f"{table}: {spec['count']} rows ({columns})")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+==================
+
+Bounded LRU cache of UnifiedMemory search results, checked against a write
+generation stored in the database so that a cached result is never older
+than the last committed write, whichever process made it.
+
+---
+ONBOARDING & USAGE
+---
+- On by default: ``UnifiedMemory(query_cache_size=256)`` caches
+  search_entities (and so AgentInterface.search_knowledge),
+  query_entities and count_entities. ``query_cache_size=0`` turns it off.
+  Hit rates: ``memory.cache_stats()``.
+- Generations (see write_generation):
+    - The global generation is the ``entity_changes`` sequence, which the
+      change-log triggers advance in the same transaction as every entity
+      write.
+    - A search limited to one type uses that type's counter in
+      ``entity_type_generations`` instead, so writes to other types do not
+      evict it.
+    - ``cache_epoch`` in sync_meta is replaced by a restore, so states from
+      before and after it never compare equal.
+  Each lookup reads the current generation (one small SELECT) before
+  touching the cache, and an entry is only used if it was computed at that
+  generation. Results are computed after the generation is read, so a
+  write that lands in between only makes the entry stale early.
+- Nothing is cached inside ``transaction()``: uncommitted writes advance
+  the generation and a rollback would take the advance back.
+- Bounds: ``max_entries`` results and ``max_bytes`` of their JSON
+  encoding; least recently used entries go first. Hits are decoded afresh,
+  so callers may modify what they get back.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+EPOCH_KEY = 'cache_epoch'
+
+
+def write_generation(conn, entity_type: Optional[str] = None) -> Tuple[Any, ...]:
+    """The write generation of the whole database, or of one entity type."""
+    if entity_type is None:
+        counter, params = "SELECT seq FROM sqlite_sequence WHERE name = 'entity_changes'", ()
+    else:
+        counter, params = 'SELECT generation FROM entity_type_generations WHERE type = ?', (entity_type,)
+    row = conn.execute(f"SELECT ({counter}), (SELECT value FROM sync_meta WHERE key = '{EPOCH_KEY}')",
+                       params).fetchone()
+    return (row[1], row[0] or 0)
+
+
+class QueryCache:
+    """Thread-safe LRU of JSON-encoded results tagged with their write generation."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, str]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: Any) -> Tuple[bool, Any]:
+        """``(True, result)`` if ``key`` was cached at ``generation``, else ``(False, None)``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry[0] != generation:
+                self.stale += 1
+                self.misses += 1
+                self._remove(key)
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            encoded = entry[1]
+        return True, json.loads(encoded)
+
+    def put(self, key: Hashable, generation: Any, result: Any):
+        encoded = json.dumps(result, default=str)
+        if len(encoded) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generation, encoded)
+            self._bytes += len(encoded)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        self._bytes -= len(self._entries.pop(key)[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
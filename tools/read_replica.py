@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Read Replicas (Log Shipping)
+============================
+
+Ships committed changes from the primary memory database to follower
+database files on the same host, so read-heavy agents (reviewers running
+many ``search_knowledge`` calls) stop competing with writers for the
+primary file.
+
+---
+ONBOARDING & USAGE
+---
+- Quickstart:
+    # Keep a follower up to date (runs until interrupted)
+    python tools/read_replica.py --follower memory-bank/replica.db
+    # Catch up once and exit; print lag metrics
+    python tools/read_replica.py --follower memory-bank/replica.db --once
+    python tools/read_replica.py --follower memory-bank/replica.db --status
+- Reading from a follower:
+    memory = UnifiedMemory(read_replica='memory-bank/replica.db', max_staleness=5.0)
+    memory.search_entities('auth')  # follower if at most 5s behind, else primary
+- How it works:
+    - Triggers on the primary append every entity and relation write to the
+      ``entity_changes`` / ``relation_changes`` logs.
+    - The shipper reads up to ``batch_size`` log entries past the follower's
+      cursors, fetches the current rows they point at in the same read
+      transaction, and applies them to the follower in one transaction
+      together with the new cursors (so a batch is applied exactly once).
+    - A follower without cursors is first caught up from a snapshot taken
+      with SQLite's online backup API; the log is replayed from there.
+    - When a follower has caught up with everything the primary had
+      committed, ``replica_synced_at`` in its sync_meta is set to the time
+      of that read. Readers use it to bound staleness.
+- Lag metrics (``--status``): changes behind, seconds since the follower last
+  reflected the primary, batches and changes applied.
+"""
+
+import json
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the tools directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent))
+
+from sqlite_memory import SQLiteMemory
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+ENTITY_CURSOR_KEY = 'replica_entity_seq'
+RELATION_CURSOR_KEY = 'replica_relation_seq'
+SYNCED_AT_KEY = 'replica_synced_at'
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 0.5
+DEFAULT_MAX_STALENESS = 5.0
+
+
+class ReplicaFollower:
+    """A follower database file and its replication position."""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.memory = SQLiteMemory(self.path)
+        self.batches = 0
+        self.applied = 0
+
+    def cursors(self) -> Optional[Tuple[int, int]]:
+        """Return (entity seq, relation seq) applied so far, or None before the snapshot."""
+        with self.memory._get_connection() as conn:
+            entity_seq = get_meta(conn, ENTITY_CURSOR_KEY)
+            relation_seq = get_meta(conn, RELATION_CURSOR_KEY)
+        if entity_seq is None or relation_seq is None:
+            return None
+        return int(entity_seq), int(relation_seq)
+
+    def synced_at(self) -> Optional[float]:
+        """Unix time of the latest primary state this follower fully reflects."""
+        with self.memory._get_connection() as conn:
+            value = get_meta(conn, SYNCED_AT_KEY)
+        return float(value) if value else None
+
+    def staleness(self) -> Optional[float]:
+        """Seconds this follower may be behind the primary (None if never synced)."""
+        synced_at = self.synced_at()
+        return None if synced_at is None else max(0.0, time.time() - synced_at)
+
+
+class ReplicaRouter:
+    """Chooses between a follower and the primary for each read."""
+
+    def __init__(self, primary: SQLiteMemory, follower: ReplicaFollower,
+                 max_staleness: float = DEFAULT_MAX_STALENESS):
+        """
+        Args:
+            primary: Database that receives this process's writes
+            follower: Follower to prefer for reads
+            max_staleness: Seconds behind the primary a follower may be and still serve reads
+        """
+        self.primary = primary
+        self.follower = follower
+        self.max_staleness = max_staleness
+        self._last_write = 0.0
+
+    def wrote(self):
+        """Note a write, so later reads only use a follower that has shipped it."""
+        self._last_write = time.time()
+
+    def reader(self) -> SQLiteMemory:
+        """Return the database the next read should use."""
+        synced_at = self.follower.synced_at()
+        if (synced_at is not None and synced_at >= self._last_write
+                and time.time() - synced_at <= self.max_staleness):
+            return self.follower.memory
+        return self.primary
+
+
+class LogShipper:
+    """Ships the primary's change logs to followers in batches."""
+
+    def __init__(self, primary: SQLiteMemory, followers: List[ReplicaFollower],
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            primary: Database written by agents and sync_memory.py
+            followers: Follower databases to keep up to date
+            batch_size: Maximum log entries (per log) applied per transaction
+        """
+        self.primary = primary
+        self.followers = followers
+        self.batch_size = max(1, batch_size)
+
+    @staticmethod
+    def _head(conn) -> Tuple[int, int]:
+        return (conn.execute('SELECT COALESCE(MAX(seq), 0) FROM entity_changes').fetchone()[0],
+                conn.execute('SELECT COALESCE(MAX(seq), 0) FROM relation_changes').fetchone()[0])
+
+    def snapshot(self, follower: ReplicaFollower):
+        """Copy the whole primary into the follower and start shipping from there."""
+        source = self.primary._connect()
+        target = sqlite3.connect(follower.path)
+        try:
+            # The read transaction keeps writers out, so the copy matches the log heads
+            source.execute('BEGIN')
+            head = self._head(source)
+            read_at = time.time()
+            source.backup(target)
+            source.rollback()
+            with target:
+                for key, value in ((ENTITY_CURSOR_KEY, head[0]), (RELATION_CURSOR_KEY, head[1]),
+                                   (SYNCED_AT_KEY, read_at)):
+                    set_meta(target, key, str(value))
+        finally:
+            source.close()
+            target.close()
+        logger.info(f"Follower {follower.path} restored from snapshot at changes {head[0]}/{head[1]}")
+
+    def _read_batch(self, cursors: Tuple[int, int]):
+        """Read the next batch of changes and the rows they point at, in one read transaction."""
+        conn = self.primary._connect()
+        try:
+            conn.execute('BEGIN')
+            read_at = time.time()
+            head = self._head(conn)
+            entity_log = conn.execute('SELECT seq, entity_id FROM entity_changes WHERE seq > ? '
+                                      'ORDER BY seq LIMIT ?', (cursors[0], self.batch_size)).fetchall()
+            relation_log = conn.execute('SELECT seq, relation_id FROM relation_changes WHERE seq > ? '
+                                        'ORDER BY seq LIMIT ?', (cursors[1], self.batch_size)).fetchall()
+            entity_ids = {row['entity_id'] for row in entity_log}
+            relation_ids = {row['relation_id'] for row in relation_log}
+            entities = {row['id']: dict(row) for row in self._fetch(conn, 'entities', entity_ids)}
+            relations = {row['id']: dict(row) for row in self._fetch(conn, 'relations', relation_ids)}
+            conn.rollback()
+        finally:
+            conn.close()
+        new_cursors = (entity_log[-1]['seq'] if entity_log else cursors[0],
+                       relation_log[-1]['seq'] if relation_log else cursors[1])
+        changes = len(entity_log) + len(relation_log)
+        return new_cursors, head, read_at, changes, (entity_ids, entities), (relation_ids, relations)
+
+    @staticmethod
+    def _fetch(conn, table: str, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), 500):  # stay below SQLite's parameter limit
+            chunk = ids[start:start + 500]
+            yield from conn.execute(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' for _ in chunk)})", chunk)
+
+    @staticmethod
+    def _apply_rows(conn, table: str, ids, rows: Dict[Any, Dict[str, Any]]):
+        """Make ``ids`` in the follower's ``table`` match the primary (rows missing there are deleted)."""
+        for row in rows.values():
+            columns = list(row)
+            conn.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                         f"VALUES ({', '.join('?' for _ in columns)})", [row[c] for c in columns])
+        conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(i,) for i in ids if i not in rows])
+
+    def ship(self, follower: ReplicaFollower) -> int:
+        """Apply pending changes to one follower, batch by batch; returns changes applied."""
+        cursors = follower.cursors()
+        if cursors is None:
+            self.snapshot(follower)
+            cursors = follower.cursors()
+        applied = 0
+        while True:
+            new_cursors, head, read_at, changes, entities, relations = self._read_batch(cursors)
+            caught_up = new_cursors == head
+            with follower.memory.transaction() as conn:
+                self._apply_rows(conn, 'entities', *entities)
+                self._apply_rows(conn, 'relations', *relations)
+                set_meta(conn, ENTITY_CURSOR_KEY, str(new_cursors[0]))
+                set_meta(conn, RELATION_CURSOR_KEY, str(new_cursors[1]))
+                if caught_up:
+                    set_meta(conn, SYNCED_AT_KEY, str(read_at))
+            if changes:
+                follower.batches += 1
+                follower.applied += changes
+                applied += changes
+            cursors = new_cursors
+            if caught_up:
+                return applied
+
+    def ship_all(self) -> int:
+        """Bring every follower up to date; returns total changes applied."""
+        total = 0
+        for follower in self.followers:
+            try:
+                total += self.ship(follower)
+            except sqlite3.Error as e:
+                logger.error(f"Shipping to {follower.path} failed: {e}", exc_info=True)
+        return total
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Lag metrics per follower."""
+        with self.primary._get_connection() as conn:
+            head = self._head(conn)
+        metrics = []
+        for follower in self.followers:
+            cursors = follower.cursors()
+            staleness = follower.staleness()
+            metrics.append({
+                'follower': follower.path,
+                'primary_seq': list(head),
+                'applied_seq': list(cursors) if cursors else None,
+                'lag_changes': None if cursors is None else (head[0] - cursors[0]) + (head[1] - cursors[1]),
+                'lag_seconds': None if staleness is None else round(staleness, 3),
+                'batches': follower.batches,
+                'changes_applied': follower.applied,
+            })
+        return metrics
+
+    def run(self, interval: float = DEFAULT_INTERVAL):
+        """Ship continuously, polling the primary's logs every ``interval`` seconds."""
+        logger.info(f"Shipping changes to {len(self.followers)} follower(s) every {interval}s")
+        try:
+            while True:
+                if self.ship_all():
+                    logger.debug(json.dumps(self.status()))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Log shipping stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the log shipper."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Ship memory database changes to read replicas.")
+    parser.add_argument('--follower', action='append', required=True, help='Follower database path (repeatable)')
+    parser.add_argument('--db', default=None, help='Primary database (default: memory-bank/windsurf_memory.db)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Log entries applied per transaction (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f'Seconds between polls of the primary (default: {DEFAULT_INTERVAL})')
+    parser.add_argument('--once', action='store_true', help='Catch up once and exit')
+    parser.add_argument('--status', action='store_true', help='Print lag metrics as JSON and exit')
+    args = parser.parse_args(argv)
+
+    shipper = LogShipper(SQLiteMemory(args.db), [ReplicaFollower(path) for path in args.follower],
+                         batch_size=args.batch_size)
+    if args.status:
+        print(json.dumps(shipper.status(), indent=2))
+        return 0
+    if args.once:
+        shipper.ship_all()
+        print(json.dumps(shipper.status(), indent=2))
+        return 0
+    shipper.run(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -15,8 +15,12 @@ ONBOARDING & USAGE
     - Use as a backend for AgentMemoryInterface or any agent needing persistent memory.
     - Compatible with multi-agent workflows and memory sync protocols.
 - Logging:
-    - All operations are logged to 'logs/sqlite_memory.log'.
-    - Adjust logging config at the top of this file if needed.
+    - Using the ``memory`` singleton logs all operations to 'logs/sqlite_memory.log'
+      (see configure_logging); importing the module configures nothing.
+- Startup cost:
+    - The singleton is created on first use, not at import.
+    - Schema DDL runs only when ``PRAGMA user_version`` is behind SCHEMA_VERSION;
+      bump SCHEMA_VERSION with every schema change.
 - Troubleshooting:
     - See troubleshooting tips at the end of this file.
     - For memory sync issues, see tools/check_memory_sync.py and session protocols.
@@ -28,46 +32,201 @@ For more onboarding help, see memory_system_guide.ps1, session_start_protocol.md
 import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterator, List, Optional, Any, Union
 from datetime import datetime
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent.parent / 'logs' / 'sqlite_memory.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# Bump whenever _create_schema changes, so existing databases are upgraded
+# on next open; databases already at this version skip the DDL entirely
+SCHEMA_VERSION = 6
+
+
+def configure_logging():
+    """Log to logs/sqlite_memory.log and stderr, unless logging is already configured."""
+    log_dir = Path(__file__).parent.parent / 'logs'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'sqlite_memory.log', delay=True),
+            logging.StreamHandler()
+        ]
+    )
+
+
+class _PinnedConnection:
+    """Connection proxy handed out inside SQLiteMemory.transaction().
+    
+    Methods keep using ``with conn:`` and ``conn.commit()``; both become
+    no-ops so the enclosing transaction decides when to commit.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+    
+    def commit(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
 class SQLiteMemory:
     """A simple SQLite-based memory system for the Windsurf Project."""
     
-    def __init__(self, db_path: str = None):
+    # Last generated entity id timestamp, shared so ids stay unique
+    # even when many entities are created within the same millisecond.
+    _id_lock = threading.Lock()
+    _last_id_ms = 0
+    
+    def __init__(self, db_path: str = None, reuse_connections: bool = False):
         """Initialize the SQLite memory system.
         
         Args:
             db_path: Path to the SQLite database file. If not provided, 
                     uses 'memory-bank/windsurf_memory.db'.
+            reuse_connections: Keep one open connection per thread instead of
+                    opening one per call (for long-lived processes such as
+                    memory_server.py)
         """
         if db_path is None:
             db_path = str(Path(__file__).parent.parent / 'memory-bank' / 'windsurf_memory.db')
         
         self.db_path = db_path
+        self.reuse_connections = reuse_connections
+        self._local = threading.local()
         self._ensure_db_exists()
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new database connection."""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable dictionary-style access
         return conn
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get a database connection.
+        
+        Inside ``transaction()`` this is the pinned connection of the
+        current thread; otherwise a new connection (or, with
+        ``reuse_connections``, this thread's long-lived one).
+        """
+        pinned = getattr(self._local, 'conn', None)
+        if pinned is not None:
+            return pinned
+        if self.reuse_connections:
+            warm = getattr(self._local, 'warm', None)
+            if warm is None:
+                warm = self._local.warm = self._connect()
+            return warm
+        return self._connect()
+    
+    def in_transaction(self) -> bool:
+        """Whether this thread is inside ``transaction()``."""
+        return getattr(self._local, 'conn', None) is not None
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run several operations in one transaction on one connection.
+        
+        All SQLiteMemory calls made by this thread inside the block share the
+        connection and are committed together (or rolled back on error).
+        Nested calls create a SAVEPOINT, so a failing inner block only undoes
+        its own work.
+        
+        Example:
+            with memory.transaction():
+                memory.create_entity({...})
+                memory.update_entity(entity_id, {...})
+        """
+        pinned = getattr(self._local, 'conn', None)
+        if pinned is not None:
+            self._local.depth += 1
+            savepoint = f"sp_{self._local.depth}"
+            pinned.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield pinned
+            except BaseException:
+                pinned.execute(f"ROLLBACK TO {savepoint}")
+                pinned.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                pinned.execute(f"RELEASE {savepoint}")
+            finally:
+                self._local.depth -= 1
+            return
+        
+        conn = self._get_connection() if self.reuse_connections else self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.conn = _PinnedConnection(conn)
+        self._local.depth = 0
+        try:
+            yield self._local.conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._local.conn = None
+            if not self.reuse_connections:
+                conn.close()
+    
+    @classmethod
+    def _generate_id(cls) -> str:
+        """Generate a unique ``ent_<milliseconds>`` entity id."""
+        with cls._id_lock:
+            now_ms = int(datetime.utcnow().timestamp() * 1000)
+            cls._last_id_ms = max(now_ms, cls._last_id_ms + 1)
+            return f"ent_{cls._last_id_ms}"
+    
+    @classmethod
+    def _skip_used_ids(cls, conn: sqlite3.Connection):
+        """Move the id counter past every ``ent_<milliseconds>`` id in the database.
+        
+        Bursts of creates hand out ids ahead of the clock, so a process
+        started right after another one can otherwise reuse its ids.
+        """
+        row = conn.execute("SELECT MAX(id) FROM entities WHERE id GLOB 'ent_[0-9]*'").fetchone()
+        if row[0] and row[0][4:].isdigit():
+            with cls._id_lock:
+                cls._last_id_ms = max(cls._last_id_ms, int(row[0][4:]))
+    
+    @staticmethod
+    def _add_column(cursor: sqlite3.Cursor, table: str, column: str, declaration: str):
+        """Add a column to a table created by an older version, if missing."""
+        columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+        if column in columns:
+            return
+        try:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+        except sqlite3.OperationalError as e:  # added by a concurrent process
+            if 'duplicate column' not in str(e):
+                raise
+    
     def _ensure_db_exists(self):
-        """Ensure the database and tables exist."""
+        """Ensure the database and tables exist.
+        
+        Only a version check when ``PRAGMA user_version`` says the schema is current.
+        """
+        with self._get_connection() as conn:
+            current = conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        if not current:
+            self._create_schema()
+    
+    def _create_schema(self):
+        """Create or upgrade all tables, indexes and triggers, and record SCHEMA_VERSION."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
@@ -99,12 +258,162 @@ class SQLiteMemory:
                 )
             ''')
             
+            # Tombstone column for entities whose file was deleted (purged later)
+            self._add_column(cursor, 'entities', 'deleted_at', 'TIMESTAMP')
+            # Incremented on every update; resolves replication conflicts
+            # (see memory_replication.py)
+            self._add_column(cursor, 'entities', 'version', 'INTEGER NOT NULL DEFAULT 1')
+            
             # Create indices for better performance
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(type)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name)')
+            # Sorts and keyset pages of memory_query.py (``sort:-updated`` is the default)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entities_updated ON entities(updated_at, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entities_created ON entities(created_at, id)')
+            # Agent filter of memory_query.py (``created_by:<agent>``)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_entities_created_by "
+                           "ON entities(json_extract(metadata, '$.created_by'))")
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_source ON relations(source_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_target ON relations(target_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_relations_type ON relations(type)')
             
+            # Per-file sync state for tools/sync_memory.py (see sync_state.py)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    path TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    algo TEXT NOT NULL DEFAULT 'sha256',
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    inode INTEGER,
+                    entity_id TEXT,
+                    last_synced TIMESTAMP,
+                    entity_hash TEXT
+                )
+            ''')
+            # Hash of the entity row as synced, to detect database drift
+            self._add_column(cursor, 'sync_state', 'entity_hash', 'TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sync_state_entity ON sync_state(entity_id)')
+
+            # Per-entry state of chunked files (see markdown_chunks.py);
+            # chunk_key '' is the preamble held by the file's own entity
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_chunks (
+                    path TEXT NOT NULL,
+                    chunk_key TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    entity_id TEXT,
+                    PRIMARY KEY (path, chunk_key)
+                )
+            ''')
+
+            # Sync state of deleted files, kept for a grace period so the
+            # entity can be revived or matched to a rename by content hash
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_tombstones (
+                    path TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    algo TEXT NOT NULL DEFAULT 'sha256',
+                    entity_id TEXT,
+                    deleted_at TIMESTAMP NOT NULL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sync_tombstones_hash ON sync_tombstones(algo, hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted ON sync_tombstones(deleted_at)')
+
+            # Change log of entity writes, consumed incrementally by
+            # export_memory.py; origin is 'file' for writes made by the
+            # files -> DB sync, so they are not exported back
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS entity_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entity_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    origin TEXT NOT NULL DEFAULT 'db',
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            for op, event, row in (('insert', 'INSERT', 'NEW'), ('update', 'UPDATE', 'NEW'),
+                                   ('delete', 'DELETE', 'OLD')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_entities_{op} AFTER {event} ON entities
+                    BEGIN
+                        INSERT INTO entity_changes (entity_id, op) VALUES ({row}.id, '{op}');
+                    END
+                ''')
+
+            # Per-type write counters, so cached searches limited to one type
+            # (see query_cache.py) survive writes to other types
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS entity_type_generations (
+                    type TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                )
+            ''')
+            bump = ('INSERT INTO entity_type_generations (type, generation) VALUES ({}.type, 1) '
+                    'ON CONFLICT(type) DO UPDATE SET generation = generation + 1;')
+            for op, event, rows in (('insert', 'INSERT', ('NEW',)), ('update', 'UPDATE', ('OLD', 'NEW')),
+                                    ('delete', 'DELETE', ('OLD',))):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_entity_types_{op} AFTER {event} ON entities
+                    BEGIN
+                        {' '.join(bump.format(row) for row in rows)}
+                    END
+                ''')
+
+            # Same for relations; shipped to read replicas (see read_replica.py)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS relation_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    relation_id INTEGER NOT NULL,
+                    op TEXT NOT NULL,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            for op, event, row in (('insert', 'INSERT', 'NEW'), ('update', 'UPDATE', 'NEW'),
+                                   ('delete', 'DELETE', 'OLD')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_relations_{op} AFTER {event} ON relations
+                    BEGIN
+                        INSERT INTO relation_changes (relation_id, op) VALUES ({row}.id, '{op}');
+                    END
+                ''')
+
+            # Cross-process leases, so concurrent sync runs collapse into
+            # one (see sync_lease.py); times are Unix timestamps
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    acquired_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+
+            # Small key/value store for sync cursors and markers
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+
+            # Full-text index of name and content for memory_query.py, keyed by
+            # entities.rowid and brought up to date from entity_changes when
+            # queried; skipped where SQLite lacks FTS5
+            try:
+                cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(name, content)')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS entities_fts_map (
+                        entity_id TEXT PRIMARY KEY,
+                        fts_rowid INTEGER NOT NULL
+                    )
+                ''')
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Full-text search unavailable: {e}")
+
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             conn.commit()
     
     def create_entity(self, entity_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -122,7 +431,8 @@ class SQLiteMemory:
             Dictionary containing the created entity data
         """
         # Generate an ID if not provided
-        entity_id = entity_data.get('id', f"ent_{int(datetime.utcnow().timestamp() * 1000)}")
+        generated = not entity_data.get('id')
+        entity_id = entity_data.get('id') or self._generate_id()
         
         # Prepare the entity data
         entity = {
@@ -135,12 +445,21 @@ class SQLiteMemory:
             'updated_at': datetime.utcnow().isoformat()
         }
         
+        insert = '''
+            INSERT INTO entities (id, type, name, content, metadata, created_at, updated_at)
+            VALUES (:id, :type, :name, :content, :metadata, :created_at, :updated_at)
+        '''
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO entities (id, type, name, content, metadata, created_at, updated_at)
-                VALUES (:id, :type, :name, :content, :metadata, :created_at, :updated_at)
-            ''', entity)
+            try:
+                cursor.execute(insert, entity)
+            except sqlite3.IntegrityError:
+                if not generated:
+                    raise
+                # Taken by another process; retry with an id past all used ones
+                self._skip_used_ids(conn)
+                entity['id'] = self._generate_id()
+                cursor.execute(insert, entity)
             conn.commit()
         
         # Return the created entity with metadata as a dictionary
@@ -189,12 +508,13 @@ class SQLiteMemory:
             if key == 'metadata' and isinstance(value, dict):
                 # Merge metadata dictionaries
                 entity['metadata'].update(value)
-                entity['metadata'] = json.dumps(entity['metadata'])
             elif key in ['type', 'name', 'content']:
                 entity[key] = value
+        entity['metadata'] = json.dumps(entity['metadata'])
         
-        # Update the timestamp
+        # Update the timestamp and version
         entity['updated_at'] = datetime.utcnow().isoformat()
+        entity['version'] = entity.get('version', 1) + 1
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -204,7 +524,8 @@ class SQLiteMemory:
                     name = :name,
                     content = :content,
                     metadata = :metadata,
-                    updated_at = :updated_at
+                    updated_at = :updated_at,
+                    version = version + 1
                 WHERE id = :id
             ''', entity)
             conn.commit()
@@ -240,6 +561,8 @@ class SQLiteMemory:
     def search_entities(self, query: str, entity_type: str = None, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for entities by name or content.
         
+        Tombstoned entities (whose file was deleted) are not returned.
+        
         Args:
             query: Search query string
             entity_type: Optional entity type to filter by
@@ -257,14 +580,14 @@ class SQLiteMemory:
                 cursor.execute('''
                     SELECT * FROM entities 
                     WHERE (name LIKE ? OR content LIKE ?) 
-                      AND type = ?
+                      AND type = ? AND deleted_at IS NULL
                     ORDER BY updated_at DESC
                     LIMIT ?
                 ''', (search_term, search_term, entity_type, limit))
             else:
                 cursor.execute('''
                     SELECT * FROM entities 
-                    WHERE name LIKE ? OR content LIKE ?
+                    WHERE (name LIKE ? OR content LIKE ?) AND deleted_at IS NULL
                     ORDER BY updated_at DESC
                     LIMIT ?
                 ''', (search_term, search_term, limit))
@@ -383,8 +706,21 @@ class SQLiteMemory:
             conn.commit()
             return cursor.rowcount > 0
 
-# Singleton instance
-memory = SQLiteMemory()
+# Singleton instance, created on first access (``from sqlite_memory import memory``)
+# so importing this module opens no database
+_memory: Optional[SQLiteMemory] = None
+_memory_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    global _memory
+    if name != 'memory':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _memory_lock:
+        if _memory is None:
+            configure_logging()
+            _memory = SQLiteMemory()
+    return _memory
 
 # ---
 # TROUBLESHOOTING & ONBOARDING TIPS
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Continuous Memory Sync Daemon
+=============================
+
+Keeps the SQLite memory database in step with memory-bank/ between
+sessions instead of relying on manual or CI-triggered sync runs.
+
+---
+ONBOARDING & USAGE
+---
+- Purpose: Long-running sync mode. Watches memory-bank/ and re-syncs only the
+  files that were touched, a short debounce after a burst of edits.
+- Quickstart:
+    python tools/sync_memory.py --watch
+    python tools/sync_memory.py --watch --poll --interval 2   # force polling
+- Watching:
+    - Linux: inotify (via ctypes, no extra dependency), recursive.
+    - Elsewhere, or if inotify is unavailable: polling with the sync stat
+      cache, so each poll costs one stat per file and no hashing.
+- Runs each pass under the single-flight sync lease (sync_lease.py), so
+  passes never overlap a one-shot sync of the same database
+  (``--no-coordination`` to skip the lease).
+- Status & metrics:
+    - Written atomically to logs/.sync_daemon.json after every batch and on
+      every heartbeat: pid, pending files, batches, files synced, sync lag
+      (first event -> commit) and throughput.
+    - `python tools/check_memory_sync.py --daemon` reads this status instead
+      of rescanning the tree when the daemon is alive.
+- Troubleshooting:
+    - Stop with Ctrl+C or SIGTERM; the status file is removed on exit.
+    - Logs go to logs/memory_sync.log like one-shot syncs.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Constants
+LOG_DIR = Path("logs")
+STATUS_FILE = LOG_DIR / ".sync_daemon.json"
+DEFAULT_DEBOUNCE = 0.5      # seconds of quiet before a burst is synced
+DEFAULT_MAX_DELAY = 5.0     # upper bound on how long a busy burst is held back
+DEFAULT_POLL_INTERVAL = 2.0
+HEARTBEAT_INTERVAL = 5.0
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Recursive inotify watcher for a directory tree (Linux only).
+
+    ``poll`` returns the set of touched paths relative to the root, or None
+    when a full rescan is required: the kernel queue overflowed, or a
+    directory was renamed or deleted, whose files are not known here.
+    """
+
+    def __init__(self, root: Path, exclude: Optional[Path] = None):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = str(root)
+        self.exclude = str(exclude) if exclude else None
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(self.root)
+
+    def _add_watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            logger.warning(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory: str) -> Set[str]:
+        """Watch ``directory`` and its subdirectories; return files already inside."""
+        found: Set[str] = set()
+        for current, subdirs, files in os.walk(directory):
+            if self.exclude and current == self.exclude:
+                subdirs[:] = []
+                continue
+            self._add_watch(current)
+            found.update(os.path.relpath(os.path.join(current, name), self.root) for name in files)
+        return found
+
+    def _remove_tree(self, directory: str):
+        """Stop watching ``directory`` and everything below it."""
+        prefix = directory + os.sep
+        for wd, path in list(self._dirs.items()):
+            if path == directory or path.startswith(prefix):
+                # A moved directory keeps its watches, which would report the old path
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        rescan = False
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return None if rescan else changed
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if self.exclude and path == self.exclude:
+                    continue
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land before the new watch exists
+                        changed.update(self._add_tree(path))
+                    elif mask & (IN_MOVED_FROM | IN_DELETE):
+                        self._remove_tree(path)
+                        rescan = True
+                    continue
+                changed.add(os.path.relpath(path, self.root))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: periodic stat scan compared against the sync state."""
+
+    def __init__(self, synchronizer, interval: float = DEFAULT_POLL_INTERVAL):
+        self.synchronizer = synchronizer
+        self.interval = interval
+        self._next_poll = 0.0
+        # Stat last reported per path. Recently written files keep an
+        # untrusted stat in the sync state for a moment; without this they
+        # would be reported on every poll until that window passes.
+        self._reported: Dict[str, tuple] = {}
+
+    def poll(self, timeout: float) -> Optional[Set[str]]:
+        wait = min(timeout, max(0.0, self._next_poll - time.monotonic()))
+        time.sleep(wait)
+        if time.monotonic() < self._next_poll:
+            return set()
+        self._next_poll = time.monotonic() + self.interval
+        changed = set()
+        for rel_path in self.synchronizer.find_changed_paths():
+            try:
+                st = os.stat(os.path.join(str(self.synchronizer.memory_bank_dir), rel_path))
+                key = (st.st_size, st.st_mtime_ns, st.st_ino)
+            except FileNotFoundError:
+                key = None  # deleted; reported once until it is tombstoned
+            if self._reported.get(rel_path, ()) != key:
+                self._reported[rel_path] = key
+                changed.add(rel_path)
+        return changed
+
+    def close(self):
+        pass
+
+
+class SyncDaemon:
+    """Debounces filesystem events and syncs only the touched files."""
+
+    def __init__(self, synchronizer, watcher=None, debounce: float = DEFAULT_DEBOUNCE,
+                 max_delay: float = DEFAULT_MAX_DELAY, workers: int = 1,
+                 status_file: Path = STATUS_FILE, flight=None):
+        """
+        Args:
+            flight: Optional sync_lease.SingleFlight (with ``share=False``);
+                each pass then runs under the lease one-shot syncs take
+        """
+        self.synchronizer = synchronizer
+        self.watcher = watcher or make_watcher(synchronizer)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.workers = workers
+        self.flight = flight
+        self.status_file = Path(status_file)
+        self._running = False
+        self.metrics = {
+            'pid': os.getpid(),
+            'watcher': type(self.watcher).__name__,
+            'started_at': time.time(),
+            'heartbeat': time.time(),
+            'pending': 0,
+            'events': 0,
+            'batches': 0,
+            'files_synced': 0,
+            'errors': 0,
+            'last_sync_at': None,
+            'last_batch_files': 0,
+            'last_lag_seconds': None,
+            'max_lag_seconds': 0.0,
+            'avg_lag_seconds': None,
+            'last_throughput_fps': None,
+        }
+        self._lag_total = 0.0
+
+    def write_status(self):
+        """Atomically publish the current metrics for check_memory_sync."""
+        self.metrics['heartbeat'] = time.time()
+        self.status_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.status_file.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.metrics, f, indent=2)
+        os.replace(tmp_file, self.status_file)
+
+    def sync_paths(self, paths: Optional[Set[str]], first_event: float) -> bool:
+        """Sync the given relative paths (None = full scan) and record metrics."""
+        started = time.monotonic()
+        reports = []
+
+        def run_sync():
+            return {'success': self.synchronizer.sync_to_sqlite(workers=self.workers, paths=paths,
+                                                                progress=reports.append)}
+
+        if self.flight is None:
+            ok = run_sync()['success']
+        else:
+            try:
+                ok = self.flight.run(run_sync)[0]['success']
+            except TimeoutError as e:
+                logger.warning(f"{e}; syncing without the lease")
+                ok = run_sync()['success']
+        finished = time.monotonic()
+        stats = reports[-1] if reports else {'synced': 0, 'errors': 0}
+
+        lag = finished - first_event
+        m = self.metrics
+        m['batches'] += 1
+        m['files_synced'] += stats['synced']
+        m['errors'] += stats['errors']
+        m['last_sync_at'] = time.time()
+        m['last_batch_files'] = stats['synced']
+        m['last_lag_seconds'] = round(lag, 4)
+        m['max_lag_seconds'] = round(max(m['max_lag_seconds'], lag), 4)
+        self._lag_total += lag
+        m['avg_lag_seconds'] = round(self._lag_total / m['batches'], 4)
+        elapsed = finished - started
+        m['last_throughput_fps'] = round(stats['synced'] / elapsed, 1) if elapsed > 0 else None
+        m['pending'] = 0
+        self.write_status()
+        logger.info(f"Daemon synced {stats['synced']} file(s), lag {lag:.3f}s")
+        return ok
+
+    def run_once(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` for events; sync one debounced burst if any.
+
+        Returns True if a sync happened.
+        """
+        changed = self.watcher.poll(timeout)
+        if changed is not None and not changed:
+            return False
+
+        first_event = time.monotonic()
+        pending = changed
+        self.metrics['events'] += len(changed) if changed else 1
+        while time.monotonic() - first_event < self.max_delay:
+            self.metrics['pending'] = len(pending) if pending is not None else None
+            more = self.watcher.poll(self.debounce)
+            if more is not None and not more:
+                break  # quiet for a full debounce window
+            self.metrics['events'] += len(more) if more else 1
+            # None means the watcher lost events: fall back to a full scan
+            pending = None if more is None or pending is None else pending | more
+
+        self.sync_paths(pending, first_event)
+        return True
+
+    def run(self):
+        """Run until SIGINT/SIGTERM. Starts with one full sync to catch up."""
+        self._running = True
+
+        def stop(signum, frame):
+            self._running = False
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        logger.info(f"Sync daemon started (pid {os.getpid()}, {self.metrics['watcher']})")
+        try:
+            self.sync_paths(None, time.monotonic())
+            last_heartbeat = time.monotonic()
+            while self._running:
+                self.run_once(min(1.0, HEARTBEAT_INTERVAL))
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.write_status()
+                    last_heartbeat = time.monotonic()
+        finally:
+            self.watcher.close()
+            try:
+                self.status_file.unlink()
+            except FileNotFoundError:
+                pass
+            logger.info("Sync daemon stopped")
+
+
+def make_watcher(synchronizer, force_polling: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+    """Return an inotify watcher where available, else a polling watcher."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(synchronizer.memory_bank_dir, exclude=synchronizer.conflict_dir)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}); falling back to polling")
+    return PollingWatcher(synchronizer, interval)
+
+
+def read_status(status_file: Path = STATUS_FILE, max_age: float = 3 * HEARTBEAT_INTERVAL) -> Optional[Dict]:
+    """Return the daemon's published status if it is alive and fresh, else None."""
+    try:
+        with open(status_file, 'r') as f:
+            status = json.load(f)
+        # On Windows os.kill would terminate the process; rely on the heartbeat
+        if os.name != 'nt':
+            os.kill(status['pid'], 0)
+    except (OSError, ValueError, KeyError):
+        return None
+    if time.time() - status.get('heartbeat', 0) > max_age:
+        return None
+    return status
@@ -0,0 +1,207 @@
+"""
+Single-Flight Sync Lease
+========================
+
+Collapses concurrent sync runs into one. The session start and end
+protocols have every agent run sync_memory.py; when several agents start
+together, only the first one syncs and the others reuse its result.
+
+---
+ONBOARDING & USAGE
+---
+- Used by sync_memory.py automatically; agents never need it.
+- How it works:
+    - The first caller takes a lease: a row in the ``sync_leases`` table of
+      the memory database, claimed inside a ``BEGIN IMMEDIATE`` transaction
+      so exactly one process wins. A heartbeat thread renews it while the
+      sync runs.
+    - Callers that find the lease taken poll until the holder releases it.
+      A run that started after the caller arrived saw the caller's edits, so
+      its result (``sync_meta``) is returned instead of syncing; a run that
+      was already under way may have scanned past them, so the caller takes
+      the lease next and syncs itself.
+    - With ``max_age`` set, callers also reuse a successful result that
+      finished at most that many seconds before they arrived, or while they
+      waited. It defaults to 0 so a manual sync always syncs; the session
+      protocol hooks, which run it for every agent, pass ``--max-age 10``
+      (SESSION_MAX_AGE).
+    - The sync daemon (``--watch``) takes the same lease for each pass with
+      ``share=False``: it waits for one-shot runs and they wait for it, but
+      its passes cover only the touched files, so no result is exchanged.
+    - A lease that is not renewed expires after ``lease_seconds``, so a
+      crashed sync never blocks later runs; the next caller takes it over.
+- Example:
+    flight = SingleFlight(SQLiteMemory())
+    result, shared = flight.run(lambda: {'success': True, 'stats': {...}})
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlite_memory import SQLiteMemory
+from sync_state import get_meta, set_meta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_NAME = 'sync'
+DEFAULT_LEASE_SECONDS = 30.0   # renewed every third of this while the holder runs
+DEFAULT_MAX_AGE = 0.0          # reuse a successful result this many seconds old
+SESSION_MAX_AGE = 10.0
+DEFAULT_WAIT_TIMEOUT = 600.0
+DEFAULT_POLL_INTERVAL = 0.2
+
+
+class SingleFlight:
+    """Runs a function in at most one process at a time and shares its result."""
+
+    def __init__(self, memory: SQLiteMemory, name: str = DEFAULT_LEASE_NAME,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, max_age: float = DEFAULT_MAX_AGE,
+                 wait_timeout: float = DEFAULT_WAIT_TIMEOUT, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 share: bool = True):
+        """
+        Args:
+            memory: Database holding the sync_leases and sync_meta tables
+            name: Lease name; callers with the same name share results
+            lease_seconds: Lease lifetime without a heartbeat
+            max_age: Seconds a successful result stays reusable (0: never)
+            wait_timeout: Give up waiting for another holder after this long
+            poll_interval: Seconds between checks while waiting
+            share: False to always run ``func`` and never publish its result,
+                for partial runs such as the sync daemon's
+        """
+        self.memory = memory
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.max_age = max_age
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.share = share
+        # Imported here: only needed once a lease is used, and slow to import
+        import socket
+        import uuid
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.result_key = f'{name}_result'
+
+    def holder(self) -> Optional[Dict[str, Any]]:
+        """Return the current unexpired lease, if any."""
+        with self.memory._get_connection() as conn:
+            row = conn.execute('SELECT * FROM sync_leases WHERE name = ? AND expires_at > ?',
+                               (self.name, time.time())).fetchone()
+        return dict(row) if row else None
+
+    def try_acquire(self) -> bool:
+        """Take the lease if it is free or expired."""
+        now = time.time()
+        try:
+            with self.memory.transaction() as conn:
+                row = conn.execute('SELECT owner, expires_at FROM sync_leases WHERE name = ?',
+                                   (self.name,)).fetchone()
+                if row is not None and row['expires_at'] > now and row['owner'] != self.owner:
+                    return False
+                if row is not None and row['owner'] != self.owner:
+                    logger.warning(f"Taking over expired sync lease of {row['owner']}")
+                conn.execute('INSERT OR REPLACE INTO sync_leases (name, owner, acquired_at, expires_at) '
+                             'VALUES (?, ?, ?, ?)', (self.name, self.owner, now, now + self.lease_seconds))
+        except sqlite3.OperationalError as e:  # database busy: somebody else is writing
+            logger.debug(f"Could not claim sync lease: {e}")
+            return False
+        return True
+
+    def renew(self) -> bool:
+        """Extend our lease; False if it expired and was taken over."""
+        with self.memory.transaction() as conn:
+            cursor = conn.execute('UPDATE sync_leases SET expires_at = ? WHERE name = ? AND owner = ?',
+                                  (time.time() + self.lease_seconds, self.name, self.owner))
+            return cursor.rowcount == 1
+
+    def release(self, result: Optional[Dict[str, Any]] = None):
+        """Drop our lease, publishing ``result`` to waiting callers in the same transaction."""
+        with self.memory.transaction() as conn:
+            if result is not None:
+                set_meta(conn, self.result_key, json.dumps(result))
+            conn.execute('DELETE FROM sync_leases WHERE name = ? AND owner = ?', (self.name, self.owner))
+
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        """Return the most recently published result, if any."""
+        with self.memory._get_connection() as conn:
+            value = get_meta(conn, self.result_key)
+        return json.loads(value) if value else None
+
+    def _reusable_result(self, arrived: float) -> Optional[Dict[str, Any]]:
+        """Return the published result if a caller that arrived at ``arrived`` may reuse it."""
+        result = self.last_result()
+        if result is None:
+            return None
+        # Runs that started after we arrived are shared whatever their
+        # outcome; earlier ones only if recent enough and successful
+        if result['started_at'] >= arrived or (
+                self.max_age > 0 and result.get('success')
+                and arrived - result['finished_at'] <= self.max_age):
+            logger.info(f"Reusing sync result of {result['owner']} "
+                        f"finished {max(0.0, time.time() - result['finished_at']):.1f}s ago")
+            return result
+        return None
+
+    def _heartbeat(self, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.renew():
+                    logger.warning("Sync lease expired while syncing; another run may have started")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Could not renew sync lease: {e}")
+
+    def _run_holding(self, func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), daemon=True)
+        heartbeat.start()
+        result = None
+        started_at = time.time()
+        try:
+            result = dict(func())
+            result.update(owner=self.owner, started_at=started_at, finished_at=time.time())
+            return result
+        finally:
+            stop.set()
+            heartbeat.join()
+            # A failed or unshared run publishes nothing; waiters take over
+            self.release(result if self.share else None)
+
+    def run(self, func: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Run ``func`` under the lease, or reuse the result of a concurrent or recent run.
+
+        ``func`` returns a JSON-serialisable dict with a ``success`` key.
+
+        Returns:
+            (result, shared): ``shared`` is True when the result came from
+            another run
+
+        Raises:
+            TimeoutError: another holder kept the lease for ``wait_timeout``
+        """
+        arrived = time.time()
+        deadline = arrived + self.wait_timeout
+        waiting = False
+        while True:
+            result = self._reusable_result(arrived) if self.share else None
+            if result is not None:
+                return result, True
+            if self.holder() is None and self.try_acquire():
+                # A run may have finished between the check above and taking the lease
+                result = self._reusable_result(arrived) if self.share else None
+                if result is not None:
+                    self.release()
+                    return result, True
+                return self._run_holding(func), False
+            if time.time() > deadline:
+                raise TimeoutError(f"Sync lease {self.name!r} held by another process "
+                                   f"for more than {self.wait_timeout:.0f}s")
+            if not waiting:
+                holder = self.holder()
+                logger.info(f"Waiting for sync in progress by {holder['owner'] if holder else 'another process'}")
+                waiting = True
+            time.sleep(self.poll_interval)
@@ -29,10 +29,15 @@ ONBOARDING & USAGE
 import os
 import hashlib
 import logging
+import queue
+import re
+import stat
+import threading
+import time
+import zlib
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime
-import json
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Any
+from datetime import datetime, timedelta
 import sys
 
 # Add the tools directory to the path so we can import our modules
@@ -40,84 +45,366 @@ sys.path.append(str(Path(__file__).parent))
 
 # Import our SQLite memory module
 from sqlite_memory import SQLiteMemory
+from sync_state import SyncStateStore
+from sync_lease import DEFAULT_MAX_AGE, SESSION_MAX_AGE, SingleFlight
+from markdown_chunks import split_chunks
+from frontmatter import Frontmatter, parse_frontmatter, read_frontmatter
 
 
 
-# Configure logging
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(exist_ok=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_DIR / 'memory_sync.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+
+def configure_logging():
+    """Log to logs/memory_sync.log and stderr, unless logging is already configured."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_DIR / 'memory_sync.log', delay=True),
+            logging.StreamHandler()
+        ]
+    )
+
 # Constants
 MEMORY_BANK_DIR = Path("memory-bank")
 CONFLICT_DIR = MEMORY_BANK_DIR / "_conflicts"
-SYNC_STATE_FILE = LOG_DIR / ".sync_state.json"
+SYNC_STATE_FILE = LOG_DIR / ".sync_state.json"  # legacy; migrated into the database
+# A git merge conflict left in a file: <<<<<<< ours, =======, >>>>>>> theirs
+CONFLICT_MARKERS = re.compile(rb'^<{7}(?:[ \r]|$).*?^={7}\r?$.*?^>{7}(?:[ \r]|$)', re.M | re.S)
 
 # Ensure directories exist
 for directory in [MEMORY_BANK_DIR, CONFLICT_DIR, LOG_DIR]:
     directory.mkdir(exist_ok=True)
 
-# Ensure directories exist
-for directory in [MEMORY_BANK_DIR, CONFLICT_DIR, LOG_DIR]:
-    directory.mkdir(exist_ok=True)
+# Files modified this close to the moment their stat is recorded may change
+# again within the same mtime tick, so their stat is not trusted next run.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class _Crc32Hasher:
+    """hashlib-style wrapper around zlib.crc32 (fast, non-cryptographic)."""
+
+    def __init__(self):
+        self._value = 0
+
+    def update(self, data: bytes):
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self) -> str:
+        return f"{self._value:08x}"
+
+
+# Pluggable content hashes. The name is stored with each sync state entry,
+# so switching algorithms forces a one-time re-hash instead of false changes.
+HASH_ALGORITHMS: Dict[str, Callable[[], Any]] = {
+    'sha256': hashlib.sha256,
+    'blake2b': lambda: hashlib.blake2b(digest_size=20),
+    'crc32': _Crc32Hasher,
+}
+
+try:
+    import xxhash
+    HASH_ALGORITHMS['xxh64'] = xxhash.xxh64
+except ImportError:  # optional dependency
+    pass
+
+DEFAULT_HASH_ALGORITHM = 'sha256'
+
+# Entity columns covered by the entity hash recorded at sync time
+ENTITY_HASH_COLUMNS = ('type', 'name', 'content', 'metadata')
+
+
+def entity_digest(row, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """Hash the stored columns of an entity row (see ENTITY_HASH_COLUMNS).
+
+    The sync records this next to the file hash, so a later verification
+    (check_memory_sync.py --verify) can tell that the database row changed
+    while the file did not.
+    """
+    hasher = HASH_ALGORITHMS[algorithm]()
+    for column in ENTITY_HASH_COLUMNS:
+        hasher.update((row[column] or '').encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+# Append-only logs synced entry by entry (see markdown_chunks.py)
+CHUNKED_FILES = frozenset({'actionLog.md', 'decisionLog.md', 'votes.md', 'milestones.md'})
+
+# Pipeline defaults: read/hash/parse threads and files per write transaction
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_BATCH_SIZE = 200
+# A partial batch is written once no result has arrived for this long
+FLUSH_INTERVAL = 0.05
+_IDLE = object()
+
+# Entities of deleted files are tombstoned and only purged after this long
+TOMBSTONE_GRACE_SECONDS = 7 * 24 * 3600
+
+
+class _PreparedFile(NamedTuple):
+    """Result of the read/hash/parse stage for one file."""
+    path: Path
+    rel_path: str
+    stat: os.stat_result
+    hash: Optional[str]
+    entity: Optional[dict]  # None when the content is unchanged
+    error: Optional[str]
+    new: bool = False  # no sync state yet: may be a rename or a revived file
+    renamed_from: Optional[str] = None  # path whose entity this file takes over
+    revived: bool = False  # renamed_from is a tombstone rather than a live path
+
 
 class MemorySynchronizer:
     """Handles synchronization between file-based and SQLite memory systems."""
     
-    def __init__(self):
-        self.sync_state = self._load_sync_state()
+    def __init__(self, memory_bank_dir: Path = None, state_file: Path = None,
+                 db_path: str = None, hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+                 chunk_files: Iterable[str] = CHUNKED_FILES):
+        """
+        Args:
+            memory_bank_dir: Memory bank root (default: memory-bank/)
+            state_file: Legacy JSON sync state, migrated into the database
+                        on first use (default: logs/.sync_state.json)
+            db_path: SQLite database path (default: SQLiteMemory's default)
+            hash_algorithm: Content hash, one of HASH_ALGORITHMS
+            chunk_files: File names synced entry by entry instead of as a
+                         single entity (empty to disable chunking)
+        """
+        if hash_algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unknown hash algorithm {hash_algorithm!r}; "
+                             f"choose from {sorted(HASH_ALGORITHMS)}")
+        self.memory_bank_dir = Path(memory_bank_dir) if memory_bank_dir else MEMORY_BANK_DIR
+        self.conflict_dir = self.memory_bank_dir / CONFLICT_DIR.name
+        self.state_file = Path(state_file) if state_file else SYNC_STATE_FILE
+        self.db_path = db_path
+        self.hash_algorithm = hash_algorithm
+        self.chunk_files = frozenset(chunk_files)
+        self.memory = SQLiteMemory(db_path)
+        self.sync_state = SyncStateStore(self.memory, legacy_file=self.state_file)
+        # Per-run caches so each file is stat'ed and hashed at most once
+        self._stat_cache: Dict[str, os.stat_result] = {}
+        self._hash_cache: Dict[str, str] = {}
+        self.hashed_count = 0
+        self._scan_errors = 0
+    
+    def _save_sync_state(self):
+        """Write buffered sync state changes (only rows that changed)."""
+        self.sync_state.flush()
     
-    def _load_sync_state(self) -> Dict:
-        """Load the synchronization state from disk."""
-        if SYNC_STATE_FILE.exists():
+    def _rel_path(self, file_path: Path) -> str:
+        return str(Path(file_path).relative_to(self.memory_bank_dir))
+    
+    def _stat(self, file_path: Path) -> os.stat_result:
+        key = str(file_path)
+        st = self._stat_cache.get(key)
+        if st is None:
+            st = os.stat(file_path)
+            self._stat_cache[key] = st
+        return st
+    
+    def reset_run_caches(self):
+        """Forget per-run stat and hash results (call between sync runs).
+
+        Cached sync state is dropped too: a long-lived synchronizer (the
+        --watch daemon) must see rows written by other sync runs.
+        """
+        self.sync_state.invalidate()
+        self._stat_cache.clear()
+        self._hash_cache.clear()
+        self.hashed_count = 0
+        self._scan_errors = 0
+    
+    def _scan(self) -> Iterator[Tuple[str, str, os.stat_result]]:
+        """Walk the memory bank with os.scandir, skipping _conflicts/.
+        
+        Yields (absolute path, path relative to the memory bank, stat) as
+        plain strings; building Path objects for every file is what
+        dominates a no-op sync on large trees.
+        """
+        stack = [(str(self.memory_bank_dir), '')]
+        conflict_dir = str(self.conflict_dir)
+        while stack:
+            directory, prefix = stack.pop()
             try:
-                with open(SYNC_STATE_FILE, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning("Corrupted sync state file, starting fresh")
-        return {}
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path != conflict_dir:
+                                stack.append((entry.path, prefix + entry.name + os.sep))
+                        elif entry.name.endswith('.md') and entry.is_file():
+                            yield entry.path, prefix + entry.name, entry.stat()
+            except OSError as e:
+                # Files below here would look deleted; see _find_missing
+                self._scan_errors += 1
+                logger.warning(f"Cannot scan {directory}: {e}")
     
-    def _save_sync_state(self):
-        """Save the current synchronization state to disk."""
-        with open(SYNC_STATE_FILE, 'w') as f:
-            json.dump(self.sync_state, f, indent=2)
+    def _stat_paths(self, rel_paths) -> Iterator[Tuple[str, str, os.stat_result]]:
+        """Like _scan, but only for the given relative paths (missing ones skipped)."""
+        conflict_prefix = CONFLICT_DIR.name + os.sep
+        for rel_path in sorted(set(rel_paths)):
+            if not rel_path.endswith('.md') or rel_path.startswith(conflict_prefix):
+                continue
+            path = os.path.join(str(self.memory_bank_dir), rel_path)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                yield path, rel_path, st
+    
+    def find_changed_paths(self) -> List[str]:
+        """Return relative paths that are new, deleted or whose stat no longer matches."""
+        self._scan_errors = 0
+        self.sync_state.load_all()
+        changed = []
+        seen = set()
+        for _, rel_path, st in self._scan():
+            seen.add(rel_path)
+            entry = self.sync_state.get(rel_path)
+            if entry is None or not self._stat_matches(entry, st):
+                changed.append(rel_path)
+        return changed + self._find_missing(None, seen)
+    
+    def iter_memory_files(self) -> Iterator[Path]:
+        """Yield all markdown files in the memory bank, skipping _conflicts/."""
+        for path, _, st in self._scan():
+            self._stat_cache[path] = st
+            yield Path(path)
+    
+    def hash_bytes(self, data: bytes, algorithm: Optional[str] = None) -> str:
+        """Hash in-memory content with the configured (or given) algorithm."""
+        hasher = HASH_ALGORITHMS[algorithm or self.hash_algorithm]()
+        hasher.update(data)
+        return hasher.hexdigest()
     
     def calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate a hash of the file's content."""
-        hasher = hashlib.sha256()
+        """Calculate a hash of the file's content (at most once per run)."""
+        key = str(file_path)
+        cached = self._hash_cache.get(key)
+        if cached is not None:
+            return cached
+        hasher = HASH_ALGORITHMS[self.hash_algorithm]()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            for chunk in iter(lambda: f.read(65536), b""):
                 hasher.update(chunk)
-        return hasher.hexdigest()
+        digest = hasher.hexdigest()
+        self._hash_cache[key] = digest
+        self.hashed_count += 1
+        return digest
+    
+    def _stat_matches(self, entry: Dict[str, Any], st: os.stat_result) -> bool:
+        return (entry.get('algo', DEFAULT_HASH_ALGORITHM) == self.hash_algorithm
+                and entry.get('mtime_ns') is not None
+                and entry.get('size') == st.st_size
+                and entry.get('mtime_ns') == st.st_mtime_ns
+                and entry.get('inode') == st.st_ino)
     
     def has_changes(self, file_path: Path) -> bool:
-        """Check if a file has changed since last sync."""
-        file_str = str(file_path.relative_to(MEMORY_BANK_DIR))
-        current_hash = self.calculate_file_hash(file_path)
+        """Check if a file has changed since last sync.
         
-        if file_str not in self.sync_state:
+        Files whose (size, mtime_ns, inode) match the recorded stat are
+        treated as unchanged without reading them.
+        """
+        file_str = self._rel_path(file_path)
+        entry = self.sync_state.get(file_str)
+        if entry is None:
             return True
-            
-        return self.sync_state[file_str].get('hash') != current_hash
+        
+        st = self._stat(file_path)
+        if self._stat_matches(entry, st):
+            return False
+        
+        if entry.get('algo', DEFAULT_HASH_ALGORITHM) != self.hash_algorithm:
+            return True
+        if entry.get('hash') != self.calculate_file_hash(file_path):
+            return True
+        
+        # Touched but identical: refresh the stat so the next run is fast
+        self.sync_state[file_str] = {**entry, **self._stat_fields(st)}
+        return False
     
-    def update_sync_state(self, file_path: Path, entity_id: str):
-        """Update the sync state after processing a file."""
-        file_str = str(file_path.relative_to(MEMORY_BANK_DIR))
-        self.sync_state[file_str] = {
-            'hash': self.calculate_file_hash(file_path),
+    def _stat_fields(self, st: os.stat_result) -> Dict[str, Any]:
+        racy = time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS
+        return {
+            'size': st.st_size,
+            'mtime_ns': None if racy else st.st_mtime_ns,
+            'inode': st.st_ino,
+        }
+    
+    def _state_entry(self, file_hash: str, st: os.stat_result, entity_id: str,
+                     entity_hash: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            'hash': file_hash,
+            'algo': self.hash_algorithm,
+            **self._stat_fields(st),
             'last_synced': datetime.utcnow().isoformat(),
-            'entity_id': entity_id
+            'entity_id': entity_id,
+            'entity_hash': entity_hash
         }
     
+    def entity_hash(self, conn, entity_id: str) -> Optional[str]:
+        """Hash the entity row as it is now on ``conn`` (None if it does not exist)."""
+        row = conn.execute(f"SELECT {', '.join(ENTITY_HASH_COLUMNS)} FROM entities WHERE id = ?",
+                           (entity_id,)).fetchone()
+        return entity_digest(row, self.hash_algorithm) if row else None
+    
+    def update_sync_state(self, file_path: Path, entity_id: str):
+        """Update the sync state after processing a file (written on the next flush)."""
+        self.sync_state[self._rel_path(file_path)] = self._state_entry(
+            self.calculate_file_hash(file_path), self._stat(file_path), entity_id)
+    
+    def is_chunked(self, rel_path: str, metadata: Optional[dict] = None) -> bool:
+        """Whether a file is synced entry by entry (frontmatter ``chunked:`` overrides)."""
+        if metadata and 'chunked' in metadata:
+            return bool(metadata['chunked'])
+        return Path(rel_path).name in self.chunk_files
+    
+    def _parse_entity(self, file_path: Path, rel_path: str, content: str) -> dict:
+        """Build MCP-style entity data from a file's text."""
+        header = parse_frontmatter(content)
+        return self._build_entity(file_path, rel_path, header, content[len(header.raw):])
+    
+    def _build_entity(self, file_path: Path, rel_path: str, header: Frontmatter, body: str) -> dict:
+        """Build MCP-style entity data from a file's frontmatter and body.
+        
+        For chunked files the observations hold only the preamble; the
+        entries are returned under ``chunks`` (see markdown_chunks.py).
+        """
+        if header.error:
+            logger.warning(f"Error parsing frontmatter in {file_path}: {header.error}")
+        metadata = header.metadata
+        
+        entity = {
+            'name': metadata.get('name', file_path.stem),
+            'entityType': metadata.get('type', 'document'),
+            'observations': [body.strip()],
+            'metadata': {
+                'source': 'file_based',
+                'file_path': rel_path,
+                'last_updated': datetime.utcnow().isoformat(),
+                **metadata.get('metadata', {})
+            }
+        }
+        if metadata.get('id'):
+            # Files exported from the database carry their entity id
+            entity['id'] = str(metadata['id'])
+        if self.is_chunked(rel_path, metadata):
+            new_hasher = HASH_ALGORITHMS[self.hash_algorithm]
+            preamble, chunks = split_chunks(body, new_hasher)
+            # The preamble hash covers the frontmatter too, since both
+            # end up in the file's own entity
+            hasher = new_hasher()
+            hasher.update(header.raw.encode('utf-8'))
+            hasher.update(preamble.encode('utf-8'))
+            entity['observations'] = [preamble.strip()]
+            entity['chunks'] = chunks
+            entity['preamble_hash'] = hasher.hexdigest()
+        return entity
+    
     def process_file(self, file_path: Path) -> Optional[dict]:
         """Process a single memory bank file and return parsed entity data."""
         if not self.has_changes(file_path):
@@ -129,120 +416,579 @@ class MemorySynchronizer:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                
-            # Parse metadata from frontmatter if present
-            metadata = {}
-            if content.startswith('---'):
-                try:
-                    _, frontmatter, content = content.split('---', 2)
-                    import yaml
-                    metadata = yaml.safe_load(frontmatter) or {}
-                except Exception as e:
-                    logger.warning(f"Error parsing frontmatter in {file_path}: {e}")
+            if CONFLICT_MARKERS.search(content.encode('utf-8')):
+                self._quarantine_conflict(Path(file_path), self._rel_path(file_path))
+                return None
+            return self._parse_entity(file_path, self._rel_path(file_path), content)
             
-            # Create entity data
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}", exc_info=True)
+            return None
+    
+    def _quarantine_conflict(self, file_path: Path, rel_path: str) -> Path:
+        """Move a file with merge conflict markers into _conflicts/ instead of syncing it.
+
+        Its entity keeps the last synced content; moving the resolved file
+        back revives it (see sync_to_sqlite).
+        """
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        target = self.conflict_dir / Path(rel_path).with_suffix(f'.merge-{stamp}.md')
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(file_path, target)
+        logger.warning(f"Merge conflict markers in {rel_path}; moved to {target} until resolved")
+        return target
+    
+    def _prepare_file(self, path: str, rel_path: str, st: os.stat_result,
+                      previous_hash: Optional[str], new: bool = False) -> _PreparedFile:
+        """Pipeline worker stage: read, hash and parse one file.
+        
+        The frontmatter is read first and the body is streamed into the
+        hasher in blocks, so a touched but unchanged file is never held in
+        memory. Only a changed body is read whole (from the page cache, by
+        seeking back): its text is stored in the database and split into
+        chunks, both of which need it as one string. If the file changes
+        between the two reads, its new mtime makes the next sync hash it
+        again.
+        Runs on worker threads, so it must not touch the sync state.
+        """
+        file_path = Path(path)
+        try:
+            with open(path, 'rb') as f:
+                header = read_frontmatter(f)
+                body_start = f.tell()
+                hasher = HASH_ALGORITHMS[self.hash_algorithm]()
+                hasher.update(header.raw.encode('utf-8'))
+                for block in iter(lambda: f.read(65536), b""):
+                    hasher.update(block)
+                digest = hasher.hexdigest()
+                if digest == previous_hash:
+                    # Touched but identical: only the stat needs refreshing
+                    return _PreparedFile(file_path, rel_path, st, digest, None, None)
+                f.seek(body_start)
+                body = f.read()
+            if CONFLICT_MARKERS.search(header.raw.encode('utf-8') + body):
+                target = self._quarantine_conflict(file_path, rel_path)
+                return _PreparedFile(file_path, rel_path, st, None, None,
+                                     f"merge conflict markers; moved to {target}")
+            entity = self._build_entity(file_path, rel_path, header, body.decode('utf-8'))
+            return _PreparedFile(file_path, rel_path, st, digest, entity, None, new)
+        except Exception as e:
+            return _PreparedFile(file_path, rel_path, st, None, None, str(e))
+    
+    def _upsert_entity(self, memory: SQLiteMemory, entity_id: Optional[str],
+                       entity: dict) -> Tuple[str, bool]:
+        """Update ``entity_id`` or create it (keeping the id); returns (id, created)."""
+        if entity_id:
+            # Try to update existing entity
+            if memory.update_entity(entity_id, entity):
+                return entity_id, False
+            # If entity not found, create a new one
+            logger.warning(f"Entity {entity_id} not found, creating new entity")
+            entity = {'id': entity_id, **entity}  # Keep the same ID
+        
+        return memory.create_entity(entity)['id'], True
+    
+    def _write_entity(self, memory: SQLiteMemory, rel_path: str, entity_data: dict) -> str:
+        """Create or update the entity for one file; returns the entity id."""
+        entity_id = self.sync_state.get(rel_path, {}).get('entity_id') or entity_data.get('id')
+        chunks = entity_data.get('chunks')
+        with memory._get_connection() as conn:
+            known_chunks = self.sync_state.chunk_rows(conn, rel_path)
+        preamble = known_chunks.pop('', None)
+        
+        if (chunks is not None and entity_id and preamble is not None
+                and preamble['hash'] == entity_data['preamble_hash']):
+            # Only entries changed; the file's own entity stays as it is
+            logger.debug(f"Preamble of {rel_path} unchanged")
+        else:
+            # Prepare entity data for the database
             entity = {
-                'name': file_path.stem,
-                'entityType': metadata.get('type', 'document'),
-                'observations': [content.strip()],
+                'type': entity_data.get('entityType', 'document'),
+                'name': entity_data.get('name', Path(rel_path).stem),
+                'content': '\n'.join(entity_data.get('observations', [])),
                 'metadata': {
                     'source': 'file_based',
-                    'file_path': str(file_path.relative_to(MEMORY_BANK_DIR)),
+                    'file_path': rel_path,
                     'last_updated': datetime.utcnow().isoformat(),
-                    **metadata.get('metadata', {})
+                    **entity_data.get('metadata', {})
                 }
             }
-            
-            return entity
-            
-        except Exception as e:
-            logger.error(f"Error processing {file_path}: {e}", exc_info=True)
-            return None
+            entity_id, created = self._upsert_entity(memory, entity_id, entity)
+            logger.debug(f"{'Created' if created else 'Updated'} entity {entity_id} from {rel_path}")
+        
+        if chunks is not None or preamble is not None or known_chunks:
+            self._write_chunks(memory, rel_path, entity_id, entity_data, known_chunks, preamble)
+        return entity_id
     
-    def sync_to_sqlite(self) -> bool:
-        """Synchronize all memory bank files with the SQLite database."""
-        logger.info("Starting memory synchronization with SQLite database")
+    def _write_chunks(self, memory: SQLiteMemory, rel_path: str, parent_id: str,
+                      entity_data: dict, known_chunks: Dict[str, Dict[str, Any]],
+                      preamble: Optional[Dict[str, Any]]):
+        """Write only the entries of a chunked file that changed.
         
-        # Initialize the memory system
-        memory = SQLiteMemory()
+        Each entry is a ``section`` entity linked to the file's entity by a
+        ``part_of`` relation; entries that disappeared are deleted. Files
+        that are no longer chunked lose all their entry entities.
+        """
+        chunks = entity_data.get('chunks') or []
+        rows: Dict[str, Dict[str, Any]] = {}
+        for position, chunk in enumerate(chunks):
+            known = known_chunks.pop(chunk.key, None)
+            child_id = known['entity_id'] if known else None
+            if known is None or known['hash'] != chunk.hash:
+                child_id, created = self._upsert_entity(memory, child_id, {
+                    'type': 'section',
+                    'name': f"{entity_data.get('name', Path(rel_path).stem)}: {chunk.title}",
+                    'content': chunk.text.strip(),
+                    'metadata': {
+                        'source': 'file_based',
+                        'file_path': rel_path,
+                        'chunk_key': chunk.key,
+                        'last_updated': datetime.utcnow().isoformat(),
+                    }
+                })
+                if created:
+                    memory.create_relation(child_id, parent_id, 'part_of')
+            elif known['position'] == position:
+                continue  # unchanged entry: no writes at all
+            rows[chunk.key] = {'hash': chunk.hash, 'position': position, 'entity_id': child_id}
         
-        # Process all markdown files in memory bank
-        memory_files = list(MEMORY_BANK_DIR.glob("**/*.md"))
-        memory_files = [f for f in memory_files if f.is_file() and f.parent != CONFLICT_DIR]
+        for known in known_chunks.values():
+            if known['entity_id']:
+                memory.delete_entity(known['entity_id'])
+        removed = list(known_chunks)
+        if 'chunks' in entity_data:
+            if preamble is None or preamble['hash'] != entity_data['preamble_hash'] \
+                    or preamble['entity_id'] != parent_id:
+                rows[''] = {'hash': entity_data['preamble_hash'], 'position': -1, 'entity_id': parent_id}
+        elif preamble is not None:
+            removed.append('')
         
-        success_count = 0
-        error_count = 0
+        with memory._get_connection() as conn:
+            self.sync_state.write_chunk_rows(conn, rel_path, rows, removed)
+        logger.debug(f"Wrote {len(rows)} chunk row(s) and removed {len(removed)} for {rel_path}")
+    
+    @staticmethod
+    def _last_change(conn) -> int:
+        return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM entity_changes').fetchone()[0]
+    
+    @staticmethod
+    def _mark_file_origin(conn, after_seq: int):
+        """Mark change-log rows written since ``after_seq`` as coming from files.
         
-        for file_path in memory_files:
-            entity_data = self.process_file(file_path)
-            if not entity_data:
+        The DB -> files export (export_memory.py) skips them.
+        """
+        conn.execute("UPDATE entity_changes SET origin = 'file' WHERE seq > ?", (after_seq,))
+    
+    def _adopt_entity(self, conn, item: _PreparedFile, entries: Dict[str, Optional[Dict[str, Any]]]):
+        """Move the sync state of a renamed or revived file to its new path."""
+        old_path = item.renamed_from
+        conn.execute('UPDATE sync_chunks SET path = ? WHERE path = ?', (item.rel_path, old_path))
+        if item.revived:
+            self.sync_state.drop_tombstones(conn, [old_path])
+            entity_id = item.entity.get('id')
+            conn.execute('UPDATE entities SET deleted_at = NULL, updated_at = ?, version = version + 1 '
+                         'WHERE id = ? OR id IN (SELECT entity_id FROM sync_chunks WHERE path = ?)',
+                         (datetime.utcnow().isoformat(), entity_id, item.rel_path))
+            logger.info(f"Revived entity {entity_id} for {item.rel_path}")
+        else:
+            entries[old_path] = None
+            logger.info(f"Detected rename {old_path} -> {item.rel_path}")
+    
+    def _apply_batch(self, memory: SQLiteMemory, batch: List[_PreparedFile], stats: Dict[str, int]):
+        """Writer stage: apply a batch of prepared files in one transaction.
+        
+        Each file gets its own savepoint so one bad file does not roll back
+        the rest of the batch. The sync state rows are written in the same
+        transaction as the entities they describe.
+        """
+        entries: Dict[str, Optional[Dict[str, Any]]] = {}
+        written = 0
+        try:
+            with memory.transaction() as conn:
+                first_change = self._last_change(conn)
+                for item in batch:
+                    try:
+                        with memory.transaction():
+                            if item.renamed_from:
+                                self._adopt_entity(conn, item, entries)
+                            entity_id = self._write_entity(memory, item.rel_path, item.entity)
+                            entity_hash = self.entity_hash(conn, entity_id)
+                        entries[item.rel_path] = self._state_entry(item.hash, item.stat, entity_id, entity_hash)
+                        written += 1
+                    except Exception as e:
+                        stats['errors'] += 1
+                        entries.pop(item.renamed_from, None)
+                        logger.error(f"Error syncing {item.path} to SQLite: {e}", exc_info=True)
+                # These writes came from files; the DB -> files export skips them
+                self._mark_file_origin(conn, first_change)
+                self.sync_state.write_rows(conn, entries)
+        except Exception as e:
+            stats['errors'] += written
+            logger.error(f"Error committing batch of {len(batch)} files: {e}", exc_info=True)
+            return
+        
+        self.sync_state.cache_rows(entries)
+        stats['synced'] += written
+        stats['renamed'] += sum(1 for item in batch if item.renamed_from and item.rel_path in entries)
+    
+    def _find_missing(self, paths: Optional[Iterable[str]], seen: set) -> List[str]:
+        """Return synced paths whose file is gone (set difference, no pairwise work).
+        
+        A full scan compares the sync state with the paths it saw; a partial
+        sync only checks the paths it was given. Nothing is reported missing
+        if part of the tree could not be scanned.
+        """
+        if self._scan_errors:
+            logger.warning("Skipping deletion detection: the memory bank could not be fully scanned")
+            return []
+        if paths is None:
+            return [path for path in self.sync_state if path not in seen]
+        root = str(self.memory_bank_dir)
+        return [path for path in sorted(set(paths))
+                if path in self.sync_state and not os.path.lexists(os.path.join(root, path))]
+    
+    def _resolve_new_file(self, item: _PreparedFile, missing_by_hash: Dict[str, List[str]]) -> _PreparedFile:
+        """Match a file without sync state to a vanished path or a tombstone.
+        
+        Files are matched by content hash through a dict (and an indexed
+        tombstone lookup), so large trees never compare files pairwise. A
+        match keeps the old entity id, and with it relations and history.
+        """
+        candidates = missing_by_hash.get(item.hash)
+        if candidates:
+            old_path = candidates.pop()
+            entity_id = self.sync_state[old_path].get('entity_id')
+            revived = False
+        else:
+            with self.memory._get_connection() as conn:
+                tombstone = self.sync_state.find_tombstone(conn, item.rel_path, item.hash, self.hash_algorithm)
+            if tombstone is None:
+                return item
+            old_path, entity_id, revived = tombstone['path'], tombstone['entity_id'], True
+        if entity_id and not item.entity.get('id'):
+            item.entity['id'] = entity_id
+        return item._replace(renamed_from=old_path, revived=revived)
+    
+    def _tombstone(self, paths: List[str], batch_size: int, stats: Dict[str, int]):
+        """Tombstone the entities of deleted files, ``batch_size`` per transaction."""
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start:start + batch_size]
+            entries = {path: None for path in chunk}
+            deleted_at = datetime.utcnow().isoformat()
+            try:
+                with self.memory.transaction() as conn:
+                    first_change = self._last_change(conn)
+                    for path in chunk:
+                        entry = self.sync_state[path]
+                        self.sync_state.write_tombstone(conn, path, entry, deleted_at)
+                        conn.execute('UPDATE entities SET deleted_at = ?, updated_at = ?, version = version + 1 '
+                                     'WHERE id = ? OR id IN (SELECT entity_id FROM sync_chunks WHERE path = ?)',
+                                     (deleted_at, deleted_at, entry.get('entity_id'), path))
+                    self._mark_file_origin(conn, first_change)
+                    self.sync_state.write_rows(conn, entries)
+            except Exception as e:
+                stats['errors'] += len(chunk)
+                logger.error(f"Error tombstoning {len(chunk)} deleted files: {e}", exc_info=True)
                 continue
-                
+            self.sync_state.cache_rows(entries)
+            stats['deleted'] += len(chunk)
+            logger.info(f"Tombstoned {len(chunk)} deleted file(s)")
+    
+    def purge_tombstones(self, grace_seconds: float = TOMBSTONE_GRACE_SECONDS,
+                         batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Permanently delete entities whose file was deleted over ``grace_seconds`` ago.
+        
+        Works in batches of ``batch_size`` tombstones per transaction so a large
+        purge never holds the write lock for long. Returns the number purged.
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=grace_seconds)).isoformat()
+        purged = 0
+        while True:
+            with self.memory.transaction() as conn:
+                tombstones = self.sync_state.expired_tombstones(conn, cutoff, max(1, batch_size))
+                if not tombstones:
+                    break
+                first_change = self._last_change(conn)
+                for tombstone in tombstones:
+                    entity_ids = {row['entity_id'] for row in
+                                  self.sync_state.chunk_rows(conn, tombstone['path']).values()}
+                    entity_ids.add(tombstone['entity_id'])
+                    for entity_id in entity_ids - {None}:
+                        self.memory.delete_entity(entity_id)
+                    conn.execute('DELETE FROM sync_chunks WHERE path = ?', (tombstone['path'],))
+                self.sync_state.drop_tombstones(conn, [t['path'] for t in tombstones])
+                self._mark_file_origin(conn, first_change)
+            purged += len(tombstones)
+        if purged:
+            logger.info(f"Purged {purged} tombstoned entities older than {cutoff}")
+        return purged
+    
+    def sync_to_sqlite(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE,
+                       progress: Optional[Callable[[Dict[str, int]], None]] = None,
+                       paths: Optional[Iterable[str]] = None) -> bool:
+        """Synchronize all memory bank files with the SQLite database.
+        
+        Runs as a staged pipeline connected by bounded queues:
+        scan (stat fast path) -> worker threads (read, hash, parse) ->
+        single writer (batched transactions, then sync state).
+        
+        Once the scan is complete, synced paths that no longer exist are
+        known. New files whose hash matches one of them (or a tombstone) are
+        treated as renames and keep their entity; the remaining paths are
+        tombstoned (see purge_tombstones).
+        
+        Args:
+            workers: Number of read/hash/parse threads
+            batch_size: Maximum files written per transaction
+            progress: Optional callback receiving counters after each batch
+            paths: Only sync these paths (relative to the memory bank)
+                   instead of scanning the whole tree
+            
+        Returns:
+            True if every changed file was synced without errors
+        """
+        logger.info("Starting memory synchronization with SQLite database")
+        
+        self.reset_run_caches()
+        workers = max(1, workers)
+        batch_size = max(1, batch_size)
+        stats = {'scanned': 0, 'changed': 0, 'unchanged': 0, 'synced': 0,
+                 'renamed': 0, 'deleted': 0, 'errors': 0}
+        work_queue: queue.Queue = queue.Queue(maxsize=workers * 4)
+        result_queue: queue.Queue = queue.Queue(maxsize=batch_size * 2)
+        stop = threading.Event()
+        scan_done = threading.Event()
+        scan_complete = False
+        seen: set = set()
+        if paths is None:
+            self.sync_state.load_all()  # one query instead of one per file
+        
+        def scan_stage():
+            nonlocal scan_complete
             try:
-                file_str = str(file_path.relative_to(MEMORY_BANK_DIR))
-                entity_id = self.sync_state.get(file_str, {}).get('entity_id')
-                
-                # Prepare entity data for the database
-                entity = {
-                    'type': entity_data.get('entityType', 'document'),
-                    'name': entity_data.get('name', file_path.stem),
-                    'content': '\n'.join(entity_data.get('observations', [])),
-                    'metadata': {
-                        'source': 'file_based',
-                        'file_path': file_str,
-                        'last_updated': datetime.utcnow().isoformat(),
-                        **entity_data.get('metadata', {})
-                    }
-                }
-                
-                # Create or update entity in the database
-                if entity_id:
-                    # Try to update existing entity
-                    existing_entity = memory.get_entity(entity_id)
-                    if existing_entity:
-                        # Update the existing entity
-                        updated_entity = memory.update_entity(entity_id, entity)
-                        logger.info(f"Updated entity {entity_id} from {file_path}")
-                        success_count += 1
-                    else:
-                        # If entity not found, create a new one
-                        logger.warning(f"Entity {entity_id} not found, creating new entity")
-                        created_entity = memory.create_entity({
-                            'id': entity_id,  # Keep the same ID
-                            **entity
-                        })
-                        entity_id = created_entity['id']
-                        logger.info(f"Created new entity {entity_id} from {file_path}")
-                        success_count += 1
+                source = self._scan() if paths is None else self._stat_paths(paths)
+                for path, rel_path, st in source:
+                    if stop.is_set():
+                        break
+                    stats['scanned'] += 1
+                    seen.add(rel_path)
+                    entry = self.sync_state.get(rel_path)
+                    if entry is not None and self._stat_matches(entry, st):
+                        continue  # stat fast path: unchanged, never opened
+                    previous_hash = None
+                    if entry is not None and entry.get('algo', DEFAULT_HASH_ALGORITHM) == self.hash_algorithm:
+                        previous_hash = entry.get('hash')
+                    stats['changed'] += 1
+                    work_queue.put((path, rel_path, st, previous_hash, entry is None))
                 else:
-                    # Create new entity
-                    created_entity = memory.create_entity(entity)
-                    entity_id = created_entity['id']
-                    logger.info(f"Created new entity {entity_id} from {file_path}")
-                    success_count += 1
-                
-                # Update sync state
-                self.update_sync_state(file_path, entity_id)
+                    scan_complete = True
+            finally:
+                scan_done.set()
+                for _ in range(workers):
+                    work_queue.put(None)
+        
+        def worker_stage():
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    result_queue.put(None)
+                    return
+                if not stop.is_set():
+                    result_queue.put(self._prepare_file(*item))
+        
+        threads = [threading.Thread(target=scan_stage, name='sync-scan', daemon=True)]
+        threads += [threading.Thread(target=worker_stage, name=f'sync-worker-{i}', daemon=True)
+                    for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        
+        batch: List[_PreparedFile] = []
+        held: List[_PreparedFile] = []  # new files waiting for the scan to finish
+        missing: Optional[List[str]] = None
+        missing_by_hash: Dict[str, List[str]] = {}
+        match_new_files = False
+        
+        def release_held():
+            """Once the scan is done: find vanished paths and match new files to them."""
+            nonlocal missing, match_new_files
+            missing = self._find_missing(paths, seen) if scan_complete else []
+            for path in missing:
+                missing_by_hash.setdefault(self.sync_state[path]['hash'], []).append(path)
+            with self.memory._get_connection() as conn:
+                has_tombstones = conn.execute('SELECT EXISTS (SELECT 1 FROM sync_tombstones)').fetchone()[0]
+            match_new_files = bool(missing_by_hash) or bool(has_tombstones)
+            batch.extend(self._resolve_new_file(item, missing_by_hash) if match_new_files else item
+                         for item in held)
+            held.clear()
+        
+        def flush(items: List[_PreparedFile]):
+            for start in range(0, len(items), batch_size):
+                self._apply_batch(self.memory, items[start:start + batch_size], stats)
+                logger.info(f"Synced {stats['synced']}/{stats['changed']} changed files "
+                            f"({stats['scanned']} scanned)")
+                if progress:
+                    progress(dict(stats))
+        
+        finished_workers = 0
+        try:
+            while finished_workers < workers:
+                if missing is None and scan_done.is_set():
+                    release_held()
+                try:
+                    item = result_queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    item = _IDLE
+                if item is _IDLE:
+                    pass
+                elif item is None:
+                    finished_workers += 1
+                elif item.error:
+                    stats['errors'] += 1
+                    logger.error(f"Error processing {item.path}: {item.error}")
+                elif item.entity is None:
+                    stats['unchanged'] += 1
+                    entry = self.sync_state[item.rel_path]
+                    self.sync_state[item.rel_path] = {**entry, **self._stat_fields(item.stat)}
+                elif item.new and missing is None:
+                    held.append(item)
+                elif item.new and match_new_files:
+                    batch.append(self._resolve_new_file(item, missing_by_hash))
+                else:
+                    batch.append(item)
                 
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error syncing {file_path} to SQLite: {e}", exc_info=True)
+                # Flush when full, when the workers have gone quiet, or at the end
+                if batch and (len(batch) >= batch_size or item is _IDLE
+                              or finished_workers == workers):
+                    flush(batch)
+                    batch = []
+            if missing is None:
+                release_held()  # the scan finished while the last results arrived
+            flush(batch)
+        finally:
+            stop.set()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    result_queue.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+        
+        self.hashed_count += stats['changed'] - stats['errors']
+        
+        # Paths that vanished and were not taken over by a renamed file
+        unclaimed = {path for group in missing_by_hash.values() for path in group}
+        if unclaimed:
+            self._tombstone([path for path in missing if path in unclaimed], batch_size, stats)
+        if paths is None and not stats['errors']:
+            self.purge_tombstones(batch_size=batch_size)
         
         # Save the updated sync state
         self._save_sync_state()
+        if progress:
+            progress(dict(stats))
         
         # Log summary
-        logger.info(f"Memory synchronization complete: {success_count} files synced, {error_count} errors")
-        return error_count == 0
+        logger.info(f"Memory synchronization complete: {stats['synced']} files synced "
+                    f"({stats['renamed']} renamed), {stats['deleted']} deleted, "
+                    f"{stats['errors']} errors, {stats['scanned']} files scanned")
+        return stats['errors'] == 0
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point for the sync script."""
+    import argparse
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Synchronize memory-bank files into the SQLite memory database.")
+    parser.add_argument('--hash', dest='hash_algorithm', default=DEFAULT_HASH_ALGORITHM,
+                        choices=sorted(HASH_ALGORITHMS),
+                        help='Content hash algorithm (default: sha256; crc32/xxh64 are faster, non-cryptographic)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Threads reading, hashing and parsing files (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Files written per database transaction (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--progress', action='store_true', help='Print progress to stderr')
+    parser.add_argument('--no-chunking', action='store_true',
+                        help='Sync actionLog/decisionLog/votes/milestones as whole files, not entry by entry')
+    parser.add_argument('--discovery', choices=['scan', 'git'], default='scan',
+                        help='Find changed files by walking the tree (default) or by asking git '
+                             'what changed since the last synced commit')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE,
+                        help='Reuse the result of a successful sync that finished at most this many seconds '
+                             f'ago instead of syncing again (default: {DEFAULT_MAX_AGE:g}, always sync; the '
+                             f'session protocol hooks pass {SESSION_MAX_AGE:g})')
+    parser.add_argument('--no-coordination', action='store_true',
+                        help='Sync even if another process is already syncing, instead of waiting for '
+                             'and reusing its result')
+    parser.add_argument('--export', action='store_true',
+                        help='After syncing, write database changes back into memory-bank/ (export_memory.py)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-sync touched files as they change')
+    parser.add_argument('--poll', action='store_true', help='With --watch: poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=2.0, help='With --poll: seconds between polls')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='With --watch: seconds of quiet before a burst of edits is synced')
+    args = parser.parse_args(argv)
+    chunk_files = () if args.no_chunking else CHUNKED_FILES
+    
+    if args.watch:
+        from sync_daemon import SyncDaemon, make_watcher
+        synchronizer = MemorySynchronizer(hash_algorithm=args.hash_algorithm, chunk_files=chunk_files)
+        watcher = make_watcher(synchronizer, force_polling=args.poll, interval=args.interval)
+        # Passes cover only touched files, so they wait for one-shot syncs but share no results
+        flight = None if args.no_coordination else SingleFlight(synchronizer.memory, share=False)
+        SyncDaemon(synchronizer, watcher, debounce=args.debounce, workers=args.workers, flight=flight).run()
+        return 0
+    
+    def report(stats: Dict[str, int]):
+        sys.stderr.write(f"\rscanned {stats['scanned']}  changed {stats['changed']}  "
+                         f"synced {stats['synced']}  errors {stats['errors']}")
+        sys.stderr.flush()
+    
     try:
         logger.info("Starting memory synchronization with SQLite database")
         logger.info(f"Memory bank directory: {MEMORY_BANK_DIR.absolute()}")
         
-        synchronizer = MemorySynchronizer()
-        success = synchronizer.sync_to_sqlite()
+        synchronizer = MemorySynchronizer(hash_algorithm=args.hash_algorithm, chunk_files=chunk_files)
+        
+        def run_sync() -> Dict[str, Any]:
+            paths = discovery = head = dirty = None
+            if args.discovery == 'git':
+                from git_discovery import GitChangeDiscovery
+                discovery = GitChangeDiscovery(synchronizer.memory_bank_dir, synchronizer.memory)
+                head = discovery.head()  # before listing, so later commits are seen next time
+                if head is None:
+                    logger.warning("Memory bank is not in a git work tree; using a full scan")
+                else:
+                    dirty = discovery.dirty_paths()
+                    paths = discovery.changed_paths()
+            reports: List[Dict[str, int]] = []
+            
+            def collect(stats: Dict[str, int]):
+                reports.append(stats)
+                if args.progress:
+                    report(stats)
+            
+            ok = synchronizer.sync_to_sqlite(workers=args.workers, batch_size=args.batch_size,
+                                             progress=collect, paths=paths)
+            if ok and head:
+                discovery.record(head, dirty)
+            return {'success': ok, 'stats': reports[-1] if reports else {}}
+        
+        if args.no_coordination:
+            success = run_sync()['success']
+        else:
+            # Agents starting together share one sync instead of racing
+            result, shared = SingleFlight(synchronizer.memory, max_age=args.max_age).run(run_sync)
+            success = result['success']
+            if shared:
+                logger.warning(f"Skipped sync: reusing the result of the sync by {result['owner']} that finished "
+                               f"{max(0.0, time.time() - result['finished_at']):.1f}s ago "
+                               f"({result['stats'].get('synced', 0)} files synced, "
+                               f"{result['stats'].get('errors', 0)} errors; --no-coordination to force a sync)")
+        if args.progress:
+            sys.stderr.write("\n")
+        if args.export:
+            from export_memory import MemoryExporter
+            export_stats = MemoryExporter(synchronizer).export()
+            success = success and not export_stats['errors'] and not export_stats['conflicts']
         
         if success:
             logger.info("Memory synchronization completed successfully")
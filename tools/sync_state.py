@@ -0,0 +1,249 @@
+"""
+Sync State Store
+================
+
+Per-file sync state (content hash, stat, entity id) kept in the
+``sync_state`` table of the memory database instead of a JSON file.
+
+Rows are written in the same transaction as the entity writes they
+describe, so a crash can never leave the database and the sync state
+disagreeing, and concurrent runs are serialised by SQLite. Only changed
+rows are written; unchanged files cost nothing.
+
+---
+ONBOARDING & USAGE
+---
+- Used by sync_memory.py and check_memory_sync.py; agents never need it.
+- Behaves like a dict keyed by path relative to memory-bank/:
+    state = SyncStateStore(SQLiteMemory())
+    entry = state.get('activeContext.md')  # {'hash', 'algo', 'size', ...} or None
+- ``entity_hash`` is the hash of the entity row as written by the sync
+  (see sync_memory.entity_digest); check_memory_sync.py --verify compares
+  it against the database to detect drift.
+- Migration: an existing logs/.sync_state.json is imported automatically on
+  first use and renamed to .sync_state.json.migrated.
+"""
+
+import json
+import logging
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from sqlite_memory import SQLiteMemory
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('hash', 'algo', 'size', 'mtime_ns', 'inode', 'entity_id', 'last_synced', 'entity_hash')
+_MISSING = object()
+
+_UPSERT_SQL = f'''
+    INSERT OR REPLACE INTO sync_state (path, {', '.join(FIELDS)})
+    VALUES (?, {', '.join('?' for _ in FIELDS)})
+'''
+
+
+def get_meta(conn, key: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a value from the ``sync_meta`` key/value table."""
+    row = conn.execute('SELECT value FROM sync_meta WHERE key = ?', (key,)).fetchone()
+    return row['value'] if row else default
+
+
+def set_meta(conn, key: str, value: str):
+    """Write a value to the ``sync_meta`` key/value table on ``conn``."""
+    conn.execute('INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)', (key, value))
+
+
+class SyncStateStore(MutableMapping):
+    """Dict-like view of the ``sync_state`` table with a write-back cache.
+
+    Single-path lookups query one indexed row; ``load_all`` fetches the whole
+    table in one query for full-tree scans. Assignments are buffered and
+    written by ``flush`` (or directly inside a caller's transaction with
+    ``write_rows``).
+    """
+
+    def __init__(self, memory: SQLiteMemory, legacy_file: Optional[Path] = None):
+        """
+        Args:
+            memory: Database holding the sync_state table
+            legacy_file: JSON sync state to migrate on first use, if present
+        """
+        self.memory = memory
+        self._rows: Dict[str, Any] = {}
+        self._complete = False
+        self._dirty: Set[str] = set()
+        self._deleted: Set[str] = set()
+        if legacy_file is not None and Path(legacy_file).exists():
+            self._migrate_legacy(Path(legacy_file))
+
+    def _migrate_legacy(self, legacy_file: Path):
+        """Import a legacy JSON state file; rows already in the database win."""
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Cannot migrate legacy sync state {legacy_file}: {e}")
+            return
+        rows = [
+            (path, entry.get('hash'), entry.get('algo', 'sha256'), entry.get('size'),
+             entry.get('mtime_ns'), entry.get('inode'), entry.get('entity_id'), entry.get('last_synced'), None)
+            for path, entry in legacy.items() if entry.get('hash')
+        ]
+        with self.memory.transaction() as conn:
+            conn.executemany(_UPSERT_SQL.replace('OR REPLACE', 'OR IGNORE'), rows)
+        legacy_file.replace(legacy_file.with_name(legacy_file.name + '.migrated'))
+        logger.info(f"Migrated {len(rows)} sync state entries from {legacy_file} into the database")
+
+    @staticmethod
+    def _row_to_entry(row) -> Dict[str, Any]:
+        return {field: row[field] for field in FIELDS}
+
+    def load_all(self) -> 'SyncStateStore':
+        """Fetch every row in one query (use before scanning the whole tree)."""
+        if not self._complete:
+            with self.memory._get_connection() as conn:
+                rows = conn.execute('SELECT * FROM sync_state').fetchall()
+            fetched = {row['path']: self._row_to_entry(row) for row in rows}
+            # Unflushed local changes take precedence over the database
+            for path in self._dirty:
+                fetched[path] = self._rows[path]
+            for path in self._deleted:
+                fetched.pop(path, None)
+            self._rows = fetched
+            self._complete = True
+        return self
+
+    def invalidate(self):
+        """Forget cached rows so later lookups see rows other processes wrote.
+
+        Unflushed assignments and deletions are kept.
+        """
+        self._rows = {path: self._rows[path] for path in self._dirty | self._deleted}
+        self._complete = False
+
+    def get(self, path: str, default=None):
+        entry = self._rows.get(path, _MISSING)
+        if entry is _MISSING:
+            if self._complete:
+                return default
+            with self.memory._get_connection() as conn:
+                row = conn.execute('SELECT * FROM sync_state WHERE path = ?', (path,)).fetchone()
+            entry = self._row_to_entry(row) if row else None
+            self._rows[path] = entry
+        return default if entry is None else entry
+
+    def __getitem__(self, path: str) -> Dict[str, Any]:
+        entry = self.get(path)
+        if entry is None:
+            raise KeyError(path)
+        return entry
+
+    def __contains__(self, path) -> bool:
+        return self.get(path) is not None
+
+    def __setitem__(self, path: str, entry: Dict[str, Any]):
+        self._rows[path] = entry
+        self._dirty.add(path)
+        self._deleted.discard(path)
+
+    def __delitem__(self, path: str):
+        if path not in self:
+            raise KeyError(path)
+        self._rows[path] = None
+        self._deleted.add(path)
+        self._dirty.discard(path)
+
+    def __iter__(self) -> Iterator[str]:
+        self.load_all()
+        return (path for path, entry in list(self._rows.items()) if entry is not None)
+
+    def __len__(self) -> int:
+        self.load_all()
+        return sum(1 for entry in self._rows.values() if entry is not None)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty or self._deleted)
+
+    def write_rows(self, conn, entries: Dict[str, Optional[Dict[str, Any]]]):
+        """Write rows on ``conn`` (inside the caller's transaction) without caching.
+
+        A ``None`` entry deletes the row. Call ``cache_rows`` with the same
+        entries once the transaction commits.
+        """
+        conn.executemany(_UPSERT_SQL, [
+            (path, *(entry.get(field) for field in FIELDS))
+            for path, entry in entries.items() if entry is not None
+        ])
+        conn.executemany('DELETE FROM sync_state WHERE path = ?',
+                         [(path,) for path, entry in entries.items() if entry is None])
+
+    def cache_rows(self, entries: Dict[str, Dict[str, Any]]):
+        """Record rows that were committed through ``write_rows``."""
+        self._rows.update(entries)
+
+    def path_for_entity(self, entity_id: str) -> Optional[str]:
+        """Return the file an entity was synced from or exported to, if any."""
+        for path in self._dirty:
+            if self._rows[path].get('entity_id') == entity_id:
+                return path
+        with self.memory._get_connection() as conn:
+            row = conn.execute('SELECT path FROM sync_state WHERE entity_id = ? LIMIT 1',
+                               (entity_id,)).fetchone()
+        if row is None or row['path'] in self._deleted:
+            return None
+        return row['path']
+
+    @staticmethod
+    def write_tombstone(conn, path: str, entry: Dict[str, Any], deleted_at: str):
+        """Record a deleted file's last sync state in ``sync_tombstones``."""
+        conn.execute('INSERT OR REPLACE INTO sync_tombstones (path, hash, algo, entity_id, deleted_at) '
+                     'VALUES (?, ?, ?, ?, ?)',
+                     (path, entry['hash'], entry.get('algo', 'sha256'), entry.get('entity_id'), deleted_at))
+
+    @staticmethod
+    def find_tombstone(conn, path: str, content_hash: str, algo: str) -> Optional[Dict[str, Any]]:
+        """Find the tombstone of the same path, else of a file with the same content."""
+        row = conn.execute('SELECT * FROM sync_tombstones WHERE path = ?', (path,)).fetchone()
+        if row is None:
+            row = conn.execute('SELECT * FROM sync_tombstones WHERE algo = ? AND hash = ? '
+                               'ORDER BY deleted_at DESC LIMIT 1', (algo, content_hash)).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def expired_tombstones(conn, before: str, limit: int):
+        """Return up to ``limit`` tombstones deleted before ``before``."""
+        return [dict(row) for row in conn.execute(
+            'SELECT * FROM sync_tombstones WHERE deleted_at < ? ORDER BY deleted_at LIMIT ?', (before, limit))]
+
+    @staticmethod
+    def drop_tombstones(conn, paths: Iterable[str]):
+        conn.executemany('DELETE FROM sync_tombstones WHERE path = ?', [(path,) for path in paths])
+
+    @staticmethod
+    def chunk_rows(conn, path: str) -> Dict[str, Dict[str, Any]]:
+        """Return the ``sync_chunks`` rows of one chunked file, keyed by chunk key."""
+        rows = conn.execute('SELECT chunk_key, hash, position, entity_id FROM sync_chunks '
+                            'WHERE path = ?', (path,)).fetchall()
+        return {row['chunk_key']: dict(row) for row in rows}
+
+    @staticmethod
+    def write_chunk_rows(conn, path: str, rows: Dict[str, Dict[str, Any]], removed: Iterable[str] = ()):
+        """Upsert and delete ``sync_chunks`` rows of one file on ``conn``."""
+        conn.executemany('INSERT OR REPLACE INTO sync_chunks (path, chunk_key, hash, position, entity_id) '
+                         'VALUES (?, ?, ?, ?, ?)',
+                         [(path, key, row['hash'], row['position'], row['entity_id'])
+                          for key, row in rows.items()])
+        conn.executemany('DELETE FROM sync_chunks WHERE path = ? AND chunk_key = ?',
+                         [(path, key) for key in removed])
+
+    def flush(self):
+        """Write buffered assignments and deletions in one transaction."""
+        if not self.dirty:
+            return
+        with self.memory.transaction() as conn:
+            self.write_rows(conn, {path: self._rows[path] for path in self._dirty})
+            conn.executemany('DELETE FROM sync_state WHERE path = ?', [(p,) for p in self._deleted])
+        self._dirty.clear()
+        self._deleted.clear()
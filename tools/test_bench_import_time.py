@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the import-time budget.
+
+- How to Run:
+    python -m unittest tools/test_bench_import_time.py
+"""
+
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from bench_import_time import IMPORT_BUDGET_MS, over_budget
+from sqlite_memory import SQLiteMemory
+
+
+class TestImportBudget(unittest.TestCase):
+    """Importing the memory tools must stay cheap and free of side effects."""
+
+    def test_import_opens_no_database(self):
+        probe = (
+            "import sqlite3, sys, logging\n"
+            f"sys.path[:0] = [{str(Path(__file__).parent)!r}, {str(Path(__file__).parent.parent)!r}]\n"
+            "def refuse(*args, **kwargs):\n"
+            "    raise AssertionError('database opened at import')\n"
+            "sqlite3.connect = refuse\n"
+            "import sqlite_memory, unified_memory, sync_memory, check_memory_sync, memory_cli\n"
+            "assert not logging.getLogger().handlers, 'logging configured at import'\n"
+            "assert 'yaml' not in sys.modules, 'yaml imported eagerly'\n"
+        )
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run([sys.executable, '-c', probe], cwd=cwd, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_schema_ddl_skipped_when_current(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "memory.db")
+            SQLiteMemory(db_path)
+            with patch.object(SQLiteMemory, '_create_schema') as create_schema:
+                SQLiteMemory(db_path)
+            create_schema.assert_not_called()
+            with SQLiteMemory(db_path)._get_connection() as conn:
+                conn.execute('PRAGMA user_version = 0')
+            with patch.object(SQLiteMemory, '_create_schema') as create_schema:
+                SQLiteMemory(db_path)
+            create_schema.assert_called_once()
+
+    def test_import_time_within_budget(self):
+        self.assertEqual(over_budget(IMPORT_BUDGET_MS, repeat=3), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
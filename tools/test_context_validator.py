@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled context schema validator.
+
+- How to Run:
+    python -m unittest tools/test_context_validator.py
+"""
+
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from context_validator import (
+    SCHEMA_PATH,
+    ContextValidationError,
+    SchemaCompileError,
+    compile_schema,
+)
+
+
+VALID_CONTEXT = {
+    'designDoc': 'Design',
+    'codeSnippet': 'print(1)',
+    'reviewStatus': 'pending',
+    'lastUpdatedBy': 'architect',
+    'timestamp': '2026-01-01T12:00:00Z',
+}
+
+
+class TestContextValidator(unittest.TestCase):
+    """Test cases for schema compilation and validation."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="context_validator_test_"))
+        self.cache_dir = self.test_dir / "cache"
+        self.validator = compile_schema(SCHEMA_PATH, self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_full_document(self):
+        """Valid documents pass; each kind of violation is reported."""
+        self.validator.validate(VALID_CONTEXT)
+
+        broken = dict(VALID_CONTEXT, reviewStatus='done', timestamp='yesterday', designDoc=3)
+        del broken['codeSnippet']
+        with self.assertRaises(ContextValidationError) as ctx:
+            self.validator.validate(broken)
+        errors = ' '.join(ctx.exception.errors)
+        for fragment in ('codeSnippet', 'reviewStatus', 'timestamp', 'designDoc'):
+            self.assertIn(fragment, errors)
+
+    def test_partial_update_checks_changed_keys_only(self):
+        """Partial updates skip the required check but still validate values."""
+        self.validator.validate_update({'reviewStatus': 'approved'})
+        with self.assertRaises(ContextValidationError):
+            self.validator.validate_update({'reviewStatus': 'maybe'})
+        with self.assertRaises(ContextValidationError):
+            self.validator.validate_update({}, removed=['designDoc'])
+
+    def test_cache_keyed_by_schema_hash(self):
+        """The compiled form is reused from disk and invalidated by edits."""
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+        again = compile_schema(SCHEMA_PATH, self.cache_dir)
+        self.assertEqual(again.schema_hash, self.validator.schema_hash)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+
+        schema = json.loads(SCHEMA_PATH.read_text())
+        schema['properties']['reviewStatus']['enum'].append('blocked')
+        edited = self.test_dir / "edited.schema.json"
+        edited.write_text(json.dumps(schema))
+        validator = compile_schema(edited, self.cache_dir)
+        validator.validate_update({'reviewStatus': 'blocked'})
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 2)
+
+    def test_enum_compares_json_values(self):
+        """Enum and const reject unhashable values and booleans posing as numbers."""
+        schema_file = self.test_dir / "enum.schema.json"
+        schema_file.write_text(json.dumps({'type': 'object', 'properties': {
+            'level': {'enum': [1, 'high']},
+            'shape': {'enum': [[1, 2], {'a': 1}]},
+            'flag': {'const': 0},
+        }}))
+        validator = compile_schema(schema_file, None)
+        validator.validate({'level': 1.0, 'shape': {'a': 1}, 'flag': 0})
+        for update in ({'level': [1]}, {'level': {'x': 1}}, {'level': True},
+                       {'shape': [1, True]}, {'flag': False}):
+            with self.subTest(update=update), self.assertRaises(ContextValidationError):
+                validator.validate_update(update)
+
+    def test_cache_keyed_by_generator(self):
+        """Compiled code from another version of the generator is not reused."""
+        with patch('context_validator._generator_hash', return_value='0' * 64):
+            compile_schema(SCHEMA_PATH, self.cache_dir)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 2)
+
+    def test_unsupported_keyword_rejected(self):
+        """Unknown keywords fail loudly instead of being skipped."""
+        schema_file = self.test_dir / "oneof.schema.json"
+        schema_file.write_text(json.dumps({'type': 'object', 'properties': {'x': {'oneOf': []}}}))
+        with self.assertRaises(SchemaCompileError):
+            compile_schema(schema_file, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for exporting database changes to memory-bank files.
+
+- How to Run:
+    python -m unittest tools/test_export_memory.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sync_memory import MemorySynchronizer
+from frontmatter import parse_frontmatter
+from export_memory import MemoryExporter
+
+
+class TestMemoryExport(unittest.TestCase):
+    """Test cases for the DB -> files exporter."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="memory_export_test_"))
+        self.memory_bank_dir = self.test_dir / "memory-bank"
+        (self.memory_bank_dir / "_conflicts").mkdir(parents=True)
+        self.test_file = self.memory_bank_dir / "test_file.md"
+        self.test_file.write_text("# Test File\n\nFrom disk.\n")
+        self.sync = MemorySynchronizer(memory_bank_dir=self.memory_bank_dir,
+                                       state_file=self.test_dir / ".sync_state.json",
+                                       db_path=str(self.test_dir / "test_memory.db"))
+        self.sync.sync_to_sqlite()
+        self.exporter = MemoryExporter(self.sync)
+        self.entity_id = self.sync.sync_state['test_file.md']['entity_id']
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_file_sync_not_exported_back(self):
+        """Writes made by the files -> DB sync are not rendered again."""
+        stats = self.exporter.export()
+        self.assertEqual(stats['exported'] + stats['conflicts'], 0)
+        self.assertEqual(self.test_file.read_text(), "# Test File\n\nFrom disk.\n")
+
+    def test_db_entity_round_trip(self):
+        """DB-native entities are exported once and map back to themselves."""
+        note = self.sync.memory.create_entity({'type': 'note', 'name': 'Agent note',
+                                               'content': 'Written by an agent',
+                                               'metadata': {'author': 'coder'}})
+        self.assertEqual(self.exporter.export()['exported'], 1)
+        exported = self.memory_bank_dir / "db" / "note" / f"{note['id']}.md"
+        self.assertIn('Written by an agent', exported.read_text())
+        self.assertEqual(self.exporter.export()['exported'], 0)  # cursor advanced
+
+        with self.sync.memory._get_connection() as conn:
+            count = conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+        reports = []
+        self.sync.sync_to_sqlite(progress=reports.append)
+        self.assertEqual(reports[-1]['synced'], 0)
+        exported.write_text(exported.read_text().replace('agent', 'editor'))
+        self.sync.sync_to_sqlite()
+        with self.sync.memory._get_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0], count)
+        entity = self.sync.memory.get_entity(note['id'])
+        self.assertEqual((entity['name'], entity['metadata']['author']), ('Agent note', 'coder'))
+        self.assertEqual(entity['content'], 'Written by an editor')
+
+        self.sync.memory.delete_entity(note['id'])
+        self.assertEqual(self.exporter.export()['deleted'], 1)
+        self.assertFalse(exported.exists())
+
+    def test_update_and_conflict(self):
+        """Agent updates are written to the file unless the file changed too."""
+        self.sync.memory.update_entity(self.entity_id, {'content': '# Test File\n\nFrom an agent.'})
+        self.assertEqual(self.exporter.export()['exported'], 1)
+        self.assertEqual(self.test_file.read_text(), "# Test File\n\nFrom an agent.\n")
+
+        self.test_file.write_text("# Test File\n\nEdited on disk.\n")
+        self.sync.memory.update_entity(self.entity_id, {'content': 'Agent again'})
+        self.assertEqual(self.exporter.export()['conflicts'], 1)
+        self.assertEqual(self.test_file.read_text(), "# Test File\n\nEdited on disk.\n")
+        conflicts = list((self.memory_bank_dir / "_conflicts").glob("*.md"))
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0].read_text(), "Agent again\n")
+
+    def test_export_keeps_unmodeled_frontmatter(self):
+        """Author keys, comments and surrounding blank lines survive a DB edit."""
+        owned = self.memory_bank_dir / "owned.md"
+        header = "---\n# reviewed weekly\nowner: alice\ntags: [auth, decision]\ndue: 2026-03-01\n---\n"
+        owned.write_text(header + "\n\nBody text.\n\n")
+        self.sync.sync_to_sqlite()
+        entity_id = self.sync.sync_state['owned.md']['entity_id']
+
+        self.sync.memory.update_entity(entity_id, {'content': 'New body.'})
+        self.assertEqual(self.exporter.export()['exported'], 1)
+        self.assertEqual(owned.read_text(), header + "\n\nNew body.\n\n")
+
+        self.sync.memory.update_entity(entity_id, {'type': 'decision'})
+        self.assertEqual(self.exporter.export()['exported'], 1)
+        metadata = parse_frontmatter(owned.read_text()).metadata
+        self.assertEqual((metadata['owner'], metadata['tags'], metadata['type']),
+                         ('alice', ['auth', 'decision'], 'decision'))
+        self.assertEqual(str(metadata['due']), '2026-03-01')
+        self.sync.sync_to_sqlite()
+        self.assertEqual(self.sync.memory.get_entity(entity_id)['type'], 'decision')
+
+    def test_export_unparsable_frontmatter_conflicts(self):
+        """A file whose header cannot be merged is left alone."""
+        broken = self.memory_bank_dir / "broken.md"
+        broken.write_text("---\nowner: [unclosed\n---\nBody\n")
+        self.sync.sync_to_sqlite()
+        entity_id = self.sync.sync_state['broken.md']['entity_id']
+        self.sync.memory.update_entity(entity_id, {'content': 'Changed'})
+        self.assertEqual(self.exporter.export()['conflicts'], 1)
+        self.assertEqual(broken.read_text(), "---\nowner: [unclosed\n---\nBody\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
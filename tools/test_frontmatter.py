@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the frontmatter reader.
+
+- How to Run:
+    python -m unittest tools/test_frontmatter.py
+"""
+
+import io
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from frontmatter import parse_frontmatter, read_frontmatter
+
+
+class TestFrontmatter(unittest.TestCase):
+    """Test cases for the frontmatter reader."""
+
+    TEXT = "---\ntype: note\nmetadata: {tags: [a]}\n---\n# Title\n\n---\n\nAfter a rule\n"
+
+    def test_parse_ignores_horizontal_rules(self):
+        header = parse_frontmatter(self.TEXT)
+        self.assertEqual(header.metadata, {'type': 'note', 'metadata': {'tags': ['a']}})
+        self.assertEqual(self.TEXT[len(header.raw):], "# Title\n\n---\n\nAfter a rule\n")
+        for text in ("# Title\n\n---\n", "---\nnot closed\n", "--- inline\n---\n"):
+            self.assertEqual(parse_frontmatter(text).raw, '', text)
+
+    def test_read_leaves_stream_at_body(self):
+        stream = io.BytesIO(self.TEXT.encode('utf-8'))
+        header = read_frontmatter(stream)
+        self.assertEqual(header, parse_frontmatter(self.TEXT))
+        self.assertEqual(stream.read(), b"# Title\n\n---\n\nAfter a rule\n")
+
+        stream = io.BytesIO(b"---\nnever closed\n")
+        self.assertEqual(read_frontmatter(stream).raw, '')
+        self.assertEqual(stream.tell(), 0)
+
+    def test_invalid_yaml_reported(self):
+        header = parse_frontmatter("---\n- a list\n---\nBody\n")
+        self.assertEqual((header.metadata, header.raw), ({}, "---\n- a list\n---\n"))
+        self.assertIn("mapping", header.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
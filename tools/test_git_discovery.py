@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for git-based change discovery.
+
+- How to Run:
+    python -m unittest tools/test_git_discovery.py
+"""
+
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sync_memory import MemorySynchronizer
+from git_discovery import GitChangeDiscovery
+from check_memory_sync import MemorySyncChecker
+
+
+@unittest.skipUnless(shutil.which('git'), "git is not installed")
+class TestGitDiscovery(unittest.TestCase):
+    """Test cases for git-based change discovery."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="git_discovery_test_"))
+        self.memory_bank_dir = self.test_dir / "memory-bank"
+        self.memory_bank_dir.mkdir()
+        for name in ("a.md", "b.md"):
+            (self.memory_bank_dir / name).write_text(f"# {name}\n")
+        self.git('init', '-q')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'initial')
+        self.sync = MemorySynchronizer(memory_bank_dir=self.memory_bank_dir,
+                                       state_file=self.test_dir / ".sync_state.json",
+                                       db_path=str(self.test_dir / "test_memory.db"))
+        self.discovery = GitChangeDiscovery(self.memory_bank_dir, self.sync.memory)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def git(self, *args):
+        subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                       cwd=self.test_dir, check=True, capture_output=True)
+
+    def test_changed_paths_since_synced_commit(self):
+        """Only committed, modified, deleted and untracked changes are reported."""
+        self.assertIsNone(self.discovery.changed_paths())  # nothing recorded: full scan
+        self.assertTrue(self.sync.sync_to_sqlite())
+        self.discovery.record(self.discovery.head())
+        self.assertEqual(self.discovery.changed_paths(), set())
+
+        (self.memory_bank_dir / "a.md").write_text("# a.md\n\nEdited\n")
+        self.git('commit', '-q', '-am', 'edit a')
+        (self.memory_bank_dir / "b.md").unlink()
+        (self.memory_bank_dir / "c.md").write_text("# c.md\n")
+        self.assertEqual(self.discovery.changed_paths(), {'a.md', 'b.md', 'c.md'})
+
+        checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.sync.db_path,
+                                    state_file=self.sync.state_file)
+        self.assertEqual(checker.check_sync_status(self.discovery.changed_paths()), 1)
+        self.assertEqual((checker.status['out_of_sync'], checker.status['never_synced']), (2, 1))
+
+        self.assertTrue(self.sync.sync_to_sqlite(paths=self.discovery.changed_paths()))
+        self.assertEqual(set(self.sync.sync_state), {'a.md', 'c.md'})
+
+    def test_paths_dirty_at_last_sync_are_rediscovered(self):
+        """A reverted edit and a deleted untracked file leave no diff against HEAD."""
+        (self.memory_bank_dir / "a.md").write_text("# a.md\n\nUncommitted\n")
+        (self.memory_bank_dir / "c.md").write_text("# c.md\n")
+        dirty = self.discovery.dirty_paths()
+        self.assertEqual(dirty, {'a.md', 'c.md'})
+        self.assertTrue(self.sync.sync_to_sqlite())
+        self.discovery.record(self.discovery.head(), dirty)
+
+        self.git('checkout', '--', 'memory-bank/a.md')
+        (self.memory_bank_dir / "c.md").unlink()
+        self.assertEqual(self.discovery.changed_paths(), {'a.md', 'c.md'})
+        self.assertTrue(self.sync.sync_to_sqlite(paths=self.discovery.changed_paths()))
+        self.assertEqual(set(self.sync.sync_state), {'a.md', 'b.md'})
+        self.discovery.record(self.discovery.head(), self.discovery.dirty_paths())
+        self.assertEqual(self.discovery.changed_paths(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
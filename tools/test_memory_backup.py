@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for online backups and verified restores.
+
+- How to Run:
+    python -m unittest tools/test_memory_backup.py
+"""
+
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_backup import BackupError, BackupManager, online_backup
+
+
+class TestMemoryBackup(unittest.TestCase):
+    """Test cases for online backups and verified restores."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="backup_test_"))
+        self.memory = SQLiteMemory(str(self.test_dir / "memory.db"))
+        self.manager = BackupManager(self.memory, str(self.test_dir / "backups"), keep=2, pages=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_snapshot_retention_and_restore(self):
+        entity = self.memory.create_entity({'type': 'note', 'name': 'n', 'content': 'before'})
+        first = self.manager.snapshot()
+        self.memory.update_entity(entity['id'], {'content': 'after'})
+        self.manager.snapshot()
+        self.manager.snapshot()
+        self.assertEqual(len(self.manager.snapshots()), 2)
+        self.assertFalse(first.exists())
+
+        newest = self.manager.snapshots()[-1]
+        self.memory.delete_entity(entity['id'])
+        self.manager.restore(str(newest))
+        self.assertEqual(self.memory.get_entity(entity['id'])['content'], 'after')
+        self.assertEqual(list(self.test_dir.glob("memory.db.*")), [])
+
+    def test_backup_finishes_under_concurrent_writes(self):
+        with self.memory.transaction():
+            for i in range(200):
+                self.memory.create_entity({'type': 'note', 'name': f'n{i}', 'content': 'x' * 500})
+        stop = threading.Event()
+
+        def write():
+            while not stop.is_set():
+                self.memory.create_entity({'type': 'note', 'name': 'w', 'content': 'y'})
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            online_backup(self.memory.db_path, str(self.test_dir / "copy.db"), pages=1, sleep=0.001)
+        finally:
+            stop.set()
+            writer.join()
+        self.assertGreaterEqual(len(SQLiteMemory(str(self.test_dir / "copy.db")).search_entities('n1', limit=500)), 1)
+
+    def test_corrupt_backup_is_refused(self):
+        entity = self.memory.create_entity({'type': 'note', 'name': 'n', 'content': 'kept'})
+        corrupt = self.test_dir / "corrupt.db"
+        corrupt.write_bytes(b'not a database' * 100)
+        with self.assertRaises(BackupError):
+            self.manager.restore(str(corrupt))
+        self.assertEqual(self.memory.get_entity(entity['id'])['content'], 'kept')
+
+
+if __name__ == "__main__":
+    unittest.main()
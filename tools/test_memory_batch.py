@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for batched memory operations.
+
+- How to Run:
+    python -m unittest tools/test_memory_batch.py
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_batch import BatchRunner
+from unified_memory import UnifiedMemory
+
+
+class TestMemoryBatch(unittest.TestCase):
+    """Test cases for memory_cli batch mode."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="batch_test_"))
+        self.memory = UnifiedMemory(memory_bank_dir=str(self.test_dir), reuse_connections=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_batch(self, commands, **kwargs):
+        out = io.StringIO()
+        lines = [c if isinstance(c, str) else json.dumps(c) for c in commands]
+        BatchRunner(self.memory, **kwargs).run(lines, out)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def count(self):
+        with self.memory.db._get_connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+
+    def commands(self):
+        return [
+            {'command': 'create', 'type': 'note', 'data': {'name': 'one'}},
+            {'command': 'create', 'type': 'note', 'data': {'name': 'two'}},
+            {'command': 'update', 'entity_id': 'missing', 'data': {'name': 'x'}},
+            'not json',
+            {'command': 'create', 'type': 'note', 'data': {'name': 'three'}},
+            {'command': 'search', 'query': 'o'},
+        ]
+
+    def test_stops_at_first_error(self):
+        results = self.run_batch(self.commands(), group_size=1)
+        self.assertEqual([r.get('ok') for r in results[:-1]], [True, True, False])
+        self.assertEqual(results[-1]['summary'], {'commands': 3, 'ok': 2, 'failed': 1, 'committed': 2})
+        self.assertEqual(self.count(), 2)
+
+    def test_continue_on_error(self):
+        results = self.run_batch(self.commands(), continue_on_error=True)
+        self.assertEqual([r['line'] for r in results[:-1]], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(results[-1]['summary']['failed'], 2)
+        self.assertEqual({e['name'] for e in results[5]['result']}, {'one', 'two'})
+        self.assertEqual(self.count(), 3)
+
+    def test_atomic_rolls_back_everything(self):
+        results = self.run_batch(self.commands(), atomic=True)
+        self.assertEqual(results[-1]['summary']['committed'], 0)
+        self.assertEqual(self.count(), 0)
+
+    def test_generated_ids_skip_ids_used_by_another_process(self):
+        first = self.memory.db.create_entity({'name': 'first'})
+        SQLiteMemory._last_id_ms = int(first['id'][4:]) - 1  # as in a fresh process
+        second = self.memory.db.create_entity({'name': 'second'})
+        self.assertGreater(second['id'], first['id'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the HTTP API.
+
+- How to Run:
+    python -m unittest tools/test_memory_http.py
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+
+try:
+    from fastapi.testclient import TestClient
+    from memory_http import MemoryService, create_app, iter_entities
+except ImportError:  # fastapi / httpx not installed
+    TestClient = None
+
+
+@unittest.skipUnless(TestClient, "fastapi and httpx are not installed")
+class TestMemoryHttp(unittest.TestCase):
+    """Test cases for the HTTP API."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="http_test_"))
+        self.db_path = str(self.test_dir / "memory.db")
+        self.client = TestClient(create_app(self.db_path))
+
+    def tearDown(self):
+        self.client.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_conditional_get(self):
+        entity = self.client.post('/entities', json={'type': 'note', 'name': 'n'}).json()
+        url = f"/entities/{entity['id']}"
+        etag = self.client.get(url).headers['etag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.patch(url, json={'name': 'm'}, headers={'If-Match': '"stale"'}).status_code, 412)
+        SQLiteMemory(self.db_path).update_entity(entity['id'], {'name': 'changed elsewhere'})
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'changed elsewhere')
+
+    def test_fresh_worker_thread_sees_external_write(self):
+        """A new worker thread must not answer from entries cached before an external commit."""
+        service = MemoryService(self.db_path)
+        with TestClient(service.app) as client:
+            entity = client.post('/entities', json={'type': 'note', 'name': 'before'}).json()
+            etag = client.get(f"/entities/{entity['id']}").headers['etag']
+        SQLiteMemory(self.db_path).update_entity(entity['id'], {'name': 'after'})
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(service._entity_response(entity['id'])))
+        thread.start()
+        thread.join()
+        body, new_etag = responses[0]
+        self.assertEqual(json.loads(body)['name'], 'after')
+        self.assertNotEqual(new_etag, etag)
+
+    def test_batch_endpoints(self):
+        created = self.client.post('/batch/create', json={'entities': [
+            {'type': 'note', 'name': f'n{i}'} for i in range(3)]}).json()['entities']
+        ids = [entity['id'] for entity in created]
+        result = self.client.post('/batch/upsert', json={'entities': [
+            {'id': ids[0], 'name': 'renamed'}, {'id': 'fresh', 'type': 'note', 'name': 'new'}]}).json()
+        self.assertEqual((result['created'], result['updated']), (1, 1))
+        entities = self.client.post('/batch/get', json={'ids': [ids[0], 'missing', 'fresh']}).json()['entities']
+        self.assertEqual([e and e['name'] for e in entities], ['renamed', None, 'new'])
+        self.assertEqual(self.client.post('/batch/create', json={'entities': [{}] * 1001}).status_code, 422)
+
+    def test_streams_page_through_everything(self):
+        for start in (0, 600):
+            self.client.post('/batch/create', json={'entities': [
+                {'type': 'note', 'name': f'n{i}', 'content': 'match' if i % 2 else 'other'}
+                for i in range(start, start + 600)]})
+        lines = self.client.get('/search', params={'q': 'match', 'limit': 1000}).text.splitlines()
+        self.assertEqual(len({json.loads(line)['id'] for line in lines}), 600)
+        self.assertEqual(len(self.client.get('/entities', params={'type': 'note'}).text.splitlines()), 1200)
+        kinds = [json.loads(line)['kind'] for line in self.client.get('/export').text.splitlines()]
+        self.assertEqual(kinds, ['entity'] * 1200)
+
+    def test_stream_pages_walk_the_updated_index(self):
+        """Pages come off idx_entities_updated without a sort, NULL timestamps included."""
+        db = SQLiteMemory(self.db_path)
+        ids = [db.create_entity({'type': 'note', 'name': f'n{i}'})['id'] for i in range(7)]
+        with db.transaction() as conn:
+            conn.execute('UPDATE entities SET updated_at = NULL WHERE id IN (?, ?, ?)', ids[:3])
+        streamed = [entity['id'] for entity in iter_entities(db, page_size=2)]
+        self.assertEqual(sorted(streamed), sorted(ids))
+        self.assertEqual(set(streamed[:3]), set(ids[:3]))
+
+        queries = []
+        with db.transaction() as conn:
+            conn.set_trace_callback(queries.append)
+            list(iter_entities(db, page_size=2))
+            conn.set_trace_callback(None)
+            for sql in [q for q in queries if q.startswith('SELECT')]:
+                plan = ' '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+                self.assertIn('idx_entities_updated', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+if __name__ == "__main__":
+    unittest.main()
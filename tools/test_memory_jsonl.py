@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for JSONL export and import.
+
+- How to Run:
+    python -m unittest tools/test_memory_jsonl.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_jsonl import JsonlImporter, export_jsonl
+
+
+class TestMemoryJsonl(unittest.TestCase):
+    """Test cases for streaming JSONL export and chunked import."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="jsonl_test_"))
+        self.source = SQLiteMemory(str(self.test_dir / "source.db"))
+        self.target = SQLiteMemory(str(self.test_dir / "target.db"))
+        with self.source.transaction():
+            self.ids = [self.source.create_entity({'type': 'note', 'name': f'n{i}', 'content': f'c{i}'})['id']
+                        for i in range(25)]
+        for a, b in zip(self.ids, self.ids[1:]):
+            self.source.create_relation(a, b, 'next', {'weight': 1})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def index_names(self):
+        with self.target._get_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    def test_gzip_round_trip(self):
+        path = str(self.test_dir / "dump.jsonl.gz")
+        self.assertEqual(export_jsonl(self.source, path), {'entity': 25, 'relation': 24})
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        stats = JsonlImporter(self.target, chunk_size=10, bulk=True).import_file(path)
+        self.assertEqual((stats['entities'], stats['relations'], stats['chunks']), (25, 24, 5))
+        self.assertEqual(self.target.get_entity(self.ids[3]), self.source.get_entity(self.ids[3]))
+        self.assertEqual(self.target.get_relations(self.ids[0])[0]['properties'], {'weight': 1})
+        self.assertIn('idx_relations_source', self.index_names())
+
+    def test_resume_after_interruption(self):
+        path = str(self.test_dir / "dump.jsonl")
+        export_jsonl(self.source, path)
+        importer = JsonlImporter(self.target, chunk_size=10, bulk=True)
+        original = JsonlImporter._apply
+        calls = []
+
+        def fail_on_third_chunk(conn, tables, records):
+            calls.append(len(records))
+            if len(calls) == 3:
+                raise KeyboardInterrupt()
+            original(conn, tables, records)
+
+        with patch.object(JsonlImporter, '_apply', staticmethod(fail_on_third_chunk)):
+            with self.assertRaises(KeyboardInterrupt):
+                importer.import_file(path)
+        self.assertIn('idx_entities_type', self.index_names())
+
+        stats = importer.import_file(path)
+        self.assertEqual(stats['resumed_at'], 20)
+        self.assertEqual(stats['entities'] + stats['relations'], 29)
+        self.assertEqual(len(self.target.get_relations()), 24)
+        self.assertIsNotNone(self.target.get_entity(self.ids[-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
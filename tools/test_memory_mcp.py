@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the MCP knowledge graph server.
+
+- How to Run:
+    python -m unittest tools/test_memory_mcp.py
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_mcp import KnowledgeGraph, StdioServer
+
+
+class TestMemoryMcp(unittest.TestCase):
+    """Test cases for the stdio MCP knowledge-graph server."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="mcp_test_"))
+        self.memory = SQLiteMemory(str(self.test_dir / "memory.db"), reuse_connections=True)
+        self.graph = KnowledgeGraph(self.memory)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def serve(self, *messages):
+        stdin = io.BytesIO(b''.join(json.dumps(m).encode('utf-8') + b'\n' for m in messages))
+        stdout = io.BytesIO()
+        StdioServer(self.graph, stdin, stdout).serve()
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_graph_tools(self):
+        created = self.graph.create_entities([
+            {'name': 'alice', 'entityType': 'person', 'observations': ['likes tea']},
+            {'name': 'bob', 'entityType': 'person', 'observations': []},
+            {'name': 'alice', 'entityType': 'person', 'observations': ['duplicate']},
+        ])
+        self.assertEqual([e['name'] for e in created], ['alice', 'bob'])
+        self.assertEqual(self.graph.create_entities([{'name': 'bob', 'entityType': 'x', 'observations': []}]), [])
+        added = self.graph.add_observations([{'entityName': 'alice', 'contents': ['likes tea', 'reads']}])
+        self.assertEqual(added, [{'entityName': 'alice', 'addedObservations': ['reads']}])
+        rel = {'from': 'alice', 'to': 'bob', 'relationType': 'knows'}
+        self.assertEqual(self.graph.create_relations([rel, rel]), [rel])
+        with self.assertRaises(ValueError):
+            self.graph.create_relations([{'from': 'alice', 'to': 'nobody', 'relationType': 'knows'}])
+
+        graph = self.graph.open_nodes(['alice', 'bob', 'nobody'])
+        self.assertEqual(graph['entities'][0]['observations'], ['likes tea', 'reads'])
+        self.assertEqual(graph['relations'], [rel])
+        self.assertEqual(self.graph.open_nodes(['alice'])['relations'], [])
+        self.assertEqual([e['name'] for e in self.graph.search_nodes('READS')['entities']], ['alice'])
+        self.assertEqual(len(self.graph.read_graph()['entities']), 2)
+
+    def test_pipelined_and_batched_requests(self):
+        responses = self.serve(
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'notifications/initialized'},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'create_entities',
+             'params': {'entities': [{'name': 'a', 'entityType': 't', 'observations': ['x']}]}},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'open_nodes', 'params': {'names': ['a']}},
+            [{'jsonrpc': '2.0', 'id': 4, 'method': 'tools/call',
+              'params': {'name': 'add_observations',
+                         'arguments': {'observations': [{'entityName': 'missing', 'contents': ['y']}]}}},
+             {'jsonrpc': '2.0', 'id': 5, 'method': 'read_graph'},
+             {'jsonrpc': '2.0', 'id': 6, 'method': 'no_such_method'}],
+        )
+        by_id = {}
+        for message in responses:
+            for response in (message if isinstance(message, list) else [message]):
+                by_id[response['id']] = response
+        self.assertEqual(sorted(by_id), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(by_id[1]['result']['capabilities'], {'tools': {}})
+        # The read arrived after the write, so it sees it
+        self.assertEqual(by_id[3]['result']['entities'][0]['name'], 'a')
+        self.assertTrue(by_id[4]['result']['isError'])
+        self.assertEqual(len(by_id[5]['result']['entities']), 1)
+        self.assertEqual(by_id[6]['error']['code'], -32601)
+        self.assertEqual([len(m) for m in responses if isinstance(m, list)], [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
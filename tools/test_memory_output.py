@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory_cli output formats.
+
+- How to Run:
+    python -m unittest tools/test_memory_output.py
+"""
+
+import io
+import json
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from memory_output import make_writer, parse_fields
+
+
+class TestMemoryOutput(unittest.TestCase):
+    """Test cases for the memory_cli output formats."""
+
+    entities = [
+        {'id': 'ent_1', 'type': 'note', 'name': 'first', 'metadata': {'tags': ['a', 'b'], 'created_by': 'x'}},
+        {'id': 'ent_2', 'type': 'note', 'name': 'a much longer name, with a comma', 'metadata': {}},
+    ]
+
+    def render(self, fmt, fields=None):
+        out = io.StringIO()
+        writer = make_writer(fmt, out, parse_fields(fields))
+        for entity in self.entities:
+            writer.write(entity)
+        self.assertEqual(writer.close(), 2)
+        return out.getvalue()
+
+    def test_ndjson_projection(self):
+        lines = [json.loads(line) for line in self.render('ndjson', 'id,metadata.tags').splitlines()]
+        self.assertEqual(lines, [{'id': 'ent_1', 'metadata.tags': ['a', 'b']},
+                                 {'id': 'ent_2', 'metadata.tags': None}])
+        self.assertEqual(json.loads(self.render('ndjson').splitlines()[0]), self.entities[0])
+
+    def test_csv(self):
+        import csv
+        rows = list(csv.reader(io.StringIO(self.render('csv', 'name,metadata.tags,metadata.created_by'))))
+        self.assertEqual(rows, [['name', 'metadata.tags', 'metadata.created_by'],
+                                ['first', '["a","b"]', 'x'],
+                                ['a much longer name, with a comma', '', '']])
+
+    def test_table(self):
+        lines = self.render('table', 'id,name').splitlines()
+        self.assertEqual(lines[0].split(), ['id', 'name'])
+        self.assertEqual(lines[2], 'ent_1  first')
+        self.assertEqual(len({line.index(line.split()[1]) for line in lines}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the entity query language.
+
+- How to Run:
+    python -m unittest tools/test_memory_query.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from memory_query import QuerySyntaxError, explain
+from unified_memory import UnifiedMemory
+
+
+class TestMemoryQuery(unittest.TestCase):
+    """Test cases for the entity query language."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="query_test_"))
+        self.memory = UnifiedMemory(memory_bank_dir=str(self.test_dir))
+        self.ids = {}
+        for i in range(12):
+            entity = self.memory.create_entity({
+                'type': 'knowledge' if i % 2 else 'task',
+                'name': f'item {i:02d}',
+                'content': 'notes on the auth flow' if i % 3 == 0 else 'unrelated',
+                'metadata': {'tags': ['decision'] if i % 4 == 1 else [],
+                             'created_by': 'architect' if i < 6 else 'coder', 'priority': i % 3},
+            })
+            self.ids[entity['name']] = entity['id']
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def names(self, query, **kwargs):
+        return sorted(e['name'] for e in self.memory.query_entities(query, **kwargs)['entities'])
+
+    def test_filters(self):
+        self.assertEqual(self.names('type:knowledge tag:decision created_by:architect'), ['item 01', 'item 05'])
+        self.assertEqual(self.names('"auth flow" -type:task'), ['item 03', 'item 09'])
+        self.assertEqual(self.names('priority>=2 created_by:coder,architect type:task'), ['item 02', 'item 08'])
+        self.assertEqual(self.names('name:item*', limit=100), sorted(self.ids))
+        self.assertEqual(self.names('updated>2000-01-01', limit=100), sorted(self.ids))
+        with self.memory.db._get_connection() as conn:  # tombstoned by a sync
+            conn.execute("UPDATE entities SET deleted_at = '2026-01-01' WHERE id = ?", (self.ids['item 00'],))
+        self.assertEqual(self.names('auth'), ['item 03', 'item 06', 'item 09'])
+        self.assertEqual(self.names('is:deleted'), ['item 00'])
+
+    def test_full_text_follows_updates(self):
+        self.assertIn('item 03', self.names('auth'))
+        self.memory.update_entity(self.ids['item 03'], {'content': 'rewritten'})
+        self.memory.create_entity({'type': 'note', 'name': 'fresh', 'content': 'auth again'})
+        self.assertEqual(self.names('auth'), ['fresh', 'item 00', 'item 06', 'item 09'])
+        self.assertEqual(self.names('rewritten'), ['item 03'])
+
+    def test_keyset_paging(self):
+        seen, after = [], None
+        while True:
+            page = self.memory.query_entities('sort:name', limit=5, after=after)
+            seen += [e['name'] for e in page['entities']]
+            after = page['next']
+            if after is None:
+                break
+        self.assertEqual(seen, sorted(self.ids))
+        with self.assertRaises(QuerySyntaxError):
+            self.memory.query_entities('sort:-created', after=page['next'] or 'WyJuYW1lIiwiIiwiIl0')
+
+    def test_timestamp_sorts_use_indexes_and_page_through_nulls(self):
+        with self.memory.db._get_connection() as conn:
+            conn.execute("UPDATE entities SET updated_at = NULL, created_at = NULL WHERE name IN ('item 02', 'item 07')")
+        for sort in ('-updated', 'updated', '-created', 'created'):
+            with self.subTest(sort=sort):
+                plan = ' '.join(explain(self.memory.db, f'sort:{sort}', after=None)['plan'])
+                self.assertNotIn('TEMP B-TREE', plan)
+                seen, after = [], None
+                while True:
+                    page = self.memory.query_entities(f'sort:{sort}', limit=1, after=after)
+                    seen += [e['name'] for e in page['entities']]
+                    after = page['next']
+                    if after is None:
+                        break
+                self.assertEqual(sorted(seen), sorted(self.ids))
+                self.assertEqual(seen[:2], ['item 07', 'item 02'] if sort.startswith('-') else ['item 02', 'item 07'])
+        plan = ' '.join(explain(self.memory.db, '', after=self.memory.query_entities('', limit=3)['next'])['plan'])
+        self.assertIn('idx_entities_updated', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_stream_and_count(self):
+        streamed = [e['name'] for e in self.memory.iter_entities('sort:name')]
+        self.assertEqual(streamed, sorted(self.ids))
+        cursor = self.memory.query_entities('sort:name', limit=4)['next']
+        self.assertEqual([e['name'] for e in self.memory.iter_entities('sort:name', after=cursor)],
+                         sorted(self.ids)[4:])
+        self.assertEqual(self.memory.count_entities(), 12)
+        self.assertEqual(self.memory.count_entities('type:task auth'), 2)
+
+    def test_explain_uses_indexes(self):
+        plan = ' '.join(explain(self.memory.db, 'created_by:architect')['plan'])
+        self.assertIn('idx_entities_created_by', plan)
+        plan = ' '.join(explain(self.memory.db, 'type:task')['plan'])
+        self.assertIn('idx_entities_type', plan)
+        self.assertTrue(explain(self.memory.db, '"auth flow"')['full_text'])
+
+    def test_syntax_errors(self):
+        for query in ('"unterminated', 'sort:nothing', 'is:alive', 'tag>x'):
+            with self.subTest(query=query), self.assertRaises(QuerySyntaxError):
+                self.memory.query_entities(query)
+
+
+if __name__ == "__main__":
+    unittest.main()
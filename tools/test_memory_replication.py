@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for row-level replication between databases.
+
+- How to Run:
+    python -m unittest tools/test_memory_replication.py
+"""
+
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_replication import PipePeer, ReplicaStore, replicate
+
+
+class TestMemoryReplication(unittest.TestCase):
+    """Test cases for Merkle-tree replication between two databases."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="replication_test_"))
+        self.a = SQLiteMemory(str(self.test_dir / "a.db"))
+        self.b = SQLiteMemory(str(self.test_dir / "b.db"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def replicate(self, remote=None, **kwargs):
+        return replicate(ReplicaStore(self.a), remote or ReplicaStore(self.b), **kwargs)
+
+    def test_only_differing_rows_transferred(self):
+        one = self.a.create_entity({'type': 'note', 'name': 'one', 'content': '1'})
+        two = self.a.create_entity({'type': 'note', 'name': 'two', 'content': '2'})
+        self.a.create_relation(one['id'], two['id'], 'refers_to')
+        stats = self.replicate()
+        self.assertEqual((stats['pushed'], stats['pulled']), (3, 0))
+        self.assertEqual(self.b.get_entity(one['id'])['content'], '1')
+        self.assertEqual(len(self.b.get_relations(one['id'])), 1)
+        self.assertEqual(self.replicate()['buckets'], 0)
+
+        time.sleep(0.01)
+        self.b.update_entity(one['id'], {'content': 'edited on b'})
+        three = self.b.create_entity({'type': 'note', 'name': 'three', 'content': '3'})
+        self.a.delete_entity(two['id'])
+        stats = self.replicate()
+        self.assertEqual((stats['pushed'], stats['pulled'], stats['resolved']), (1, 2, 2))
+        self.assertEqual(stats['round_trips'], 4 + 1 + 1 + 2)  # root + 3 tree levels, digests, push, pull
+        self.assertEqual(self.a.get_entity(one['id'])['content'], 'edited on b')
+        self.assertIsNotNone(self.a.get_entity(three['id']))
+        self.assertIsNone(self.b.get_entity(two['id']))
+        self.assertEqual(self.replicate()['buckets'], 0)
+
+    def test_version_policy(self):
+        entity = self.a.create_entity({'type': 'note', 'name': 'n', 'content': 'v1'})
+        self.replicate()
+        self.a.update_entity(entity['id'], {'content': 'a1'})
+        self.a.update_entity(entity['id'], {'content': 'a2'})
+        time.sleep(0.01)
+        self.b.update_entity(entity['id'], {'content': 'b, but later'})
+        self.replicate(policy='version')
+        self.assertEqual(self.b.get_entity(entity['id'])['content'], 'a2')
+        self.assertEqual(self.b.get_entity(entity['id'])['version'], 3)
+
+    def test_pipe_peer(self):
+        entity = self.b.create_entity({'type': 'note', 'name': 'remote', 'content': 'r'})
+        script = TOOLS_DIR / "memory_replication.py"
+        peer = PipePeer.spawn(f'"{sys.executable}" "{script}" serve "{self.b.db_path}"')
+        try:
+            self.assertEqual(self.replicate(remote=peer)['pulled'], 1)
+        finally:
+            peer.close()
+        self.assertEqual(self.a.get_entity(entity['id'])['name'], 'remote')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the Unix-socket memory server.
+
+- How to Run:
+    python -m unittest tools/test_memory_server.py
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_server import MemoryClient, MemoryServer, RemoteError, socket_path
+
+
+class TestMemoryServer(unittest.TestCase):
+    """Test cases for the Unix-socket memory server and its client."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="server_test_"))
+        self.db_path = str(self.test_dir / "memory.db")
+        self.sock = str(self.test_dir / "memory.sock")
+        self.server = MemoryServer(self.db_path, self.sock, idle_timeout=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        for _ in range(100):
+            self.client = MemoryClient.connect(path=self.sock)
+            if self.client:
+                break
+            time.sleep(0.02)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.thread.join(5)
+        shutil.rmtree(self.test_dir)
+
+    def test_calls_pipeline_and_batch(self):
+        entity = self.client.create_entity({'type': 'note', 'name': 'n', 'content': 'c'})
+        self.assertEqual(self.client.get_entity(entity['id'])['name'], 'n')
+        results = self.client.pipeline([('get_entity', {'entity_id': entity['id']}),
+                                        ('no_such_method', {}),
+                                        ('update_entity', {'entity_id': entity['id'], 'updates': {'name': 'm'}})])
+        self.assertEqual(results[0]['id'], entity['id'])
+        self.assertIsInstance(results[1], RemoteError)
+        self.assertEqual(results[2]['name'], 'm')
+        results = self.client.batch([('get_entity', {'entity_id': entity['id']}), ('ping', {})])
+        self.assertEqual((results[0]['name'], results[1]), ('m', 'pong'))
+
+    def test_cache_dropped_on_external_write(self):
+        entity = self.client.create_entity({'type': 'note', 'name': 'before'})
+        self.client.get_entity(entity['id'])
+        self.assertEqual(self.client.get_entity(entity['id'])['name'], 'before')
+        self.assertGreater(self.client.call('stats')['cache_hits'], 0)
+        SQLiteMemory(self.db_path).update_entity(entity['id'], {'name': 'after'})
+        self.assertEqual(self.client.get_entity(entity['id'])['name'], 'after')
+
+    def test_cache_dropped_for_fresh_worker_thread(self):
+        """A thread that never checked data_version cannot trust entries cached by others."""
+        entity = self.client.create_entity({'type': 'note', 'name': 'before'})
+        self.client.get_entity(entity['id'])
+        SQLiteMemory(self.db_path).update_entity(entity['id'], {'name': 'after'})
+        request = {'id': 1, 'method': 'get_entity', 'params': {'entity_id': entity['id']}}
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(self.server.handle(request)))
+        thread.start()
+        thread.join()
+        self.assertEqual(responses[0]['result']['name'], 'after')
+
+    def test_socket_private_to_user(self):
+        """The socket is 0600 and neither side trusts one owned by another user."""
+        self.assertEqual(stat.S_IMODE(os.stat(self.sock).st_mode), 0o600)
+        with patch('memory_server.os.getuid', return_value=os.getuid() + 1):
+            self.assertIsNone(MemoryClient.connect(path=self.sock))
+            with self.assertRaises(RuntimeError):
+                MemoryServer(self.db_path, self.sock)._bind()
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': str(self.test_dir)}):
+            self.assertEqual(socket_path(self.db_path).parent, self.test_dir)
+
+    def test_idle_shutdown_removes_socket(self):
+        self.client.close()
+        self.client = MemoryClient.connect(path=self.sock)
+        self.client.close()
+        self.server.idle_timeout = 0.1
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(Path(self.sock).exists())
+        self.assertIsNone(MemoryClient.connect(path=self.sock))
+        self.client = MagicMock()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for columnar snapshots.
+
+- How to Run:
+    python -m unittest tools/test_memory_snapshot.py
+"""
+
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from memory_snapshot import SnapshotError, SnapshotWriter, load_snapshot
+
+
+class TestMemorySnapshot(unittest.TestCase):
+    """Test cases for the binary snapshot format."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="snapshot_test_"))
+        self.memory = SQLiteMemory(str(self.test_dir / "memory.db"))
+        self.path = str(self.test_dir / "memory.snap")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_round_trip(self):
+        plain = self.memory.create_entity({'type': 'note', 'name': 'plain', 'content': 'héllo'})
+        odd = self.memory.create_entity({'type': 'agent', 'name': 'odd', 'content': 'nul\x00inside'})
+        empty = self.memory.create_entity({'type': 'note', 'name': 'empty'})
+        self.memory.create_relation(plain['id'], odd['id'], 'knows', {'since': 2024})
+        with self.memory._get_connection() as conn:  # endpoint without an entity row
+            conn.execute("INSERT INTO relations (source_id, target_id, type) VALUES (?, 'ent_gone', 'knows')",
+                         (empty['id'],))
+        self.assertEqual(SnapshotWriter(self.memory).write(self.path), {'entities': 3, 'relations': 2})
+
+        loaded = load_snapshot(self.path)
+        for entity in (plain, odd, empty):
+            self.assertEqual(loaded.get_entity(entity['id']), self.memory.get_entity(entity['id']))
+        self.assertEqual(loaded.get_relations(plain['id'])[0]['properties'], {'since': 2024})
+        self.assertEqual(loaded.get_relations(empty['id'])[0]['target_id'], 'ent_gone')
+        self.assertEqual(len(loaded.search_entities('plain')), 1)
+        with self.assertRaises(sqlite3.OperationalError):
+            loaded.create_entity({'type': 'note', 'name': 'new'})
+        loaded.close()
+
+    def test_rejects_other_files(self):
+        Path(self.path).write_bytes(b'SQLite format 3\x00' + bytes(100))
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,7 +29,9 @@ import json
 import os
 import shutil
 import tempfile
+import time
 import unittest
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Dict, Any
 from unittest.mock import patch, MagicMock
@@ -40,7 +42,9 @@ TOOLS_DIR = Path(__file__).parent.resolve()
 sys.path.insert(0, str(TOOLS_DIR))
 
 # Import the modules to test
-from sync_memory import MemorySynchronizer
+from sync_memory import HASH_ALGORITHMS, MemorySynchronizer
+from markdown_chunks import split_chunks
+from sqlite_memory import SQLiteMemory
 from check_memory_sync import MemorySyncChecker
 
 
@@ -66,6 +70,20 @@ class TestMemorySynchronization(unittest.TestCase):
         self.test_file = self.memory_bank_dir / "test_file.md"
         self.test_file.write_text("# Test File\n\nThis is a test file.")
         
+        self.state_file = self.logs_dir / ".sync_state.json"
+        self.db_path = str(self.test_dir / "test_memory.db")
+    
+    def make_synchronizer(self, **kwargs) -> MemorySynchronizer:
+        """Create a synchronizer bound to the temporary directories."""
+        return MemorySynchronizer(memory_bank_dir=self.memory_bank_dir,
+                                  state_file=self.state_file,
+                                  db_path=self.db_path, **kwargs)
+    
+    def age_files(self, seconds: int = 60):
+        """Move file mtimes into the past so their stat is trusted."""
+        past = time.time() - seconds
+        for path in self.memory_bank_dir.glob("**/*.md"):
+            os.utime(path, (past, past))
 
     
     def tearDown(self):
@@ -76,14 +94,29 @@ class TestMemorySynchronization(unittest.TestCase):
         # Remove temporary directory
         shutil.rmtree(self.test_dir)
     
+    def test_long_lived_synchronizer_sees_other_runs(self):
+        """A synchronizer kept between runs (the daemon's) reuses rows another run wrote."""
+        daemon = self.make_synchronizer()
+        self.assertTrue(daemon.sync_to_sqlite())
+        (self.memory_bank_dir / "b.md").write_text("# B\n")
+        self.assertTrue(self.make_synchronizer().sync_to_sqlite())
+        entity = daemon.memory.get_entity(self.make_synchronizer().sync_state['b.md']['entity_id'])
+
+        (self.memory_bank_dir / "b.md").write_text("# B\n\nEdited\n")
+        self.assertTrue(daemon.sync_to_sqlite(paths=['b.md']))
+        self.assertEqual(daemon.sync_state['b.md']['entity_id'], entity['id'])
+        with daemon.memory._get_connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM entities WHERE name = ?", (entity['name'],)).fetchone()[0]
+        self.assertEqual(count, 1)
+
     def test_synchronizer_initialization(self):
         """Test MemorySynchronizer initialization."""
-        sync = MemorySynchronizer()
-        self.assertIsInstance(sync.sync_state, dict)
+        sync = self.make_synchronizer()
+        self.assertIsInstance(sync.sync_state, Mapping)
     
     def test_file_processing(self):
         """Test processing of a memory file."""
-        sync = MemorySynchronizer()
+        sync = self.make_synchronizer()
         entity = sync.process_file(self.test_file)
         
         self.assertIsNotNone(entity)
@@ -91,16 +124,249 @@ class TestMemorySynchronization(unittest.TestCase):
         self.assertEqual(entity['entityType'], 'document')
         self.assertIn('This is a test file', entity['observations'][0])
     
+    def test_noop_sync_skips_hashing(self):
+        """Unchanged files are detected from their stat alone."""
+        (self.memory_bank_dir / "notes").mkdir()
+        (self.memory_bank_dir / "notes" / "second.md").write_text("Second")
+        self.age_files()
+        
+        sync = self.make_synchronizer()
+        self.assertTrue(sync.sync_to_sqlite())
+        self.assertEqual(sync.hashed_count, 2)  # hashed once each, not twice
+        
+        sync = self.make_synchronizer()
+        self.assertTrue(sync.sync_to_sqlite())
+        self.assertEqual(sync.hashed_count, 0)
+        self.assertFalse(sync.sync_state.dirty)
+    
+    def test_touched_file_rehashed_once(self):
+        """A touched but identical file is re-hashed once, then trusted again."""
+        self.age_files()
+        self.make_synchronizer().sync_to_sqlite()
+        
+        self.age_files(seconds=30)
+        sync = self.make_synchronizer()
+        self.assertFalse(sync.has_changes(self.test_file))
+        self.assertEqual(sync.hashed_count, 1)
+        sync._save_sync_state()
+        
+        sync = self.make_synchronizer()
+        self.assertFalse(sync.has_changes(self.test_file))
+        self.assertEqual(sync.hashed_count, 0)
+        
+        self.test_file.write_text("# Test File\n\nChanged.")
+        self.assertTrue(self.make_synchronizer().has_changes(self.test_file))
+    
+    def test_parallel_pipeline(self):
+        """Worker threads and batched writes sync every file exactly once."""
+        for i in range(25):
+            (self.memory_bank_dir / f"note{i}.md").write_text(
+                f"---\ntype: note\n---\n# Note {i}\n")
+        reports = []
+        sync = self.make_synchronizer()
+        self.assertTrue(sync.sync_to_sqlite(workers=4, batch_size=5, progress=reports.append))
+        
+        self.assertEqual(reports[-1]['synced'], 26)
+        entity_ids = {entry['entity_id'] for entry in sync.sync_state.values()}
+        self.assertEqual(len(entity_ids), 26)
+        memory = SQLiteMemory(self.db_path)
+        note = memory.get_entity(sync.sync_state['note3.md']['entity_id'])
+        self.assertEqual(note['type'], 'note')
+        self.assertEqual(note['content'], '# Note 3')
+    
+    def test_state_stored_in_database(self):
+        """Sync state lives in the database and legacy JSON state is migrated."""
+        self.state_file.write_text(json.dumps({
+            'test_file.md': {'hash': 'stale', 'last_synced': '2025-01-01T00:00:00', 'entity_id': 'ent_legacy'}
+        }))
+        self.age_files()
+        sync = self.make_synchronizer()
+        self.assertFalse(self.state_file.exists())
+        self.assertTrue(self.state_file.with_name('.sync_state.json.migrated').exists())
+        
+        # The legacy entity id is kept; the stale hash forces a re-sync
+        self.assertTrue(sync.sync_to_sqlite())
+        memory = SQLiteMemory(self.db_path)
+        with memory._get_connection() as conn:
+            row = conn.execute("SELECT * FROM sync_state WHERE path = 'test_file.md'").fetchone()
+        self.assertEqual(row['entity_id'], 'ent_legacy')
+        self.assertIsNotNone(memory.get_entity('ent_legacy'))
+        
+        checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.db_path,
+                                    state_file=self.state_file)
+        self.assertEqual(checker.check_sync_status(), 0)
+        self.test_file.write_text("# Changed")
+        checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.db_path,
+                                    state_file=self.state_file)
+        self.assertEqual(checker.check_sync_status(), 1)
+        self.assertEqual(checker.status['out_of_sync'], 1)
+
+    def test_sync_moves_merge_conflicts_aside(self):
+        """A file with conflict markers is not synced; it moves to _conflicts/ and the run fails."""
+        conflicted = self.memory_bank_dir / "merged.md"
+        conflicted.write_text("# Merged\n\n<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> abc123\n")
+        sync = self.make_synchronizer()
+        self.assertFalse(sync.sync_to_sqlite())
+        self.assertFalse(conflicted.exists())
+        self.assertEqual([p.name.split('.')[0] for p in self.conflicts_dir.iterdir()], ['merged'])
+        self.assertIn('test_file.md', sync.sync_state)
+        self.assertNotIn('merged.md', sync.sync_state)
+
+    def test_checker_tolerates_bare_rows_and_vanishing_files(self):
+        """Rows without stat or sync time are out of sync; files deleted mid-walk are skipped."""
+        (self.memory_bank_dir / "gone.md").write_text("# gone\n")
+        self.assertTrue(self.make_synchronizer().sync_to_sqlite())
+        with SQLiteMemory(self.db_path).transaction() as conn:
+            conn.execute("UPDATE sync_state SET mtime_ns = NULL, last_synced = NULL WHERE path = 'test_file.md'")
+        real_stat = os.stat
+
+        def stat(path, *args, **kwargs):
+            if str(path).endswith('gone.md'):
+                raise FileNotFoundError(path)
+            return real_stat(path, *args, **kwargs)
+
+        checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.db_path,
+                                    state_file=self.state_file)
+        with patch('check_memory_sync.os.stat', side_effect=stat):
+            self.assertEqual(checker.check_sync_status(), 1)
+        self.assertEqual((checker.status['total_files'], checker.status['out_of_sync']), (1, 1))
+
+    def test_verify_reports_missing_stale_orphaned_drifted(self):
+        """Verification compares files, sync state and entity hashes."""
+        for name in ("drift.md", "gone.md", "touched.md"):
+            (self.memory_bank_dir / name).write_text(f"# {name}\n")
+        self.age_files()
+        sync = self.make_synchronizer()
+        self.assertTrue(sync.sync_to_sqlite())
+
+        def verify(deep=False):
+            checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.db_path,
+                                        state_file=self.state_file)
+            code = checker.verify(deep=deep, workers=2)
+            return code, {kind: sorted(d.get('file') or d['entity_id'] for d in checker.status['details']
+                                       if d['status'] == kind)
+                          for kind in ('missing', 'stale', 'orphaned', 'drifted')}
+
+        self.assertEqual(verify(), (0, {'missing': [], 'stale': [], 'orphaned': [], 'drifted': []}))
+
+        memory = SQLiteMemory(self.db_path)
+        memory.update_entity(sync.sync_state['drift.md']['entity_id'], {'content': 'edited in the DB'})
+        orphan = memory.create_entity({'type': 'document', 'name': 'orphan', 'content': '',
+                                       'metadata': {'source': 'file_based'}})
+        (self.memory_bank_dir / "gone.md").unlink()
+        (self.memory_bank_dir / "new.md").write_text("# New\n")
+        self.test_file.write_text("# Test File\n\nChanged.")
+        os.utime(self.memory_bank_dir / "touched.md")
+
+        expected = {'missing': ['new.md'], 'stale': ['test_file.md', 'touched.md'],
+                    'orphaned': sorted(['gone.md', orphan['id']]), 'drifted': ['drift.md']}
+        self.assertEqual(verify(), (1, expected))
+        self.assertEqual(verify(deep=True), (1, {**expected, 'stale': ['test_file.md']}))
+
+    def test_pluggable_hash_algorithm(self):
+        """The hash algorithm is recorded and switching forces a re-sync."""
+        self.age_files()
+        sync = self.make_synchronizer(hash_algorithm='crc32')
+        sync.sync_to_sqlite()
+        entry = sync.sync_state['test_file.md']
+        self.assertEqual(entry['algo'], 'crc32')
+        self.assertEqual(len(entry['hash']), 8)
+        
+        self.assertTrue(self.make_synchronizer().has_changes(self.test_file))
+        with self.assertRaises(ValueError):
+            self.make_synchronizer(hash_algorithm='md4')
+
+    def test_rename_keeps_entity(self):
+        """A renamed file is matched by hash and keeps its entity id."""
+        self.make_synchronizer().sync_to_sqlite()
+        sync = self.make_synchronizer()
+        entity_id = sync.sync_state['test_file.md']['entity_id']
+        (self.memory_bank_dir / "archive").mkdir()
+        self.test_file.rename(self.memory_bank_dir / "archive" / "renamed.md")
+
+        reports = []
+        self.assertTrue(sync.sync_to_sqlite(progress=reports.append))
+        self.assertEqual((reports[-1]['renamed'], reports[-1]['deleted']), (1, 0))
+        self.assertNotIn('test_file.md', sync.sync_state)
+        new_path = os.path.join('archive', 'renamed.md')
+        self.assertEqual(sync.sync_state[new_path]['entity_id'], entity_id)
+        entity = SQLiteMemory(self.db_path).get_entity(entity_id)
+        self.assertEqual((entity['name'], entity['metadata']['file_path']), ('renamed', new_path))
+
+    def test_deleted_file_tombstoned_then_purged(self):
+        """Deleted files tombstone their entity; it is revived or purged later."""
+        self.make_synchronizer().sync_to_sqlite()
+        memory = SQLiteMemory(self.db_path)
+        entity_id = self.make_synchronizer().sync_state['test_file.md']['entity_id']
+        content = self.test_file.read_text()
+        self.test_file.unlink()
+
+        sync = self.make_synchronizer()
+        reports = []
+        self.assertTrue(sync.sync_to_sqlite(progress=reports.append))
+        self.assertEqual(reports[-1]['deleted'], 1)
+        self.assertIsNotNone(memory.get_entity(entity_id)['deleted_at'])
+        self.assertEqual(memory.search_entities('test file'), [])
+
+        # Coming back under another name within the grace period revives it
+        (self.memory_bank_dir / "restored.md").write_text(content)
+        self.assertTrue(sync.sync_to_sqlite())
+        self.assertEqual(sync.sync_state['restored.md']['entity_id'], entity_id)
+        self.assertIsNone(memory.get_entity(entity_id)['deleted_at'])
+
+        (self.memory_bank_dir / "restored.md").unlink()
+        sync.sync_to_sqlite()
+        self.assertEqual(sync.purge_tombstones(grace_seconds=3600), 0)
+        self.assertEqual(sync.purge_tombstones(grace_seconds=0), 1)
+        self.assertIsNone(memory.get_entity(entity_id))
+
+    def test_chunked_log_appends_one_entry(self):
+        """Appending to a log inserts one entry entity and leaves the rest alone."""
+        log_file = self.memory_bank_dir / "actionLog.md"
+        text = ("# Action Log\n\nIntro.\n\n## Example 1\n\n- **Action:** First\n\n"
+                "| Timestamp | Action |\n|---|---|\n| 2026-01-01 | Setup |\n")
+        log_file.write_text(text)
+        sync = self.make_synchronizer()
+        preamble, chunks = split_chunks(text, HASH_ALGORITHMS['sha256'])
+        self.assertEqual(preamble + ''.join(chunk.text for chunk in chunks), text)
+        self.assertEqual([chunk.title for chunk in chunks], ['Example 1', '2026-01-01'])
+        self.assertTrue(sync.sync_to_sqlite())
+
+        memory = SQLiteMemory(self.db_path)
+        parent_id = sync.sync_state['actionLog.md']['entity_id']
+        self.assertEqual(memory.get_entity(parent_id)['content'], '# Action Log\n\nIntro.')
+        self.assertEqual(len(memory.get_relations(parent_id, 'part_of')), 2)
+        with memory._get_connection() as conn:
+            before = {row['id']: row['updated_at'] for row in conn.execute('SELECT * FROM entities')}
+
+        with open(log_file, 'a') as f:
+            f.write("| 2026-01-02 | Deploy to staging |\n")
+        self.assertTrue(self.make_synchronizer().sync_to_sqlite())
+        with memory._get_connection() as conn:
+            after = {row['id']: row['updated_at'] for row in conn.execute('SELECT * FROM entities')}
+        added = set(after) - set(before)
+        self.assertEqual(len(added), 1)
+        self.assertEqual({k: after[k] for k in before}, before)  # nothing rewritten
+        found = memory.search_entities('staging')
+        self.assertEqual([entity['id'] for entity in found], list(added))
+
+        # Removing an entry deletes its entity; unchunked files have no entries
+        log_file.write_text(log_file.read_text().replace("| 2026-01-01 | Setup |\n", ""))
+        self.assertTrue(self.make_synchronizer().sync_to_sqlite())
+        self.assertEqual(len(memory.get_relations(parent_id, 'part_of')), 2)
+        self.assertEqual(memory.search_entities('Setup'), [])
+        self.assertEqual(len(memory.get_relations(sync.sync_state['test_file.md']['entity_id'])), 0)
+
 
     
     def test_sync_checker(self):
         """Test sync status checking."""
         # First, sync a file
-        sync = MemorySynchronizer()
-
+        self.assertTrue(self.make_synchronizer().sync_to_sqlite())
         
         # Now check status
-        checker = MemorySyncChecker()
+        checker = MemorySyncChecker(memory_bank_dir=self.memory_bank_dir, db_path=self.db_path,
+                                    state_file=self.state_file)
         checker.check_sync_status()
         
         # Verify status
@@ -146,7 +412,9 @@ This is the remote change.
     
     def test_conflict_detection(self):
         """Test detection of merge conflicts."""
-        sync = MemorySynchronizer()
+        sync = MemorySynchronizer(memory_bank_dir=self.memory_bank_dir,
+                                  state_file=self.logs_dir / ".sync_state.json",
+                                  db_path=str(self.test_dir / "test_memory.db"))
         
         # Process the conflict file
         entity = sync.process_file(self.conflict_file)
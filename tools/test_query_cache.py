@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the query result cache.
+
+- How to Run:
+    python -m unittest tools/test_query_cache.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from memory_backup import BackupManager
+from query_cache import QueryCache
+from unified_memory import UnifiedMemory
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test cases for the UnifiedMemory query result cache."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="cache_test_"))
+        self.memory = UnifiedMemory(memory_bank_dir=str(self.test_dir))
+        # Another process writing to the same database
+        self.other = UnifiedMemory(memory_bank_dir=str(self.test_dir), query_cache_size=0)
+        for i in range(5):
+            self.memory.create_entity({'type': 'decision', 'name': f'decision {i}', 'content': 'protocol'})
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def search(self, *args):
+        return [e['name'] for e in self.memory.search_entities(*args, limit=100)]
+
+    def test_hits_until_a_write_commits(self):
+        first = self.search('protocol')
+        self.assertEqual(self.search('PROTOCOL'), first)
+        self.assertEqual(self.memory.cache_stats()['hits'], 1)
+        self.other.create_entity({'type': 'note', 'name': 'new', 'content': 'protocol'})
+        self.assertIn('new', self.search('protocol'))
+        self.assertEqual(self.memory.cache_stats()['stale'], 1)
+        self.memory.search_entities('protocol', limit=100)[0]['name'] = 'mutated'
+        self.assertNotIn('mutated', self.search('protocol'))
+
+    def test_typed_entries_survive_other_types(self):
+        self.search('protocol', 'decision')
+        self.other.create_entity({'type': 'note', 'name': 'new', 'content': 'protocol'})
+        self.search('protocol', 'decision')
+        self.assertEqual(self.memory.cache_stats()['hits'], 1)
+        decision = self.memory.search_entities('decision 0', 'decision')[0]
+        self.other.update_entity(decision['id'], {'type': 'note'})
+        self.assertNotIn('decision 0', self.search('protocol', 'decision'))
+
+    def test_rolled_back_writes_are_not_cached(self):
+        before = self.search('protocol')
+        with self.assertRaises(RuntimeError):
+            with self.memory.db.transaction():
+                self.memory.db.create_entity({'type': 'note', 'name': 'gone', 'content': 'protocol'})
+                self.assertIn('gone', self.search('protocol'))
+                raise RuntimeError
+        self.other.create_entity({'type': 'note', 'name': 'kept', 'content': 'protocol'})
+        self.assertEqual(sorted(self.search('protocol')), sorted(before + ['kept']))
+
+    def test_restore_starts_a_new_epoch(self):
+        manager = BackupManager(self.memory.db, str(self.test_dir / 'backups'))
+        backup = manager.snapshot()
+        self.other.create_entity({'type': 'note', 'name': 'after backup', 'content': 'protocol'})
+        self.assertIn('after backup', self.search('protocol'))
+        manager.restore(str(backup))
+        # Same change-log position as the cached state would have after one more write
+        self.other.create_entity({'type': 'note', 'name': 'other branch', 'content': 'protocol'})
+        names = self.search('protocol')
+        self.assertIn('other branch', names)
+        self.assertNotIn('after backup', names)
+
+    def test_bounds(self):
+        cache = QueryCache(max_entries=2, max_bytes=100)
+        for key in 'abc':
+            cache.put(key, 1, key)
+        self.assertEqual(cache.get('a', 1), (False, None))
+        self.assertEqual(cache.get('c', 1), (True, 'c'))
+        cache.put('big', 1, 'x' * 200)
+        self.assertEqual(cache.get('big', 1), (False, None))
+        self.assertEqual(cache.get('c', 2), (False, None))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['entries'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
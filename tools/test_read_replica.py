@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for read replicas fed by log shipping.
+
+- How to Run:
+    python -m unittest tools/test_read_replica.py
+"""
+
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from read_replica import LogShipper, ReplicaFollower, ReplicaRouter
+
+
+class TestReadReplica(unittest.TestCase):
+    """Test cases for log shipping to read replicas."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="read_replica_test_"))
+        self.primary = SQLiteMemory(str(self.test_dir / "primary.db"))
+        self.follower = ReplicaFollower(str(self.test_dir / "follower.db"))
+        self.shipper = LogShipper(self.primary, [self.follower], batch_size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_snapshot_then_batched_shipping(self):
+        one = self.primary.create_entity({'type': 'note', 'name': 'one', 'content': '1'})
+        self.shipper.ship(self.follower)  # no cursors yet: restored from a snapshot
+        self.assertEqual(self.follower.memory.get_entity(one['id'])['content'], '1')
+        self.assertEqual(self.follower.batches, 0)
+
+        two = self.primary.create_entity({'type': 'note', 'name': 'two', 'content': '2'})
+        three = self.primary.create_entity({'type': 'note', 'name': 'three', 'content': '3'})
+        self.primary.create_relation(two['id'], one['id'], 'refers_to')
+        self.primary.update_entity(one['id'], {'content': 'edited'})
+        self.primary.delete_entity(three['id'])
+        self.assertEqual(self.shipper.status()[0]['lag_changes'], 5)
+
+        self.assertEqual(self.shipper.ship(self.follower), 5)
+        self.assertEqual(self.follower.batches, 2)  # four entity changes in batches of two
+        self.assertEqual(self.follower.memory.get_entity(one['id'])['content'], 'edited')
+        self.assertIsNotNone(self.follower.memory.get_entity(two['id']))
+        self.assertIsNone(self.follower.memory.get_entity(three['id']))
+        self.assertEqual(len(self.follower.memory.get_relations(two['id'])), 1)
+        status = self.shipper.status()[0]
+        self.assertEqual(status['lag_changes'], 0)
+        self.assertLess(status['lag_seconds'], 5)
+
+    def test_router_honours_staleness_and_own_writes(self):
+        router = ReplicaRouter(self.primary, self.follower, max_staleness=60)
+        self.assertIs(router.reader(), self.primary)  # never synced
+        self.shipper.ship(self.follower)
+        self.assertIs(router.reader(), self.follower.memory)
+
+        self.primary.create_entity({'type': 'note', 'name': 'mine', 'content': 'x'})
+        router.wrote()
+        self.assertIs(router.reader(), self.primary)  # follower has not shipped the write
+        self.shipper.ship(self.follower)
+        self.assertIs(router.reader(), self.follower.memory)
+
+        router.max_staleness = 0
+        time.sleep(0.01)
+        self.assertIs(router.reader(), self.primary)
+
+
+if __name__ == "__main__":
+    unittest.main()
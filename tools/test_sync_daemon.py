@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the sync daemon and its file watchers.
+
+- How to Run:
+    python -m unittest tools/test_sync_daemon.py
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sync_memory import MemorySynchronizer
+from sync_lease import SingleFlight
+from sync_daemon import InotifyWatcher, PollingWatcher, SyncDaemon, read_status
+
+
+class TestSyncDaemon(unittest.TestCase):
+    """Test cases for the continuous sync daemon."""
+    
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="sync_daemon_test_"))
+        self.memory_bank_dir = self.test_dir / "memory-bank"
+        (self.memory_bank_dir / "_conflicts").mkdir(parents=True)
+        (self.memory_bank_dir / "existing.md").write_text("Existing")
+        self.sync = MemorySynchronizer(memory_bank_dir=self.memory_bank_dir,
+                                       state_file=self.test_dir / ".sync_state.json",
+                                       db_path=str(self.test_dir / "test_memory.db"))
+        self.sync.sync_to_sqlite()
+        self.status_file = self.test_dir / ".sync_daemon.json"
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+    
+    def run_burst(self, watcher):
+        daemon = SyncDaemon(self.sync, watcher, debounce=0.1, status_file=self.status_file)
+        (self.memory_bank_dir / "sub").mkdir()
+        (self.memory_bank_dir / "sub" / "new.md").write_text("New")
+        (self.memory_bank_dir / "_conflicts" / "ignored.md").write_text("Ignored")
+        self.assertTrue(daemon.run_once(timeout=5))
+        
+        self.assertEqual(daemon.metrics['last_batch_files'], 1)
+        self.assertIn(os.path.join('sub', 'new.md'), self.sync.sync_state)
+        self.assertNotIn(os.path.join('_conflicts', 'ignored.md'), self.sync.sync_state)
+        status = read_status(self.status_file)
+        self.assertEqual(status['batches'], 1)
+        self.assertIsNotNone(status['last_lag_seconds'])
+        
+        (self.memory_bank_dir / "existing.md").unlink()
+        self.assertTrue(daemon.run_once(timeout=5))
+        self.assertNotIn('existing.md', self.sync.sync_state)
+        watcher.close()
+    
+    def test_pass_waits_for_sync_lease(self):
+        """A daemon pass does not overlap a one-shot sync holding the lease."""
+        one_shot = SingleFlight(self.sync.memory)
+        self.assertTrue(one_shot.try_acquire())
+        daemon = SyncDaemon(self.sync, PollingWatcher(self.sync), status_file=self.status_file,
+                            flight=SingleFlight(self.sync.memory, poll_interval=0.01, share=False))
+        (self.memory_bank_dir / "new.md").write_text("New")
+        thread = threading.Thread(target=daemon.sync_paths, args=({'new.md'}, time.monotonic()))
+        thread.start()
+        time.sleep(0.2)
+        self.assertTrue(thread.is_alive())
+        self.assertNotIn('new.md', self.sync.sync_state)
+        one_shot.release({'success': True, 'stats': {}})
+        thread.join(5)
+        self.assertIn('new.md', self.sync.sync_state)
+        self.assertEqual(daemon.metrics['last_batch_files'], 1)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux-only")
+    def test_inotify_burst_synced_once(self):
+        """Touched files are debounced into one batch and synced alone."""
+        self.run_burst(InotifyWatcher(self.memory_bank_dir, exclude=self.memory_bank_dir / "_conflicts"))
+    
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux-only")
+    def test_inotify_directory_rename(self):
+        """Renaming a directory resyncs the files under both its old and new path."""
+        watcher = InotifyWatcher(self.memory_bank_dir)
+        daemon = SyncDaemon(self.sync, watcher, debounce=0.1, status_file=self.status_file)
+        (self.memory_bank_dir / "old").mkdir()
+        (self.memory_bank_dir / "old" / "note.md").write_text("Note")
+        self.assertTrue(daemon.run_once(timeout=5))
+        self.assertIn(os.path.join('old', 'note.md'), self.sync.sync_state)
+
+        (self.memory_bank_dir / "old").rename(self.memory_bank_dir / "new")
+        self.assertTrue(daemon.run_once(timeout=5))
+        self.assertNotIn(os.path.join('old', 'note.md'), self.sync.sync_state)
+        self.assertIn(os.path.join('new', 'note.md'), self.sync.sync_state)
+
+        # Later events come from the new path, not the stale watch
+        (self.memory_bank_dir / "new" / "later.md").write_text("Later")
+        self.assertEqual(watcher.poll(5), {os.path.join('new', 'later.md')})
+        watcher.close()
+
+    def test_polling_fallback(self):
+        """The polling watcher finds changes through the stat cache."""
+        self.run_burst(PollingWatcher(self.sync, interval=0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-flight sync lease.
+
+- How to Run:
+    python -m unittest tools/test_sync_lease.py
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import sys
+TOOLS_DIR = Path(__file__).parent.resolve()
+sys.path.insert(0, str(TOOLS_DIR))
+
+from sqlite_memory import SQLiteMemory
+from sync_lease import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for cross-process sync coordination."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp(prefix="single_flight_test_"))
+        self.db_path = str(self.test_dir / "test_memory.db")
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def flight(self, **kwargs) -> SingleFlight:
+        # One SQLiteMemory per caller, like separate processes
+        return SingleFlight(SQLiteMemory(self.db_path), poll_interval=0.01, **kwargs)
+
+    def sync(self, duration: float = 0.0):
+        self.calls += 1
+        time.sleep(duration)
+        return {'success': True, 'stats': {'synced': self.calls}}
+
+    def test_concurrent_callers_share_one_run(self):
+        """With max_age, callers arriving while a sync runs wait for and reuse its result."""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+                       self.flight(max_age=60).run(lambda: self.sync(0.3))))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual({result['owner'] for result, _ in results}, {results[0][0]['owner']})
+
+    def test_caller_arriving_mid_run_syncs_again(self):
+        """A run already scanning may have missed the caller's edits, so it is not shared."""
+        holder = threading.Thread(target=lambda: self.flight().run(lambda: self.sync(0.3)))
+        holder.start()
+        while self.calls == 0:
+            time.sleep(0.01)
+        result, shared = self.flight().run(self.sync)
+        holder.join()
+        self.assertFalse(shared)
+        self.assertEqual((self.calls, result['stats']['synced']), (2, 2))
+
+    def test_recent_result_reused_within_max_age(self):
+        self.flight().run(self.sync)
+        result, shared = self.flight(max_age=60).run(self.sync)
+        self.assertTrue(shared)
+        result, shared = self.flight().run(self.sync)  # by default a finished run is never reused
+        self.assertFalse(shared)
+        self.assertEqual((self.calls, result['stats']['synced']), (2, 2))
+
+    def test_expired_lease_of_crashed_sync_taken_over(self):
+        with SQLiteMemory(self.db_path).transaction() as conn:
+            conn.execute("INSERT INTO sync_leases VALUES ('sync', 'crashed', ?, ?)",
+                         (time.time() - 60, time.time() - 30))
+        result, shared = self.flight().run(self.sync)
+        self.assertFalse(shared)
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(self.flight().holder())
+
+    def test_live_lease_times_out(self):
+        self.assertTrue(self.flight().try_acquire())
+        with self.assertRaises(TimeoutError):
+            self.flight(wait_timeout=0.05).run(self.sync)
+        self.assertEqual(self.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
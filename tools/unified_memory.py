@@ -21,42 +21,64 @@ ONBOARDING & USAGE
     - See session_start_protocol.md, session_end_protocol.md, memory_system_guide.ps1 for onboarding and integration.
 - Troubleshooting:
     - See troubleshooting tips at the end of this file.
-    - Logs: logs/memory_system.log
+    - Logs: logs/memory_system.log (configured by configure_logging(), which the
+      ``memory`` singleton and memory_cli.py call; importing configures nothing)
 """
 
 import os
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterator, List, Optional, Any, Union
 import json
+import sqlite3
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/memory_system.log'),
-        logging.StreamHandler()
-    ]
-)
+import threading
+
 logger = logging.getLogger('unified_memory')
 
 # Import SQLite memory implementation
+from query_cache import DEFAULT_MAX_ENTRIES, QueryCache, write_generation
 from sqlite_memory import SQLiteMemory
 
+
+def configure_logging():
+    """Log to logs/memory_system.log and stderr, unless logging is already configured."""
+    log_dir = Path(__file__).parent.parent / 'logs'
+    log_dir.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_dir / 'memory_system.log', delay=True),
+            logging.StreamHandler()
+        ]
+    )
+
+
 class UnifiedMemory:
     """
     Unified interface to the Windsurf memory system.
     Provides a consistent API for all agents to interact with the memory system.
     """
     
-    def __init__(self, memory_bank_dir: str = None, db_path: str = None):
+    def __init__(self, memory_bank_dir: str = None, db_path: str = None,
+                 read_replica: str = None, max_staleness: float = None,
+                 reuse_connections: bool = False, query_cache_size: int = DEFAULT_MAX_ENTRIES):
         """Initialize the unified memory system.
         
         Args:
             memory_bank_dir: Path to the memory bank directory (default: ../memory-bank)
             db_path: Path to the SQLite database (default: memory-bank/windsurf_memory.db)
+            read_replica: Optional follower database kept current by read_replica.py;
+                reads go there while it is at most max_staleness seconds behind
+                and has shipped this instance's own writes
+            max_staleness: Seconds a follower may lag and still serve reads
+                (default: read_replica.DEFAULT_MAX_STALENESS)
+            reuse_connections: Keep one database connection open per thread
+                (see SQLiteMemory)
+            query_cache_size: Search results to keep in the query cache
+                (see query_cache.py); 0 disables it
         """
         # Set up paths
         self.base_dir = Path(__file__).parent.parent
@@ -68,10 +90,43 @@ class UnifiedMemory:
         (self.base_dir / 'logs').mkdir(exist_ok=True)
         
         # Initialize SQLite memory
-        self.db = SQLiteMemory(str(self.db_path))
+        self.db = SQLiteMemory(str(self.db_path), reuse_connections=reuse_connections)
+        self.router = None
+        if read_replica:
+            from read_replica import DEFAULT_MAX_STALENESS, ReplicaFollower, ReplicaRouter
+            if max_staleness is None:
+                max_staleness = DEFAULT_MAX_STALENESS
+            self.router = ReplicaRouter(self.db, ReplicaFollower(read_replica), max_staleness)
+        self.cache = QueryCache(query_cache_size) if query_cache_size > 0 else None
         
         logger.info(f"Initialized UnifiedMemory with memory bank at {self.memory_bank_dir}")
     
+    def _reader(self) -> SQLiteMemory:
+        """Database to read from: the follower when fresh enough, else the primary."""
+        return self.router.reader() if self.router else self.db
+    
+    def _wrote(self):
+        if self.router:
+            self.router.wrote()
+
+    def _cached(self, method: str, params: tuple, entity_type: Optional[str], compute):
+        """``compute(reader)``, answered from the query cache while no write has committed since."""
+        reader = self._reader()
+        if self.cache is None or reader.in_transaction():
+            return compute(reader)
+        with reader._get_connection() as conn:
+            generation = write_generation(conn, entity_type)
+        key = (reader.db_path, method, params)
+        hit, result = self.cache.get(key, generation)
+        if not hit:
+            result = compute(reader)
+            self.cache.put(key, generation, result)
+        return result
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Size and hit-rate counters of the query cache (empty when disabled)."""
+        return self.cache.stats() if self.cache else {}
+    
     def create_entity(self, entity_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new entity in the memory system.
         
@@ -88,6 +143,7 @@ class UnifiedMemory:
         
         # Create in database
         result = self.db.create_entity(entity_data)
+        self._wrote()
         
         logger.info(f"Created entity {result.get('id')} of type {entity_data.get('type', 'unknown')}")
         return result
@@ -101,7 +157,7 @@ class UnifiedMemory:
         Returns:
             Entity data or None if not found
         """
-        return self.db.get_entity(entity_id)
+        return self._reader().get_entity(entity_id)
     
     def update_entity(self, entity_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update an existing entity.
@@ -118,6 +174,7 @@ class UnifiedMemory:
         updates['metadata']['updated_at'] = datetime.utcnow().isoformat()
         
         result = self.db.update_entity(entity_id, updates)
+        self._wrote()
         if result:
             logger.info(f"Updated entity {entity_id}")
         else:
@@ -134,6 +191,7 @@ class UnifiedMemory:
             True if deleted, False otherwise
         """
         success = self.db.delete_entity(entity_id)
+        self._wrote()
         if success:
             logger.info(f"Deleted entity {entity_id}")
         else:
@@ -151,8 +209,56 @@ class UnifiedMemory:
         Returns:
             List of matching entities
         """
-        return self.db.search_entities(query, entity_type, limit)
-    
+        entity_type = entity_type or None
+        # LIKE ignores ASCII case, so such queries share an entry
+        key = query.lower() if query.isascii() else query
+        return self._cached('search_entities', (key, entity_type, int(limit)), entity_type,
+                            lambda reader: reader.search_entities(query, entity_type, limit))
+
+    def query_entities(self, query: str, limit: int = 20, after: str = None) -> Dict[str, Any]:
+        """Find entities with the query language in memory_query.py.
+
+        Args:
+            query: Query such as ``type:knowledge tag:decision "auth flow"``
+            limit: Maximum number of entities to return
+            after: The ``next`` cursor of the previous page
+
+        Returns:
+            Dictionary with the ``entities`` and the ``next`` page cursor (None on the last page)
+        """
+        from memory_query import run_query
+
+        return self._cached('query_entities', (query.strip(), int(limit), after), None,
+                            lambda reader: run_query(reader, query, limit, after))
+
+    def iter_entities(self, query: str = '', after: str = None) -> Iterator[Dict[str, Any]]:
+        """Stream every entity matching a query from one database cursor.
+
+        Args:
+            query: Query in the memory_query.py language; empty matches all
+            after: Start after this ``next`` cursor of query_entities
+
+        Yields:
+            Entity dictionaries, in the query's sort order
+        """
+        from memory_query import iter_query
+
+        yield from iter_query(self._reader(), query, after)
+
+    def count_entities(self, query: str = '') -> int:
+        """Count the entities matching a query without reading them.
+
+        Args:
+            query: Query in the memory_query.py language; empty counts all
+
+        Returns:
+            Number of matching entities
+        """
+        from memory_query import count_query
+
+        return self._cached('count_entities', (query.strip(),), None,
+                            lambda reader: count_query(reader, query))
+
     def create_relationship(self, from_id: str, to_id: str, rel_type: str, data: Dict = None) -> bool:
         """Create a relationship between two entities.
         
@@ -165,7 +271,13 @@ class UnifiedMemory:
         Returns:
             True if created, False otherwise
         """
-        return self.db.create_relationship(from_id, to_id, rel_type, data or {})
+        try:
+            self.db.create_relation(from_id, to_id, rel_type, data or {})
+        except (ValueError, sqlite3.IntegrityError) as e:
+            logger.warning(f"Failed to create relationship {from_id} --[{rel_type}]--> {to_id}: {e}")
+            return False
+        self._wrote()
+        return True
     
     def get_relationships(self, entity_id: str, rel_type: str = None) -> List[Dict[str, Any]]:
         """Get relationships for an entity.
@@ -177,7 +289,9 @@ class UnifiedMemory:
         Returns:
             List of relationships
         """
-        return self.db.get_relationships(entity_id, rel_type)
+        return [{'id': rel['id'], 'from_id': rel['source_id'], 'to_id': rel['target_id'],
+                 'type': rel['type'], 'data': rel['properties'], 'created_at': rel['created_at']}
+                for rel in self._reader().get_relations(entity_id, rel_type)]
     
     def sync_from_files(self) -> Dict[str, Any]:
         """Synchronize the database with the file-based memory bank.
@@ -196,8 +310,21 @@ class UnifiedMemory:
             'errors': syncer.error_count if hasattr(syncer, 'error_count') else 0
         }
 
-# Singleton instance for easy importing
-memory = UnifiedMemory()
+# Singleton instance for easy importing (``from unified_memory import memory``),
+# created on first access so importing this module opens no database
+_memory: Optional[UnifiedMemory] = None
+_memory_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    global _memory
+    if name != 'memory':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _memory_lock:
+        if _memory is None:
+            configure_logging()
+            _memory = UnifiedMemory()
+    return _memory
 
 # ---
 # TROUBLESHOOTING & ONBOARDING TIPS